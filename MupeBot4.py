@@ -1,32 +1,102 @@
+import argparse
+import glob
+import os
 import subprocess
+import sys
+import threading
 import time
-import pyautogui
-import os
-import shutil
-import speech_recognition as sr
-from gtts import gTTS
-from playsound import playsound
-import tempfile
 from datetime import datetime
-from transformers import pipeline
-from tkinter import Tk, filedialog
 
-# Cargar el modelo GPT en español
-generador = pipeline('text-generation', model='datificate/gpt2-small-spanish')
+# Los componentes pesados (modelo GPT, voz y reconocimiento) no se importan al arrancar: se cargan
+# la primera vez que se usan, así los comandos que no los necesitan no esperan por ellos
+
+# Componente que se carga recién la primera vez que se pide (una sola vez aunque lo pidan varios hilos)
+class CargaDiferida:
+    def __init__(self, nombre, cargar):
+        self.nombre = nombre
+        self._cargar = cargar
+        self._lock = threading.Lock()
+        self._valor = None
+        self.cargado = False
+        self.segundos = None
+
+    def obtener(self):
+        if not self.cargado:
+            with self._lock:
+                if not self.cargado:
+                    inicio = time.perf_counter()
+                    self._valor = self._cargar()
+                    self.segundos = time.perf_counter() - inicio
+                    self.cargado = True
+        return self._valor
+
+def _cargar_generador():
+    from transformers import pipeline
+    return pipeline('text-generation', model='datificate/gpt2-small-spanish')
+
+# Frases fijas del asistente: se sintetizan una sola vez y después suenan desde el disco, sin red
+FRASES = [
+    "Escuchando...",
+    "No te he entendido, por favor, repite el comando.",
+    "Error al conectar con el servicio de reconocimiento de voz.",
+    "Actualizando productos, por favor espera.",
+    "La exportación no cambió desde la última actualización.",
+    "Productos actualizados correctamente.",
+    "Archivo seleccionado, procediendo a actualizar.",
+    "No se seleccionó ningún archivo.",
+]
+
+def _cargar_voz():
+    from playsound import playsound
+
+    from voz import BackendGTTS, CacheFrases, Voz
+
+    cache = CacheFrases(BackendGTTS(), frases=FRASES)
+    # Las frases que falten en disco se sintetizan de fondo; si no hay red se reintentan al decirlas
+    threading.Thread(target=cache.precalentar, name='frases', daemon=True).start()
+    return Voz(cache, playsound)
+
+def _cargar_reconocimiento():
+    import speech_recognition
+    return speech_recognition
+
+# Modelo GPT en español, Google Text-to-Speech y reconocimiento de voz
+generador = CargaDiferida('modelo GPT', _cargar_generador)
+voz = CargaDiferida('voz', _cargar_voz)
+reconocimiento = CargaDiferida('reconocimiento de voz', _cargar_reconocimiento)
+COMPONENTES = [voz, reconocimiento, generador]
+
+# Función para cargar componentes en un hilo de fondo mientras el asistente ya escucha
+# Si un comando necesita uno que todavía se está cargando, espera a que termine esa misma carga
+def precargar(componentes=COMPONENTES):
+    def cargar_todos():
+        for componente in componentes:
+            try:
+                componente.obtener()
+            except Exception as e:
+                print(f"No se pudo precargar {componente.nombre}: {e}")
+
+    hilo = threading.Thread(target=cargar_todos, name='precarga', daemon=True)
+    hilo.start()
+    return hilo
 
 # Función para hablar usando Google Text-to-Speech
-def hablar(texto):
-    tts = gTTS(texto, lang="es")
-    with tempfile.NamedTemporaryFile(delete=True) as fp:
-        tts.save(f"{fp.name}.mp3")
-        playsound(f"{fp.name}.mp3")
+# Vuelve enseguida: el audio suena de fondo y las frases fijas salen del cache en disco
+# Con esperar=True vuelve recién cuando terminó de sonar (ej. antes de abrir el micrófono)
+def hablar(texto, esperar=False):
+    voz.obtener().decir(texto)
+    if esperar:
+        voz.obtener().esperar()
 
 # Función para reconocer comandos de voz
 def reconocer_comando():
+    sr = reconocimiento.obtener()
     recognizer = sr.Recognizer()
+    # El aviso tiene que terminar de sonar antes de medir el ruido ambiente y escuchar:
+    # si no, el micrófono graba la propia voz del asistente
+    print("Escuchando...")
+    hablar("Escuchando...", esperar=True)
     with sr.Microphone() as source:
-        print("Escuchando...")
-        hablar("Escuchando...")
         recognizer.adjust_for_ambient_noise(source)
         audio = recognizer.listen(source)
     
@@ -42,70 +112,34 @@ def reconocer_comando():
         return None
 
 # Función para actualizar productos con CSV especificado
+# Sin CSV, la exportación se baja por HTTP con sincronizacion.py (sin abrir Edge ni simular teclas);
+# la dirección se toma de la variable SOOP_URL_EXPORTACION
 def actualizar_productos(csv_path=None):
     hablar("Actualizando productos, por favor espera.")
-    
-    # Ruta al ejecutable de Edge y los argumentos para iniciar la aplicación
-    command = r'C:\Program Files (x86)\Microsoft\Edge\Application\msedge_proxy.exe'
-    args = [
-        '--profile-directory=Default',
-        '--app-id=aaiihkibclfhphlgcllldaaphlhflgoc',
-        '--app-url=https://smartycart.com.ar/',
-        '--app-run-on-os-login-mode=windowed',
-        '--app-launch-source=19'
-    ]
-
-    # Ejecutar el comando para abrir Edge en modo aplicación
-    subprocess.Popen([command] + args)
-    time.sleep(5)
-
-    # Simular teclas y clicks
+
     try:
-        pyautogui.press('tab')
-        time.sleep(0.5)
-        pyautogui.press('tab')
-        time.sleep(0.5)
-        pyautogui.press('down')
-        time.sleep(0.5)
-        pyautogui.press('enter')
-        time.sleep(1)
-
-        for _ in range(29):
-            pyautogui.press('tab')
-            time.sleep(0.1)
-
-        pyautogui.press('space')
-        time.sleep(1)
-        pyautogui.click(x=2960, y=380)
-        time.sleep(1)
-        pyautogui.click(x=3115, y=308)
-        time.sleep(10)
-
-        if not csv_path:
-            # Detectar el archivo CSV más reciente en la carpeta de descargas
-            download_folder = r'C:\Users\virtu\Downloads'
-            files = os.listdir(download_folder)
-            paths = [os.path.join(download_folder, file) for file in files]
-            recent_file = max(paths, key=os.path.getctime)
-            print(f"Archivo más reciente encontrado: {recent_file}")
-            csv_path = recent_file
-
-        # Renombrar y mover el archivo CSV
-        new_name = 'tmp_28_1728896035.csv'
-        new_path = os.path.join(r'C:\Users\virtu\Repositorios\Soop', new_name)
-        shutil.move(csv_path, new_path)
-        print(f"Archivo CSV movido a {new_path}")
-
-        # Git pull, commit y push al repositorio Soop
+        from sincronizacion import FuenteCarpeta, ServicioSincronizacion, crear_fuente
+
+        if csv_path:
+            fuente = FuenteCarpeta(os.path.dirname(csv_path), glob.escape(os.path.basename(csv_path)))
+        else:
+            fuente = crear_fuente()
+
+        # Validar e ingerir la exportación y publicarla como versión nueva del catálogo local;
+        # la app (con SOOP_CATALOGO_COMPARTIDO) la toma sola en unos segundos, sin pasar por git ni GitHub
         repositorio_path = r'C:\Users\virtu\Repositorios\Soop'
-        subprocess.run(['git', '-C', repositorio_path, 'pull', 'origin', 'main'])
-        subprocess.run(['git', '-C', repositorio_path, 'add', '.'])
-        subprocess.run(['git', '-C', repositorio_path, 'commit', '-m', f'Subida de {new_name}'])
-        subprocess.run(['git', '-C', repositorio_path, 'push', 'origin', 'main'])
+        servicio = ServicioSincronizacion(fuente, os.path.join(repositorio_path, '1804no.xlsx'),
+                                         os.path.join(repositorio_path, '.cache_catalogo'),
+                                         dir_compartido=os.path.join(repositorio_path, '.catalogo_compartido'))
+        resultado = servicio.sincronizar()
+        if resultado['estado'] != 'actualizado':
+            hablar("La exportación no cambió desde la última actualización.")
+            return
+        print(f"Catálogo publicado ({resultado['filas']} productos)")
 
         # Confirmar la actualización y mostrar la hora
         hora_actualizacion = datetime.now().strftime("%H:%M:%S")
-        hablar(f"Productos actualizados correctamente a las {hora_actualizacion}.")
+        hablar("Productos actualizados correctamente.")
         print(f"Productos actualizados a las {hora_actualizacion}.")
 
     except Exception as e:
@@ -114,6 +148,8 @@ def actualizar_productos(csv_path=None):
 
 # Función para seleccionar un archivo CSV
 def seleccionar_csv():
+    from tkinter import Tk, filedialog
+
     Tk().withdraw()  # Ocultar la ventana principal
     csv_path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
     if csv_path:
@@ -123,20 +159,63 @@ def seleccionar_csv():
         hablar("No se seleccionó ningún archivo.")
 
 # Bucle principal
-while True:
-    comando = reconocer_comando()
-    if comando:
-        if "actualizar productos" in comando:
-            actualizar_productos()
-            break  # Termina el bucle después de la actualización
-        elif "subir archivo" in comando:
-            seleccionar_csv()
-            break
+def escuchar():
+    while True:
+        comando = reconocer_comando()
+        if comando:
+            if "actualizar productos" in comando:
+                actualizar_productos()
+                break  # Termina el bucle después de la actualización
+            elif "subir archivo" in comando:
+                seleccionar_csv()
+                break
+            else:
+                # Generar una respuesta con el modelo GPT
+                respuesta = generador.obtener()(comando, max_length=50, num_return_sequences=1, do_sample=True)
+                texto_respuesta = respuesta[0]['generated_text']
+                print(f"Asistente: {texto_respuesta}")
+                hablar(texto_respuesta)
         else:
-            # Generar una respuesta con el modelo GPT
-            respuesta = generador(comando, max_length=50, num_return_sequences=1, do_sample=True)
-            texto_respuesta = respuesta[0]['generated_text']
-            print(f"Asistente: {texto_respuesta}")
-            hablar(texto_respuesta)
-    else:
-        hablar("No te he entendido, por favor, repite el comando.")
+            hablar("No te he entendido, por favor, repite el comando.")
+
+# Función para medir el arranque: cuánto tarda en importarse el bot (en un proceso nuevo, como al abrirlo)
+# y cuánto tarda en cargarse cada componente la primera vez que se usa
+def medir_arranque(repeticiones=5):
+    carpeta = os.path.dirname(os.path.abspath(__file__))
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import MupeBot4'], cwd=carpeta, check=True)
+        tiempos.append(time.perf_counter() - inicio)
+    print(f"{'Arranque (proceso nuevo + import)':<36}{min(tiempos):>8.2f} s  (mejor de {repeticiones})")
+
+    for componente in COMPONENTES:
+        try:
+            componente.obtener()
+            print(f"{'Primera carga: ' + componente.nombre:<36}{componente.segundos:>8.2f} s")
+        except Exception as e:
+            print(f"{'Primera carga: ' + componente.nombre:<36}{'-':>8}    (no disponible: {e})")
+    cargados = [c.segundos for c in COMPONENTES if c.cargado]
+    print(f"{'Arranque cargando todo al inicio':<36}{min(tiempos) + sum(cargados):>8.2f} s  (como antes)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Asistente por voz para actualizar el catálogo.")
+    parser.add_argument('--precargar', action='store_true',
+                        help="Cargar voz, reconocimiento y modelo en segundo plano mientras se escucha")
+    parser.add_argument('--medir-arranque', action='store_true',
+                        help="Medir el tiempo de arranque y de carga de cada componente y salir")
+    args = parser.parse_args(argv)
+
+    if args.medir_arranque:
+        medir_arranque()
+        return 0
+    if args.precargar:
+        precargar()
+    escuchar()
+    # Dejar que termine de sonar lo último que se dijo antes de cerrar
+    if voz.cargado:
+        voz.obtener().esperar()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,91 +1,53 @@
 import streamlit as st
 import pandas as pd
-from PIL import Image
-import requests
-from io import BytesIO
-from datetime import datetime
-import pytz
 import os
-
-# Definir la zona horaria de Argentina
-tz_argentina = pytz.timezone('America/Argentina/Buenos_Aires')
-
-# Función para obtener la fecha de la última modificación del archivo en GitHub
-def obtener_fecha_modificacion_github(usuario, repo, archivo):
-    url = f"https://api.github.com/repos/{usuario}/{repo}/commits?path={archivo}&per_page=1"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        commit_data = response.json()[0]
-        fecha_utc = commit_data['commit']['committer']['date']
-        fecha_utc = datetime.strptime(fecha_utc, "%Y-%m-%dT%H:%M:%SZ")
-        fecha_argentina = fecha_utc.astimezone(tz_argentina)
-        return fecha_argentina.strftime("%Y-%m-%d %H:%M:%S")
-    except:
-        return None
+import tempfile
+
+from buscador import MAX_RESULTADOS, IndiceBusqueda, MotorBusqueda, buscar_productos
+from catalogo import IndiceCatalogo, actualizar_indice, cargar_catalogo, firma_catalogo, ingerir_csv, pesos
+from compartido import abrir_catalogo, generacion_actual, publicar_si_cambio, revertir
+from escaneo import HistorialEscaneos, LectorCodigos
+from fecha_github import FechaModificacionGithub
+from imagenes import TAMANO_DETALLE, TAMANO_LISTA, CacheImagenes
+from instrumentacion import RegistroRendimiento
+from listado import html_pagina
+from lista_precios import exportar_lista
+from presupuesto import (agregar_lineas, calcular_presupuesto, leer_lineas, linea, lineas_vacias, presupuesto_csv,
+                         presupuesto_en_pesos, totales_presupuesto)
 
 # Detalles del repositorio
 usuario = "VASCOSORO"
 repo = "Soop"
 archivo = '1804no.xlsx'
 
-# Intentar obtener la fecha de modificación
-fecha_ultima_modificacion = obtener_fecha_modificacion_github(usuario, repo, archivo)
+# Contraseña de las secciones de administración (carga de archivos y panel de rendimiento)
+contrasena_admin = "pasteur100pre"
+
+# Tiempos de cada rerun por etapa, compartidos por todas las sesiones (panel de rendimiento y archivos en .perfil/)
+@st.cache_resource
+def load_registro_rendimiento():
+    return RegistroRendimiento()
+
+registro_rendimiento = load_registro_rendimiento()
+
+# Mediciones en curso: la de la página y, mientras se ejecuta, la del fragmento del escáner
+mediciones = [registro_rendimiento.nueva_medicion()]
+
+# Función para medir un bloque como parte de la etapa `nombre` del rerun en curso
+def etapa(nombre):
+    return mediciones[-1].etapa(nombre)
 
-# Función para cargar datos
-@st.cache_data
-def load_data(file_path):
+# Fecha de la última modificación en GitHub: se consulta recién al abrir los detalles y se cachea con TTL/ETag
+@st.cache_resource
+def load_fecha_github():
+    return FechaModificacionGithub(usuario, repo, archivo)
+
+# Función para cargar datos (usa el snapshot Parquet de catalogo.py si el archivo no cambió)
+# La firma es parte de la clave del cache: así se toma el catálogo que ingiere sincronizacion.py sin reiniciar la app
+@st.cache_data(max_entries=2)
+def load_data(file_path, firma):
     try:
-        if not os.path.isfile(file_path):
-            raise FileNotFoundError(f"El archivo '{file_path}' no se encuentra en el directorio.")
-        df = pd.read_excel(file_path, engine='openpyxl')
-        
-        # Renombrar columnas para que coincidan con lo esperado
-        columnas_renombradas = {
-            "Id": "id",
-            "Id Externo": "id externo",
-            "Codigo": "Codigo",
-            "Nombre": "Nombre",
-            "Precio x Mayor": "Precio x Mayor",
-            "Activo": "Activo",
-            "Fecha Creado": "Fecha Creado",
-            "Fecha Modificado": "Fecha Modificado",
-            "Descripcion": "Descripcion",
-            "Orden": "Orden",
-            "Codigo de Barras": "Codigo de Barras",
-            "unidad por bulto": "unidad por bulto",
-            "inner": "Presentacion/paquete",
-            "forzar multiplos": "forzar venta x cantidad",
-            "Costo usd": "Costo (USD)",
-            "Costo": "Costo (Pesos)",
-            "Etiquetas": "Etiquetas",
-            "Stock": "Stock",
-            "StockSuc2": "StockSuc2",
-            "Marca": "Marca",
-            "categorias": "Categorias",
-            "imagen": "imagen",
-            "Proveedor": "Proveedor",
-            "Pasillo": "Pasillo",
-            "Estante": "Estante",
-            "de Vencimiento": "Fecha de Vencimiento",
-            "Columna": "Columna",
-            "Precio": "Precio",
-            "Precio face": "Ultimo Precio (Pesos)",
-            "Mayorista": "Ultimo Precio (USD)"
-        }
-        df = df.rename(columns=columnas_renombradas)
-        
-        # Asegurar que StockSuc2 tenga valores numéricos y rellenar con 0 si falta
-        if 'StockSuc2' in df.columns:
-            df['StockSuc2'] = pd.to_numeric(df['StockSuc2'], errors='coerce').fillna(0)
-        else:
-            df['StockSuc2'] = 0
-        
-        # Convertir 'Fecha Creado' a datetime si no está ya en ese formato
-        if 'Fecha Creado' in df.columns:
-            df['Fecha Creado'] = pd.to_datetime(df['Fecha Creado'], errors='coerce')
-        
-        return df
+        return cargar_catalogo(file_path)
     except FileNotFoundError as fnf_error:
         st.error(str(fnf_error))
         return None
@@ -97,8 +59,88 @@ def load_data(file_path):
 # Nombre del archivo
 file_path = '1804no.xlsx'
 
+# Modo compartido: con varias instancias de la app, un proceso cargador (compartido.py o sincronizacion.py)
+# publica versiones del catálogo en esta carpeta y cada instancia lo mapea en memoria en vez de leer el archivo
+dir_compartido = os.environ.get('SOOP_CATALOGO_COMPARTIDO')
+
+# Segundos entre revisiones de la versión vigente del catálogo en disco (ver vigilar_catalogo)
+INTERVALO_VIGILANCIA = 5
+
+# Generación publicada del catálogo compartido, mapeada una vez por proceso (sin copiarla)
+@st.cache_resource(max_entries=2)
+def load_catalogo_compartido(dir_compartido, archivo):
+    return abrir_catalogo(dir_compartido, archivo)
+
+# Función para obtener la firma de la versión vigente en disco, sin cargar nada (stat y un JSON chico)
+# En modo compartido la firma es el archivo de la versión, que se nombra por su contenido: al volver a una
+# versión anterior se reutilizan el catálogo mapeado y los índices si todavía están en cache
+def firma_vigente():
+    if not dir_compartido:
+        return firma_catalogo(file_path)
+    generacion = generacion_actual(dir_compartido)
+    return ('compartido', generacion['archivo']) if generacion else None
+
+# Función para obtener el catálogo vigente y su firma, del archivo local o de la generación compartida
+def cargar_vigente():
+    firma = firma_vigente()
+    if not dir_compartido:
+        return load_data(file_path, firma), firma
+    if firma is None:
+        st.error(f"Todavía no se publicó el catálogo en '{dir_compartido}' (ejecutar compartido.py).")
+        return None, None
+    return load_catalogo_compartido(dir_compartido, firma[1]), firma
+
+# Vigilancia del catálogo: cada pocos segundos se mira si hay una versión nueva en disco (sincronización,
+# publicación o vuelta atrás) y solo en ese caso se vuelve a ejecutar la página para tomarla
+@st.fragment(run_every=INTERVALO_VIGILANCIA)
+def vigilar_catalogo(firma):
+    if firma_vigente() != firma:
+        st.rerun()
+
+# Índice de búsqueda: se arma una vez por versión del catálogo (firma = mtime + snapshot) y se comparte entre sesiones
+# Al subir un archivo nuevo se le pasa el índice anterior y solo se aplican las filas que cambiaron
+# (se guardan las dos últimas versiones: una sesión puede seguir en la anterior hasta su próximo rerun)
+@st.cache_resource(max_entries=2)
+def load_indice(file_path, firma, _df, _anterior=None):
+    if _anterior is None:
+        return IndiceCatalogo(_df)
+    return actualizar_indice(_anterior, _df)
+
+# Índice de búsqueda rápida (prefijos y trigramas), también uno por versión del archivo
+@st.cache_resource(max_entries=2)
+def load_buscador(file_path, firma, _indice, _anterior=None):
+    if _anterior is None:
+        return IndiceBusqueda(_indice)
+    return _anterior.aplicar_delta(_indice)
+
+# Motor de búsqueda por relevancia (nombre, marca, categorías y descripción), uno por versión del catálogo
+# Como el buscador, al subir un archivo nuevo parte del motor anterior y solo lee las filas que cambiaron
+@st.cache_resource(max_entries=2)
+def load_motor(file_path, firma, _indice, _anterior=None):
+    if _anterior is None:
+        return MotorBusqueda(_indice)
+    return _anterior.aplicar_delta(_indice)
+
+# Índice hash de códigos de barras y códigos para el escáner, uno por versión del catálogo
+@st.cache_resource(max_entries=2)
+def load_lector(file_path, firma, _indice):
+    return LectorCodigos(_indice)
+
+# Cache de imágenes en disco compartido por todas las sesiones (sesión HTTP con pool, miniaturas y límite LRU)
+@st.cache_resource
+def load_cache_imagenes():
+    return CacheImagenes()
+
 # Intentar cargar el archivo
-df = load_data(file_path)
+with etapa('carga'):
+    df, firma = cargar_vigente()
+    if df is None:
+        st.stop()
+    indice = load_indice(file_path, firma, df)
+    buscador = load_buscador(file_path, firma, indice)
+    motor = load_motor(file_path, firma, indice)
+    lector = load_lector(file_path, firma, indice)
+vigilar_catalogo(firma)
 
 # Checkbox para mostrar/ocultar la sección de detalles de archivo y actualización
 mostrar_seccion_superior = st.checkbox("Mostrar detalles de archivo y botón de actualización", value=False)
@@ -109,8 +151,15 @@ if mostrar_seccion_superior:
     st.markdown("<hr>", unsafe_allow_html=True)
     
     # Mostrar la fecha de última modificación si está disponible
-    if fecha_ultima_modificacion:
-        st.markdown(f"<p style='font-size: 12px;'>Última modificación del archivo {archivo}: {fecha_ultima_modificacion}</p>", unsafe_allow_html=True)
+    # En modo compartido se muestra la versión publicada en disco y no hace falta preguntarle a GitHub
+    if dir_compartido:
+        generacion = generacion_actual(dir_compartido) or {}
+        st.markdown(f"<p style='font-size: 12px;'>Versión {generacion.get('generacion')} del catálogo, publicada el {generacion.get('fecha')} ({generacion.get('origen') or archivo})</p>", unsafe_allow_html=True)
+    else:
+        with etapa('github'):
+            fecha_ultima_modificacion = load_fecha_github().obtener()
+        if fecha_ultima_modificacion:
+            st.markdown(f"<p style='font-size: 12px;'>Última modificación del archivo {archivo}: {fecha_ultima_modificacion}</p>", unsafe_allow_html=True)
     
     st.success(f"Se cargaron {df.shape[0]} filas y {df.shape[1]} columnas del archivo de Excel.")
 
@@ -121,8 +170,15 @@ if mostrar_seccion_superior:
         # Campo de contraseña para subir archivo
         password = st.text_input("Ingrese la contraseña para habilitar la carga del archivo:", type="password")
         
-        if password == "pasteur100pre":
+        if password == contrasena_admin:
             st.success("Contraseña correcta. Puede cargar un nuevo archivo para actualizar.")
+            # Volver atrás solo mueve el puntero a una versión que ya está en disco
+            if dir_compartido and st.button("Volver a la versión anterior del catálogo"):
+                try:
+                    revertir(dir_compartido)
+                    st.rerun()
+                except ValueError as e:
+                    st.error(str(e))
             uploaded_file = st.file_uploader("Seleccione un archivo Excel o CSV para subir", type=["xlsx", "csv"])
             if uploaded_file is not None:
                 try:
@@ -131,13 +187,27 @@ if mostrar_seccion_superior:
                         with open(file_path, "wb") as f:
                             f.write(uploaded_file.getbuffer())
                     elif file_extension == ".csv":
-                        csv_data = pd.read_csv(uploaded_file, encoding="utf-8", sep=None, engine="python")
-                        csv_data.to_excel(file_path, index=False, engine='openpyxl')
-                        st.success("Archivo CSV convertido a Excel y guardado correctamente.")
+                        # El CSV se lee una sola vez y va directo al snapshot del catálogo
+                        ingerir_csv(uploaded_file.getvalue(), file_path, origen=uploaded_file.name)
+                        st.success("Archivo CSV cargado correctamente.")
                     
+                    # En modo compartido se publica una generación nueva y las demás instancias la toman en su próximo rerun;
+                    # el índice se arma sobre la generación mapeada (aplicar el delta copiaría el catálogo entero al proceso)
+                    if dir_compartido:
+                        publicar_si_cambio(file_path, dir_compartido)
+                        indice_anterior, buscador_anterior, motor_anterior = None, None, None
+                    else:
+                        indice_anterior, buscador_anterior, motor_anterior = indice, buscador, motor
+
                     # Limpiar el cache y recargar los datos
                     st.cache_data.clear()
-                    df = load_data(file_path)
+                    with etapa('carga'):
+                        df, firma = cargar_vigente()
+                        indice = load_indice(file_path, firma, df, indice_anterior)
+                        buscador = load_buscador(file_path, firma, indice, buscador_anterior)
+                        motor = load_motor(file_path, firma, indice, motor_anterior)
+                        lector = load_lector(file_path, firma, indice)
+                    load_cache_imagenes().olvidar(indice.urls_quitadas)
                     st.success("Datos actualizados correctamente.")
                 except Exception as e:
                     st.error(f"Error al subir el archivo: {e}")
@@ -160,39 +230,61 @@ if 'selected_nombre' not in st.session_state:
 def on_codigo_change():
     codigo = st.session_state.selected_codigo
     if codigo:
-        producto_data = df[df['Codigo'] == codigo].iloc[0]
-        st.session_state.selected_nombre = producto_data['Nombre']
+        producto_data = indice.buscar_codigo(codigo)
+        st.session_state.selected_nombre = producto_data['Nombre'] if producto_data else ''
     else:
         st.session_state.selected_nombre = ''
 
 def on_nombre_change():
     nombre = st.session_state.selected_nombre
     if nombre:
-        producto_data = df[df['Nombre'] == nombre].iloc[0]
-        st.session_state.selected_codigo = producto_data['Codigo']
+        producto_data = indice.buscar_nombre(nombre)
+        st.session_state.selected_codigo = str(producto_data['Codigo']) if producto_data else ''
     else:
         st.session_state.selected_codigo = ''
 
-# Crear 2 columnas para el buscador por código y el buscador por nombre
-col_codigo, col_nombre = st.columns([1, 2])
+# Búsqueda rápida: el servidor filtra y solo se mandan al navegador los mejores resultados
+busqueda_rapida = st.checkbox("Búsqueda rápida", value=True, key='busqueda_rapida')
+producto_data = None
+
+if busqueda_rapida:
+    consulta = st.text_input("Buscar por código, código de barras, nombre, marca, categoría o descripción", key='consulta_busqueda')
+    if consulta:
+        with etapa('busqueda'):
+            resultados = buscar_productos(buscador, motor, consulta, MAX_RESULTADOS)
+        if resultados:
+            opciones = {}
+            productos_resultado = indice.df.iloc[resultados]
+            for pos, codigo, nombre in zip(resultados, productos_resultado['Codigo'].tolist(), productos_resultado['Nombre'].tolist()):
+                opciones.setdefault(f"{codigo} | {nombre}", pos)
+            seleccion = st.selectbox("Resultados", [""] + list(opciones), key='resultado_busqueda')
+            if seleccion:
+                producto_data = indice.fila(opciones[seleccion])
+        else:
+            st.warning("No se encontraron productos para la búsqueda.")
+else:
+    # Crear 2 columnas para el buscador por código y el buscador por nombre
+    col_codigo, col_nombre = st.columns([1, 2])
 
-with col_codigo:
-    codigo_lista = [""] + df['Codigo'].astype(str).unique().tolist()
-    st.selectbox("Buscar por Código", codigo_lista, key='selected_codigo', on_change=on_codigo_change)
+    # Los selectbox mandan todas las opciones al navegador en cada rerun: es la etapa que más crece con el catálogo
+    with etapa('selectbox'):
+        with col_codigo:
+            codigo_lista = [""] + indice.codigos
+            st.selectbox("Buscar por Código", codigo_lista, key='selected_codigo', on_change=on_codigo_change)
 
-with col_nombre:
-    nombre_lista = [""] + df['Nombre'].unique().tolist()
-    st.selectbox("Buscar por Nombre", nombre_lista, key='selected_nombre', on_change=on_nombre_change)
+        with col_nombre:
+            nombre_lista = [""] + indice.nombres
+            st.selectbox("Buscar por Nombre", nombre_lista, key='selected_nombre', on_change=on_nombre_change)
+
+    if st.session_state.selected_codigo and st.session_state.selected_nombre:
+        with etapa('busqueda'):
+            producto_data = indice.buscar_codigo(st.session_state.selected_codigo)
 
 # Funciones adicionales
-@st.cache_data
-def cargar_imagen(url):
-    try:
-        response = requests.get(url)
-        img = Image.open(BytesIO(response.content))
-        return img
-    except:
-        return None
+# Devuelve la ruta de la miniatura local de la imagen, o None si no se pudo descargar
+def cargar_imagen(url, ancho=TAMANO_LISTA):
+    with etapa('imagenes'):
+        return load_cache_imagenes().obtener(url, ancho)
 
 def obtener_color_stock(stock):
     if stock > 5:
@@ -205,13 +297,14 @@ def obtener_color_stock(stock):
         return 'black'
 
 # Mostrar producto completo
-def mostrar_producto_completo(producto, mostrar_mayorista, mostrar_descuento, descuento):
+# `prefijo` distingue las claves de los widgets cuando se muestra más de una ficha en la página
+def mostrar_producto_completo(producto, mostrar_mayorista, mostrar_descuento, descuento, prefijo=''):
     col_img, col_datos = st.columns([2, 3])
     
     with col_img:
         imagen_url = producto.get('imagen', '')
         if imagen_url:
-            imagen = cargar_imagen(imagen_url)
+            imagen = cargar_imagen(imagen_url, TAMANO_DETALLE)
             if imagen:
                 img_size = st.session_state.get('img_size', 300)
                 st.image(imagen, width=img_size)
@@ -220,15 +313,15 @@ def mostrar_producto_completo(producto, mostrar_mayorista, mostrar_descuento, de
         st.write("**Ajustar Imagen:**")
         col_btn_plus, col_btn_minus = st.columns([1, 1])
         with col_btn_plus:
-            if st.button("➕", key="aumentar_tamano"):
+            if st.button("➕", key=f"{prefijo}aumentar_tamano"):
                 st.session_state.img_size = min(st.session_state.get('img_size', 300) + 50, 600)
         with col_btn_minus:
-            if st.button("➖", key="reducir_tamano"):
+            if st.button("➖", key=f"{prefijo}reducir_tamano"):
                 st.session_state.img_size = max(st.session_state.get('img_size', 300) - 50, 100)
 
     with col_datos:
-        # Mostrar precio según selección
-        precio = producto['Precio x Mayor'] if mostrar_mayorista else producto['Precio']
+        # Mostrar precio según selección (el catálogo guarda los precios en centavos)
+        precio = pesos(producto['Precio x Mayor'] if mostrar_mayorista else producto['Precio'])
         st.markdown(f"<h2 style='font-size: 36px;'>{producto['Codigo']} | {producto['Nombre']} | ${precio:,.2f}</h2>", unsafe_allow_html=True)
         
         # Mostrar calculador de descuento si está activado
@@ -244,20 +337,127 @@ def mostrar_producto_completo(producto, mostrar_mayorista, mostrar_descuento, de
         if 'StockSuc2' in producto and producto['StockSuc2'] > 0 and stock_color == 'red':
             st.markdown(f"<span style='font-size: 24px; color: green;'>Disponible en Suc. 2: {producto['StockSuc2']}</span>", unsafe_allow_html=True)
 
-        if st.checkbox('Mostrar Ubicación', key='ubicacion_checkbox'):
+        if st.checkbox('Mostrar Ubicación', key=f'{prefijo}ubicacion_checkbox'):
             st.write(f"**Pasillo**: {producto.get('Pasillo', 'Sin datos')}")
             st.write(f"**Estante**: {producto.get('Estante', 'Sin datos')}")
             st.write(f"**Proveedor**: {producto.get('Proveedor', 'Sin datos')}")
 
+        st.button("Agregar al presupuesto", key=f'{prefijo}agregar_presupuesto', on_click=on_agregar_presupuesto,
+                  args=(linea(producto['Codigo']),))
+
+# Presupuesto: las líneas cargadas viven en la sesión; el editor trabaja sobre una versión de esas líneas
+# y al agregar productos se arma una versión nueva (así el editor no vuelve a aplicar cambios viejos)
+if 'lineas_presupuesto' not in st.session_state:
+    st.session_state.lineas_presupuesto = lineas_vacias()
+    st.session_state.lineas_editadas = st.session_state.lineas_presupuesto
+    st.session_state.version_presupuesto = 0
+
+def _reemplazar_presupuesto(lineas):
+    st.session_state.lineas_presupuesto = lineas
+    st.session_state.lineas_editadas = lineas
+    st.session_state.version_presupuesto += 1
+    st.session_state.presupuesto_cambiado = True
+
+def on_agregar_presupuesto(nuevas):
+    _reemplazar_presupuesto(agregar_lineas(st.session_state.lineas_editadas, nuevas))
+
+def on_pegar_presupuesto():
+    on_agregar_presupuesto(leer_lineas(st.session_state.codigos_presupuesto))
+    st.session_state.codigos_presupuesto = ''
+
+def on_vaciar_presupuesto():
+    _reemplazar_presupuesto(lineas_vacias())
+
+# Lector de código de barras: cada lectura se resuelve con el índice hash y muestra la ficha al instante
+# Cuando el escáner manda Enter, el callback registra la lectura y vacía el campo para la próxima
+def on_escaneo():
+    lectura = st.session_state.lectura_escaner
+    if lectura:
+        st.session_state.historial_escaneos.registrar(lector, lectura)
+    st.session_state.lectura_escaner = ''
+
+def on_recordar_escaneo(clave):
+    st.session_state.historial_escaneos.agregar(clave)
+
+# Es un fragmento: cada escaneo vuelve a ejecutar solo esta sección y no toda la página,
+# así una ráfaga de lecturas seguidas no rearma los listados ni la búsqueda en cada una
+# Cada ejecución del fragmento se mide como un rerun aparte de tipo 'escaner'
+@st.fragment
+def panel_escaner():
+    with registro_rendimiento.medir(mediciones, 'escaner'):
+        contenido_panel_escaner()
+
+def contenido_panel_escaner():
+    historial = st.session_state.historial_escaneos
+    st.text_input("Escanear código de barras", key='lectura_escaner', on_change=on_escaneo)
+    if historial.no_encontrado:
+        st.warning(f"No se encontró ningún producto con el código {historial.no_encontrado}.")
+
+    # Escaneos recientes: un botón por producto para volver a verlo sin escanearlo de nuevo
+    recientes = [(clave, lector.resolver(clave)) for clave in historial.claves]
+    recientes = [(clave, posicion) for clave, posicion in recientes if posicion is not None]
+    if recientes:
+        columnas = st.columns(min(len(recientes), 5))
+        for i, (clave, posicion) in enumerate(recientes):
+            with columnas[i % len(columnas)]:
+                st.button(str(indice.df['Codigo'].iat[posicion]), key=f'escaneo_{clave}', on_click=on_recordar_escaneo, args=(clave,))
+
+    posicion = lector.resolver(historial.actual) if historial.actual else None
+    if posicion is not None:
+        st.caption(f"Encontrado en {historial.duracion_ms:.2f} ms")
+        mostrar_producto_completo(indice.fila(posicion), mostrar_mayorista, False, 0, prefijo='escaner_')
+
+    # Agregar al presupuesto sí rearma toda la página, para que se vea la línea nueva
+    if st.session_state.pop('presupuesto_cambiado', False):
+        st.rerun()
+
+if 'historial_escaneos' not in st.session_state:
+    st.session_state.historial_escaneos = HistorialEscaneos()
+
+st.session_state.pop('presupuesto_cambiado', None)
+if st.checkbox("Modo escáner", value=False, key='modo_escaner'):
+    panel_escaner()
+
 # Mostrar producto seleccionado en el buscador
-if st.session_state.selected_codigo and st.session_state.selected_nombre:
-    producto_data = df[df['Codigo'] == st.session_state.selected_codigo].iloc[0]
+if producto_data:
     col1, col2 = st.columns([1, 1])
     with col1:
         mostrar_descuento = st.checkbox("Mostrar calculador de descuento", value=False, key='mostrar_descuento_producto')
     descuento = st.number_input("Calcular descuento (%)", min_value=0, max_value=100, step=1) if mostrar_descuento else 0
     mostrar_producto_completo(producto_data, mostrar_mayorista, mostrar_descuento, descuento)
 
+# Presupuesto de varios productos: cantidades, cajas por venta forzada y descuentos se calculan por columnas
+if st.checkbox("Modo presupuesto", value=False, key='modo_presupuesto'):
+    st.text_area("Pegar códigos (uno por línea, con la cantidad al lado)", key='codigos_presupuesto')
+    col_agregar, col_vaciar = st.columns([1, 1])
+    with col_agregar:
+        st.button("Agregar códigos", on_click=on_pegar_presupuesto)
+    with col_vaciar:
+        st.button("Vaciar presupuesto", on_click=on_vaciar_presupuesto)
+
+    lineas = st.data_editor(st.session_state.lineas_presupuesto, num_rows='dynamic', hide_index=True,
+                            key=f'editor_presupuesto_{st.session_state.version_presupuesto}')
+    st.session_state.lineas_editadas = lineas
+    descuento_general = st.number_input("Descuento general (%)", min_value=0.0, max_value=100.0, step=1.0)
+
+    with etapa('presupuesto'):
+        presupuesto, no_encontrados = calcular_presupuesto(lector, lineas.dropna(subset=['Codigo']), mostrar_mayorista,
+                                                           descuento_general)
+    if no_encontrados:
+        st.warning(f"Códigos no encontrados: {', '.join(no_encontrados)}")
+    if len(presupuesto):
+        totales = totales_presupuesto(presupuesto)
+        st.dataframe(presupuesto_en_pesos(presupuesto), hide_index=True)
+        col_lineas, col_subtotal, col_descuento, col_total = st.columns(4)
+        col_lineas.metric("Líneas / Unidades", f"{totales['lineas']} / {totales['unidades']}")
+        col_subtotal.metric("Subtotal", f"${totales['subtotal']:,.2f}")
+        col_descuento.metric("Descuento", f"${totales['descuento']:,.2f}")
+        col_total.metric("Total", f"${totales['total']:,.2f}")
+        if totales['sin_stock']:
+            st.warning(f"{totales['sin_stock']} líneas piden más unidades que el stock disponible.")
+        st.download_button("Descargar presupuesto (CSV)", presupuesto_csv(presupuesto),
+                           file_name='presupuesto.csv', mime='text/csv')
+
 # Filtros para mostrar productos por categoría o novedad
 col_cat, col_nov, col_cod = st.columns([1, 1, 1])
 with col_cat:
@@ -267,36 +467,39 @@ with col_nov:
 with col_cod:
     filtro_codigo = st.checkbox("Listado por Inicio de Código", key='filtro_codigo')
 
+# Función para calcular la cantidad de páginas de un listado
+def calcular_paginas(total, productos_por_pagina=10):
+    return max(1, (total - 1) // productos_por_pagina + 1)
+
 # Función para mostrar lista de productos con paginación
-def mostrar_lista_productos(df, mostrar_mayorista, pagina, productos_por_pagina=10):
+# `posiciones` son las filas del catálogo a listar, en orden; solo se materializa la página pedida
+def mostrar_lista_productos(posiciones, mostrar_mayorista, pagina, productos_por_pagina=10):
     inicio = (pagina - 1) * productos_por_pagina
     fin = inicio + productos_por_pagina
-    productos_pagina = df.iloc[inicio:fin]
-
-    for _, producto in productos_pagina.iterrows():
-        col_img, col_datos = st.columns([1, 3])
-        with col_img:
-            if producto.get("imagen"):
-                imagen = cargar_imagen(producto["imagen"])
-                if imagen:
-                    st.image(imagen, width=100)
-        with col_datos:
-            precio = producto['Precio x Mayor'] if mostrar_mayorista else producto['Precio']
-            st.markdown(f"<h4>{producto['Codigo']} | {producto['Nombre']} | ${precio:,.2f}</h4>", unsafe_allow_html=True)
-            stock_color = obtener_color_stock(producto['Stock'])
-            st.markdown(f"<span style='color: {stock_color};'>**Stock:** {producto['Stock']}</span>", unsafe_allow_html=True)
-            # Mostrar StockSuc2 si está disponible
-            if producto['StockSuc2'] > 0:
-                st.markdown(f"<span style='color: green;'>**Disponible en Suc. 2:** {producto['StockSuc2']}</span>", unsafe_allow_html=True)
-        st.write("---")
+    productos_pagina = indice.df.iloc[posiciones[inicio:fin]]
+
+    # Bajar en paralelo las imágenes de la página y dejar precargando las de la página siguiente
+    cache_imagenes = load_cache_imagenes()
+    with etapa('imagenes'):
+        if 'imagen' in indice.df.columns:
+            imagenes_pagina = cache_imagenes.obtener_varias(productos_pagina['imagen'].tolist(), TAMANO_LISTA)
+            siguiente_pagina = indice.df['imagen'].iloc[posiciones[fin:fin + productos_por_pagina]]
+            cache_imagenes.precargar(siguiente_pagina.tolist(), TAMANO_LISTA)
+        else:
+            imagenes_pagina = {}
+
+    # Toda la página se arma en una pasada y se manda como un único elemento
+    with etapa('listado'):
+        st.html(html_pagina(productos_pagina, mostrar_mayorista, imagenes_pagina, TAMANO_LISTA))
 
 # Filtro por Inicio de Código
 if filtro_codigo:
     prefijo_codigo = st.text_input("Listar por Código")
     if prefijo_codigo:
-        productos_prefijo = df[df['Codigo'].str.startswith(prefijo_codigo, na=False)]
-        if not productos_prefijo.empty:
-            num_paginas = (len(productos_prefijo) - 1) // 10 + 1
+        # Índice ordenado de códigos: sin distinguir mayúsculas y sin recorrer toda la columna
+        productos_prefijo = indice.posiciones_prefijo(prefijo_codigo)
+        if len(productos_prefijo):
+            num_paginas = calcular_paginas(len(productos_prefijo))
             pagina = st.number_input('Página:', min_value=1, max_value=num_paginas, value=1, step=1)
             mostrar_lista_productos(productos_prefijo, mostrar_mayorista, pagina)
         else:
@@ -304,21 +507,84 @@ if filtro_codigo:
 
 # Mostrar lista por categorías
 if ver_por_categorias:
-    categorias = sorted(set([c.strip() for cat in df['Categorias'].dropna().unique() for c in cat.split(',')]))
-    categoria_seleccionada = st.selectbox('Categorías:', categorias)
-    productos_categoria = df[df['Categorias'].str.contains(categoria_seleccionada, na=False)]
-    num_paginas = (len(productos_categoria) // 10) + 1
+    categoria_seleccionada = st.selectbox('Categorías:', indice.categorias)
+    productos_categoria = indice.posiciones_categoria(categoria_seleccionada)
+    num_paginas = calcular_paginas(len(productos_categoria))
     pagina = st.number_input('Página:', min_value=1, max_value=num_paginas, value=1)
     mostrar_lista_productos(productos_categoria, mostrar_mayorista, pagina)
 
 # Ordenar por novedad
+# El orden ya viene calculado en el índice: cada página es solo un recorte
 if ordenar_por_novedad:
-    if 'Fecha Creado' in df.columns:
-        df_ordenado = df.sort_values('Fecha Creado', ascending=False)
-        num_paginas = (len(df_ordenado) // 10) + 1
+    columnas_fecha = list(indice.por_novedad)
+    if columnas_fecha:
+        columna_fecha = st.radio('Ordenar por:', columnas_fecha, horizontal=True, key='columna_novedad')
+        productos_novedad = indice.posiciones_novedad(columna_fecha)
+        num_paginas = calcular_paginas(len(productos_novedad))
         pagina = st.number_input('Página:', min_value=1, max_value=num_paginas, value=1)
-        mostrar_lista_productos(df_ordenado, mostrar_mayorista, pagina)
+        mostrar_lista_productos(productos_novedad, mostrar_mayorista, pagina)
+
+# Lista de precios para clientes: se escribe a un archivo temporal fila por fila y se ofrece para descargar
+if st.checkbox("Exportar lista de precios", key='exportar_lista'):
+    col_filtro_cat, col_filtro_marca = st.columns([1, 1])
+    with col_filtro_cat:
+        categorias_lista = st.multiselect("Categorías (vacío = todas)", indice.categorias, key='categorias_lista')
+    with col_filtro_marca:
+        marcas = indice.df['Marca'].cat.categories.tolist() if 'Marca' in indice.df.columns else []
+        marcas_lista = st.multiselect("Marcas (vacío = todas)", marcas, key='marcas_lista')
+    col_precio, col_formato, col_imagenes = st.columns([1, 1, 1])
+    with col_precio:
+        precio_lista = st.radio("Precio", ["Precio x Mayor", "Precio"], key='precio_lista')
+    with col_formato:
+        formato_lista = st.radio("Formato", ["xlsx", "pdf"], horizontal=True, key='formato_lista')
+    with col_imagenes:
+        imagenes_lista = st.checkbox("Con imágenes", key='imagenes_lista')
+
+    if st.button("Generar lista"):
+        anterior = st.session_state.pop('lista_generada', None)
+        if anterior:
+            try:
+                os.remove(anterior[0])
+            except OSError:
+                pass
+        descriptor, ruta_lista = tempfile.mkstemp(suffix=f'.{formato_lista}', prefix='lista_precios_')
+        os.close(descriptor)
+        with st.spinner("Generando lista de precios..."), etapa('exportacion'):
+            total = exportar_lista(indice, ruta_lista, formato_lista, categorias_lista, marcas_lista,
+                                   mayorista=precio_lista == "Precio x Mayor",
+                                   cache_imagenes=load_cache_imagenes() if imagenes_lista else None)
+        st.session_state.lista_generada = (ruta_lista, f'lista_precios.{formato_lista}', total)
+
+    if 'lista_generada' in st.session_state:
+        ruta_lista, nombre_lista, total = st.session_state.lista_generada
+        if os.path.isfile(ruta_lista):
+            with open(ruta_lista, 'rb') as archivo_lista:
+                st.download_button(f"Descargar lista ({total} productos)", archivo_lista, file_name=nombre_lista)
+
+# Panel de rendimiento (solo administración): percentiles por etapa de los últimos reruns de todas las sesiones
+if st.checkbox("Panel de rendimiento", key='panel_rendimiento'):
+    password_rendimiento = st.text_input("Contraseña de administración:", type="password", key='password_rendimiento')
+    if password_rendimiento == contrasena_admin:
+        st.checkbox("Medir memoria por etapa (hace más lento cada rerun)", value=registro_rendimiento.midiendo_memoria(),
+                    key='medir_memoria',
+                    on_change=lambda: registro_rendimiento.medir_memoria(st.session_state.medir_memoria))
+        resumen = registro_rendimiento.resumen()
+        if resumen:
+            st.dataframe(pd.DataFrame(resumen), hide_index=True)
+        else:
+            st.info("Todavía no hay reruns registrados.")
+        if 'ultimo_rerun' in st.session_state:
+            st.write("**Rerun anterior de esta sesión:**")
+            st.json(st.session_state.ultimo_rerun)
+        st.caption(f"Reruns: {registro_rendimiento.ruta_reruns} · Métricas (Prometheus): {registro_rendimiento.ruta_metricas}")
+    elif password_rendimiento:
+        st.error("Contraseña incorrecta.")
 
 # Footer
 st.markdown("<hr>", unsafe_allow_html=True)
 st.markdown("<p style='text-align: center; font-size: 12px;'>Powered by VASCO.SORO</p>", unsafe_allow_html=True)
+
+# Registrar las mediciones de este rerun
+medicion_pagina = mediciones[0]
+registro_rendimiento.registrar(medicion_pagina)
+st.session_state.ultimo_rerun = medicion_pagina.como_dict()
@@ -0,0 +1,25 @@
+import os
+import threading
+
+# Utilidades de archivos sin dependencias fuera de la biblioteca estándar:
+# las usan módulos que no deberían cargar pandas ni pyarrow solo para escribir un archivo (ej. voz.py)
+
+
+# Función para escribir un archivo de forma atómica: se escribe al lado y se reemplaza de una vez,
+# así ningún lector (otro hilo, otra instancia de la app) ve un archivo a medio escribir
+# `contenido` son los bytes a guardar, o una función que escribe en la ruta temporal que recibe
+def escribir_atomico(ruta, contenido):
+    ruta_tmp = f"{ruta}.tmp{os.getpid()}.{threading.get_ident()}"
+    try:
+        if callable(contenido):
+            contenido(ruta_tmp)
+        else:
+            with open(ruta_tmp, 'wb') as f:
+                f.write(contenido)
+        os.replace(ruta_tmp, ruta)
+    except BaseException:
+        try:
+            os.remove(ruta_tmp)
+        except OSError:
+            pass
+        raise
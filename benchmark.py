@@ -0,0 +1,302 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from buscador import MAX_RESULTADOS, IndiceBusqueda, MotorBusqueda, buscar_productos
+from catalogo import COLUMNAS_EXPORTACION_CSV, IndiceCatalogo, cargar_catalogo, detectar_formato_csv, leer_csv
+from imagenes import TAMANO_LISTA
+from listado import html_pagina
+
+# Tamaños de los catálogos sintéticos (filas)
+TAMANOS = [1_000, 10_000, 100_000]
+
+# Repeticiones de cada medición: las cargas son lentas, las búsquedas se miden muchas veces
+# La carga del Excel sin snapshot es la más lenta (openpyxl lee celda por celda: ~50 s con 100k filas)
+REPETICIONES_CARGA = 5
+REPETICIONES_CARGA_XLSX = 2
+REPETICIONES_CONSULTA = 300
+
+# Productos por página al armar el HTML del listado (como en la app)
+PRODUCTOS_POR_PAGINA = 10
+
+# Exportación real que se usa como molde de los catálogos sintéticos
+PATRON_EXPORTACION = 'tmp_28_*.csv'
+
+_LETRAS = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+
+
+# Función para armar un catálogo sintético de `filas` filas con el mismo esquema que la exportación real
+# Se toman filas reales al azar y se hacen únicos el Id, el código, el código de barras y parte del nombre
+def catalogo_sintetico(base, filas, semilla=0):
+    rng = np.random.default_rng(semilla)
+    df = base.iloc[rng.integers(0, len(base), filas)].reset_index(drop=True)
+    numeros = pd.Series(np.arange(filas)).astype(str)
+    df['Id'] = np.arange(1, filas + 1)
+    df['Codigo'] = df['Codigo'].fillna('SC').astype(str) + '-' + numeros
+    if 'Codigo de Barras' in df.columns:
+        df['Codigo de Barras'] = (779 * 10 ** 10 + np.arange(filas)).astype(str)
+    sufijos = pd.Series([''.join(p) for p in rng.choice(_LETRAS, (max(filas // 10, 1), 6))])
+    df['Nombre'] = df['Nombre'].fillna('').astype(str) + ' ' + sufijos.iloc[rng.integers(0, len(sufijos), filas)].to_numpy()
+    segundos = rng.integers(0, 5 * 365 * 86400, filas)
+    creado = pd.Timestamp('2019-01-01') + pd.to_timedelta(segundos, unit='s')
+    df['Fecha Creado'] = creado.strftime('%Y-%m-%d %H:%M:%S')
+    modificado = creado + pd.to_timedelta(rng.integers(0, 365 * 86400, filas), unit='s')
+    df['Fecha Modificado'] = modificado.strftime('%Y-%m-%d %H:%M:%S')
+    df['Stock'] = rng.integers(-5, 200, filas)
+    return df
+
+
+# Memoria residente (RSS) del proceso, que incluye lo que reservan pyarrow y numpy fuera de Python
+# En Linux se reinicia el pico del proceso (VmHWM) antes de cada ejecución, así el pico es el de esa
+# operación; en otros sistemas se usa el pico de toda la vida del proceso (getrusage), que solo anota
+# las operaciones que lo superan, y en Windows no se mide
+class MedidorMemoria:
+    def __init__(self):
+        self.referencia = None
+
+    @staticmethod
+    def _estado_linux():
+        valores = {}
+        with open('/proc/self/status', encoding='ascii') as f:
+            for linea in f:
+                clave, _, valor = linea.partition(':')
+                if clave in ('VmRSS', 'VmHWM'):
+                    valores[clave] = int(valor.split()[0]) * 1024
+        return valores['VmRSS'], valores['VmHWM']
+
+    def empezar(self):
+        try:
+            with open('/proc/self/clear_refs', 'w', encoding='ascii') as f:
+                f.write('5')
+            self.referencia = ('linux', self._estado_linux()[0])
+        except OSError:
+            self.referencia = ('getrusage', _pico_getrusage()) if resource is not None else None
+
+    # Bytes que subió la memoria residente por encima de la referencia (None si no se puede medir)
+    def pico(self):
+        if self.referencia is None:
+            return None
+        tipo, referencia = self.referencia
+        actual = self._estado_linux()[1] if tipo == 'linux' else _pico_getrusage()
+        return max(actual - referencia, 0)
+
+
+def _pico_getrusage():
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss viene en KB en Linux y en bytes en macOS
+    return pico if sys.platform == 'darwin' else pico * 1024
+
+
+# Función para medir una operación una vez por argumento
+# Devuelve los tiempos en milisegundos y el pico de memoria residente de la peor ejecución (MB)
+def medir(operacion, argumentos):
+    memoria = MedidorMemoria()
+    tiempos = []
+    picos = []
+    for argumento in argumentos:
+        memoria.empezar()
+        inicio = time.perf_counter_ns()
+        operacion(argumento)
+        tiempos.append((time.perf_counter_ns() - inicio) / 1e6)
+        picos.append(memoria.pico())
+    return np.array(tiempos), _pico_mb(picos)
+
+
+def _pico_mb(picos):
+    return None if None in picos else max(picos, default=0) / 2 ** 20
+
+
+# Función para cargar el catálogo midiendo tiempo y pico de memoria; corre en un proceso nuevo
+def _carga_en_proceso(ruta, dir_cache):
+    memoria = MedidorMemoria()
+    memoria.empezar()
+    inicio = time.perf_counter_ns()
+    cargar_catalogo(ruta, dir_cache)
+    return (time.perf_counter_ns() - inicio) / 1e6, memoria.pico()
+
+
+# Función para medir cargas del catálogo, cada una en un proceso nuevo como al arrancar la app
+# En el proceso del benchmark el asignador reutilizaría la memoria que liberaron las cargas anteriores
+# y el pico quedaría corto
+def medir_cargas(ruta, dirs_cache):
+    contexto = multiprocessing.get_context('spawn')
+    tiempos = []
+    picos = []
+    for dir_cache in dirs_cache:
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as proceso:
+            ms, pico = proceso.submit(_carga_en_proceso, ruta, dir_cache).result()
+        tiempos.append(ms)
+        picos.append(pico)
+    return np.array(tiempos), _pico_mb(picos)
+
+
+def _resumen(tiempos, pico):
+    return {
+        'n': len(tiempos),
+        'p50_ms': round(float(np.percentile(tiempos, 50)), 4),
+        'p99_ms': round(float(np.percentile(tiempos, 99)), 4),
+        'max_ms': round(float(tiempos.max()), 4),
+        'pico_mb': None if pico is None else round(pico, 2),
+    }
+
+
+# Función para correr todas las mediciones sobre un catálogo sintético guardado como Excel (`ruta_xlsx`,
+# el archivo que abre load_data) y como exportación CSV (`ruta_csv`, lo que se sube para actualizar)
+def medir_catalogo(ruta_xlsx, ruta_csv, dir_trabajo, repeticiones_carga=REPETICIONES_CARGA,
+                   repeticiones_carga_xlsx=REPETICIONES_CARGA_XLSX, repeticiones_consulta=REPETICIONES_CONSULTA,
+                   semilla=0):
+    rng = np.random.default_rng(semilla)
+    resultados = {}
+
+    def registrar(nombre, operacion, argumentos):
+        resultados[nombre] = _resumen(*medir(operacion, list(argumentos)))
+
+    # Carga del Excel sin snapshot (lo que hace load_data la primera vez o cuando cambia el archivo),
+    # carga desde el snapshot Parquet (load_data en cada arranque) y lectura de una exportación CSV subida
+    # Cada carga en frío usa una carpeta de cache vacía
+    dirs_frios = [os.path.join(dir_trabajo, f'frio{i}') for i in range(repeticiones_carga_xlsx)]
+    resultados['carga_xlsx'] = _resumen(*medir_cargas(ruta_xlsx, dirs_frios))
+    dir_cache = dirs_frios[0]
+    resultados['carga_snapshot'] = _resumen(*medir_cargas(ruta_xlsx, [dir_cache] * repeticiones_carga))
+    dirs_csv = [os.path.join(dir_trabajo, f'csv{i}') for i in range(repeticiones_carga)]
+    resultados['carga_csv'] = _resumen(*medir_cargas(ruta_csv, dirs_csv))
+    df = cargar_catalogo(ruta_xlsx, dir_cache)
+
+    registrar('indice', IndiceCatalogo, [df] * min(repeticiones_carga, 3))
+    indice = IndiceCatalogo(df)
+
+    vivas = np.flatnonzero(indice.vivas)
+    muestra = indice.df.iloc[rng.choice(vivas, repeticiones_consulta)]
+    registrar('busqueda_codigo', indice.buscar_codigo, muestra['Codigo'].tolist())
+    registrar('busqueda_nombre', indice.buscar_nombre, muestra['Nombre'].tolist())
+
+    categorias = indice.categorias
+    registrar('filtro_categoria', indice.posiciones_categoria,
+              [categorias[i] for i in rng.integers(0, len(categorias), repeticiones_consulta)])
+    prefijos = [codigo[:rng.integers(1, 4)] for codigo in muestra['Codigo'].astype(str)]
+    registrar('filtro_prefijo', indice.posiciones_prefijo, prefijos)
+
+    columnas_fecha = list(indice.por_novedad)
+    paginas = rng.integers(0, max(len(vivas) // PRODUCTOS_POR_PAGINA, 1), repeticiones_consulta)
+    if columnas_fecha:
+        def pagina_novedad(pagina):
+            orden = indice.posiciones_novedad(columnas_fecha[0])
+            return orden[pagina * PRODUCTOS_POR_PAGINA:(pagina + 1) * PRODUCTOS_POR_PAGINA]
+        registrar('orden_novedad', pagina_novedad, paginas)
+
+    def pagina_html(pagina):
+        posiciones = indice.posiciones_por_codigo[pagina * PRODUCTOS_POR_PAGINA:(pagina + 1) * PRODUCTOS_POR_PAGINA]
+        return html_pagina(indice.df.iloc[posiciones], False, {}, TAMANO_LISTA)
+    registrar('html_pagina', pagina_html, paginas)
+
+    # Búsqueda libre (códigos, motor por relevancia y búsqueda rápida), con palabras sacadas de los nombres
+    buscador = IndiceBusqueda(indice)
+    motor = MotorBusqueda(indice)
+    palabras = [nombre.split()[0] if nombre.split() else nombre for nombre in muestra['Nombre'].astype(str)]
+    registrar('busqueda_texto', lambda consulta: buscar_productos(buscador, motor, consulta, MAX_RESULTADOS), palabras)
+    return resultados
+
+
+def _commit_actual():
+    try:
+        salida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=10)
+        return salida.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# Función para guardar un catálogo sintético como el Excel que usa la app: con los nombres de columna
+# del Excel y en modo de solo escritura, fila por fila
+def escribir_xlsx(df, ruta):
+    df = df.rename(columns=COLUMNAS_EXPORTACION_CSV)
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    hoja.append(list(df.columns))
+    for fila in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+        hoja.append(fila)
+    libro.save(ruta)
+
+
+# Función para correr la suite completa; devuelve el reporte (dict serializable a JSON)
+def correr(ruta_base, tamanos=TAMANOS, **opciones):
+    with open(ruta_base, 'rb') as f:
+        datos = f.read()
+    codificacion, separador = detectar_formato_csv(datos)
+    base = leer_csv(datos)
+    reporte = {
+        'commit': _commit_actual(),
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'base': os.path.basename(ruta_base),
+        'resultados': {},
+    }
+    for filas in tamanos:
+        with tempfile.TemporaryDirectory(prefix='benchmark_soop_') as dir_trabajo:
+            df = catalogo_sintetico(base, filas)
+            ruta_csv = os.path.join(dir_trabajo, f'catalogo_{filas}.csv')
+            df.to_csv(ruta_csv, sep=separador, index=False, encoding=codificacion)
+            ruta_xlsx = os.path.join(dir_trabajo, f'catalogo_{filas}.xlsx')
+            escribir_xlsx(df, ruta_xlsx)
+            reporte['resultados'][str(filas)] = medir_catalogo(ruta_xlsx, ruta_csv, dir_trabajo, **opciones)
+    return reporte
+
+
+def formatear_reporte(reporte, anterior=None):
+    lineas = [f"{'filas':>7}  {'operación':<18}{'p50 ms':>10}{'p99 ms':>10}{'RSS MB':>9}"]
+    for filas, mediciones in reporte['resultados'].items():
+        for nombre, medicion in mediciones.items():
+            pico = '-' if medicion['pico_mb'] is None else f"{medicion['pico_mb']:.1f}"
+            linea = f"{filas:>7}  {nombre:<18}{medicion['p50_ms']:>10.3f}{medicion['p99_ms']:>10.3f}{pico:>9}"
+            previa = (anterior or {}).get('resultados', {}).get(filas, {}).get(nombre)
+            if previa and previa['p50_ms'] > 0:
+                linea += f"  ({(medicion['p50_ms'] / previa['p50_ms'] - 1) * 100:+.0f}% p50)"
+            lineas.append(linea)
+    return '\n'.join(lineas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide carga, búsquedas, filtros y listado sobre catálogos sintéticos.")
+    parser.add_argument('--base', help=f"Exportación real usada como molde (por defecto la última {PATRON_EXPORTACION})")
+    parser.add_argument('--filas', type=int, action='append', help="Tamaño del catálogo (se puede repetir)")
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES_CONSULTA, help="Repeticiones por consulta")
+    parser.add_argument('-o', '--salida', help="Archivo JSON donde guardar los resultados")
+    parser.add_argument('--comparar', help="JSON de una corrida anterior para mostrar la diferencia")
+    args = parser.parse_args(argv)
+
+    ruta_base = args.base or max(glob.glob(PATRON_EXPORTACION), default=None)
+    if ruta_base is None:
+        parser.error(f"No se encontró ninguna exportación {PATRON_EXPORTACION}; indicarla con --base.")
+    reporte = correr(ruta_base, args.filas or TAMANOS, repeticiones_consulta=args.repeticiones)
+
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            anterior = json.load(f)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+    print(formatear_reporte(reporte, anterior))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,496 @@
+import copy
+import heapq
+import itertools
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Cantidad máxima de resultados que se mandan al navegador por consulta
+MAX_RESULTADOS = 20
+
+# Columnas que participan de la búsqueda rápida
+COLUMNAS_BUSQUEDA = ['Codigo', 'Nombre', 'Codigo de Barras']
+
+_SEPARADORES = re.compile(r"[^0-9a-z]+")
+
+# Campos del motor de búsqueda por relevancia y su peso (un término en el nombre vale más que en la descripción)
+CAMPOS_MOTOR = [('Nombre', 3.0), ('Marca', 2.0), ('Categorias', 1.5), ('Descripcion', 1.0)]
+
+# Parámetros de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Palabras vacías del español que no aportan a la búsqueda (ya sin acentos)
+PALABRAS_VACIAS = {
+    'a', 'al', 'con', 'de', 'del', 'e', 'el', 'en', 'es', 'la', 'las', 'lo', 'los', 'o', 'para', 'por',
+    'que', 'se', 'sin', 'su', 'sus', 'u', 'un', 'una', 'unas', 'unos', 'y',
+}
+
+# Caracteres de las exportaciones escritas en CP850 y leídas como Latin-1 (ej. "Mu¤ecos")
+_CP850_LEIDO_COMO_LATIN1 = str.maketrans({'¤': 'ñ', '¥': 'Ñ', '¢': 'ó'})
+
+# Secuencias de dos bytes UTF-8 (acentos, ñ, ¡, ¿) leídas como Latin-1
+_UTF8_LEIDO_COMO_LATIN1 = re.compile(r"[ÂÃ][\u0080-\u00bf]")
+
+# Palabras con U+FFFD (un carácter que no se pudo decodificar, ej. "Jugueter\ufffda") se conservan enteras
+_PALABRAS_MOTOR = re.compile(r"[0-9a-z\ufffd]+")
+_MARCAS_ACENTO = re.compile(r"[\u0300-\u036f]")
+
+# Cuántos términos del vocabulario se prueban como máximo por prefijo o por error de tipeo
+MAX_EXPANSIONES = 50
+
+# Cuántos términos parecidos se verifican como máximo con la distancia de edición
+MAX_CANDIDATOS_APROXIMADOS = 200
+
+# Peso de una coincidencia por prefijo o con un error de tipeo respecto de la palabra exacta
+PESO_PREFIJO = 0.8
+PESO_APROXIMADO = 0.6
+
+
+# Función para pasar un texto a minúsculas y sin acentos
+def normalizar_texto(texto):
+    if texto is None or texto != texto:
+        return ''
+    texto = unicodedata.normalize('NFKD', str(texto).lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+# Función para partir un texto normalizado en palabras
+def tokenizar(texto):
+    return [t for t in _SEPARADORES.split(texto) if t]
+
+
+def _trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def _bigramas(palabra):
+    palabra = f' {palabra} '
+    return {palabra[i:i + 2] for i in range(len(palabra) - 1)}
+
+
+def _decodificar_utf8(coincidencia):
+    try:
+        return coincidencia.group().encode('latin-1').decode('utf-8')
+    except UnicodeError:
+        return coincidencia.group()
+
+
+# Función para arreglar texto mal codificado: UTF-8 leído como Latin-1 ("JugueterÃ­a") y CP850 leído como Latin-1
+def reparar_texto(texto):
+    if 'Ã' in texto or 'Â' in texto:
+        texto = _UTF8_LEIDO_COMO_LATIN1.sub(_decodificar_utf8, texto)
+    return texto.translate(_CP850_LEIDO_COMO_LATIN1)
+
+
+# Función para llevar una palabra a su raíz con reglas simples de plural del español
+# ("peluches" -> "peluche", "colores" -> "color", "luces" -> "luz")
+def raiz(palabra):
+    if len(palabra) > 4 and palabra.endswith('ces'):
+        return palabra[:-3] + 'z'
+    if len(palabra) > 4 and palabra.endswith('es') and palabra[-3] in 'dlnrj':
+        return palabra[:-2]
+    if len(palabra) > 3 and palabra.endswith('s') and not palabra.endswith('ss'):
+        return palabra[:-1]
+    return palabra
+
+
+# Función para partir un texto en palabras del motor: reparado, en minúsculas y sin acentos
+def palabras_motor(texto):
+    if texto.isascii():
+        return _PALABRAS_MOTOR.findall(texto.lower())
+    texto = unicodedata.normalize('NFKD', reparar_texto(texto).lower())
+    return _PALABRAS_MOTOR.findall(_MARCAS_ACENTO.sub('', texto))
+
+
+# Función para pasar una consulta a términos del motor: sin palabras vacías y en raíz
+def terminos(texto):
+    return [raiz(p) for p in palabras_motor(texto) if p not in PALABRAS_VACIAS]
+
+
+# Distancia de edición entre dos palabras (una letra cambiada, de más, de menos o dos letras invertidas
+# cuentan como un error; un carácter perdido U+FFFD coincide con cualquiera); corta apenas se pasa de `maximo`
+def distancia_edicion(a, b, maximo):
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    previa, anterior = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        actual = [i]
+        for j, cb in enumerate(b, 1):
+            distintos = ca != cb and ca != '\ufffd' and cb != '\ufffd'
+            costo = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + distintos)
+            if previa is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                costo = min(costo, previa[j - 2] + 1)
+            actual.append(costo)
+        if min(actual) > maximo:
+            return maximo + 1
+        previa, anterior = anterior, actual
+    return anterior[-1]
+
+
+# Índice de búsqueda incremental por prefijo de palabra y trigramas sobre código, nombre y código de barras
+class IndiceBusqueda:
+    def __init__(self, indice):
+        self.indice = indice
+        self.version = indice.version
+        self.codigos = []
+        self.codigos_barras = []
+        self.textos = []
+        self.trigramas = {}
+        pares = self._agregar_filas(indice.df, range(len(indice.df)), indice.vivas)
+        self.palabras = np.array([p for p, _ in pares], dtype=object)
+        self.posiciones = np.array([pos for _, pos in pares], dtype=np.int32)
+
+    # Función para indexar filas del catálogo; devuelve los pares (palabra, posición) ordenados
+    # Las filas dadas de baja quedan con texto vacío para que ningún trigrama las pueda verificar
+    # Con `compartidos` las listas de trigramas se copian antes de modificarlas (las usa el índice anterior)
+    def _agregar_filas(self, df, posiciones, vivas, compartidos=False):
+        pares = set()
+        copiados = set()
+        columnas = [c for c in COLUMNAS_BUSQUEDA if c in df.columns]
+        valores = zip(*(df[c].tolist() for c in columnas))
+        for posicion, viva, fila in zip(posiciones, vivas, valores):
+            posicion = int(posicion)
+            campos = [normalizar_texto(v) for v in fila] if viva else [''] * len(columnas)
+            self.codigos.append(campos[0])
+            self.codigos_barras.append(campos[2] if len(campos) > 2 else '')
+            texto = ' '.join(campos) if viva else ''
+            self.textos.append(texto)
+            # Los códigos completos (ej. "tm-26494") también se indexan como una sola palabra
+            for palabra in tokenizar(texto) + [c for c in campos if c]:
+                pares.add((palabra, posicion))
+            for trigrama in _trigramas(texto):
+                if compartidos and trigrama not in copiados:
+                    self.trigramas[trigrama] = list(self.trigramas.get(trigrama, []))
+                    copiados.add(trigrama)
+                self.trigramas.setdefault(trigrama, []).append(posicion)
+        return sorted(pares)
+
+    # Devuelve un buscador nuevo con los cambios que `indice` trae respecto del índice de este buscador
+    # Si `indice` no se derivó del índice de este buscador con aplicar_delta, se arma uno desde cero
+    def aplicar_delta(self, indice):
+        if indice.base != self.version:
+            return IndiceBusqueda(indice)
+        nuevo = copy.copy(self)
+        nuevo.indice = indice
+        nuevo.version = indice.version
+        nuevo.codigos = list(self.codigos)
+        nuevo.codigos_barras = list(self.codigos_barras)
+        nuevo.textos = list(self.textos)
+        nuevo.trigramas = dict(self.trigramas)
+        for posicion in indice.quitadas:
+            nuevo.codigos[posicion] = nuevo.codigos_barras[posicion] = nuevo.textos[posicion] = ''
+
+        agregadas = indice.agregadas
+        pares = nuevo._agregar_filas(indice.df.iloc[agregadas], agregadas, indice.vivas[agregadas], compartidos=True)
+        conservar = ~np.isin(self.posiciones, indice.quitadas)
+        palabras, posiciones = self.palabras[conservar], self.posiciones[conservar]
+        palabras_nuevas = np.array([p for p, _ in pares], dtype=object)
+        donde = np.searchsorted(palabras, palabras_nuevas, side='right')
+        nuevo.palabras = np.insert(palabras, donde, palabras_nuevas)
+        nuevo.posiciones = np.insert(posiciones, donde, [pos for _, pos in pares]).astype(np.int32)
+        return nuevo
+
+    # Posiciones de las filas con alguna palabra que empieza con `prefijo` (dos búsquedas binarias)
+    def _por_prefijo(self, prefijo):
+        inicio = np.searchsorted(self.palabras, prefijo, side='left')
+        fin = np.searchsorted(self.palabras, prefijo + '\uffff', side='left')
+        return set(self.posiciones[inicio:fin].tolist())
+
+    # Posiciones de las filas que contienen `consulta` en cualquier lugar del texto
+    def _por_subcadena(self, consulta):
+        trigramas = _trigramas(consulta)
+        if not trigramas:
+            return set()
+        listas = sorted((self.trigramas.get(t, []) for t in trigramas), key=len)
+        candidatos = set(listas[0])
+        for lista in listas[1:]:
+            candidatos.intersection_update(lista)
+            if not candidatos:
+                break
+        return {pos for pos in candidatos if consulta in self.textos[pos]}
+
+    # Devuelve las posiciones de las mejores `limite` coincidencias para la consulta
+    def buscar(self, consulta, limite=MAX_RESULTADOS):
+        consulta = normalizar_texto(consulta).strip()
+        if not consulta:
+            return []
+
+        # Cada palabra de la consulta tiene que ser prefijo de alguna palabra de la fila
+        candidatos = None
+        for palabra in tokenizar(consulta) or [consulta]:
+            encontrados = self._por_prefijo(palabra)
+            candidatos = encontrados if candidatos is None else candidatos & encontrados
+            if not candidatos:
+                break
+        candidatos = candidatos or set()
+        if len(candidatos) < limite and len(consulta) >= 3:
+            candidatos |= self._por_subcadena(consulta)
+
+        return heapq.nsmallest(limite, candidatos, key=lambda posicion: self._puntaje(posicion, consulta))
+
+    # Orden: código o código de barras exacto, código que empieza con la consulta, nombre que empieza, resto
+    def _puntaje(self, posicion, consulta):
+        codigo = self.codigos[posicion]
+        if codigo == consulta or self.codigos_barras[posicion] == consulta:
+            nivel = 0
+        elif codigo.startswith(consulta):
+            nivel = 1
+        elif self.textos[posicion].startswith(consulta, len(codigo) + 1):
+            nivel = 2
+        else:
+            nivel = 3
+        return (nivel, posicion)
+
+    # Posiciones de las filas con ese código de barras o cuyo código empieza con la consulta (el exacto primero)
+    # Usa el mapa de códigos de barras y el índice ordenado de códigos del catálogo: no depende del largo de la consulta
+    def buscar_codigos(self, consulta, limite=MAX_RESULTADOS):
+        codigo_barras = self.indice.por_codigo_barras.get(consulta.strip())
+        posiciones = [] if codigo_barras is None else [codigo_barras]
+        posiciones.extend(self.indice.posiciones_prefijo(consulta)[:limite].tolist())
+        return list(dict.fromkeys(posiciones))[:limite]
+
+
+# Función para resolver las palabras con un carácter perdido (U+FFFD) contra las palabras sanas del catálogo:
+# "jugueter\ufffda" pasa a la palabra más frecuente que coincide en todo lo demás ("jugueteria")
+# Si no hay ninguna se deja como está: al buscar, el carácter perdido vale como comodín
+# `frecuencias` tiene todas las palabras del catálogo con la cantidad de veces que aparecen
+def _resolver_perdidas(palabras, frecuencias):
+    if not any('\ufffd' in palabra for palabra in palabras):
+        return list(palabras)
+    sanas = {}
+    for palabra, frecuencia in frecuencias.items():
+        if '\ufffd' not in palabra:
+            sanas.setdefault(len(palabra), []).append((frecuencia, palabra))
+    resueltas = []
+    for palabra in palabras:
+        if '\ufffd' in palabra:
+            patron = re.compile('.'.join(re.escape(parte) for parte in palabra.split('\ufffd')))
+            opciones = [o for o in sanas.get(len(palabra), []) if patron.fullmatch(o[1])]
+            palabra = max(opciones)[1] if opciones else palabra
+        resueltas.append(palabra)
+    return resueltas
+
+
+# Función para sacar las palabras de los campos del motor en las filas `posiciones`
+# Devuelve la fila, la palabra y el peso del campo de cada aparición; cada texto distinto se procesa una sola vez
+def _palabras_filas(df, posiciones):
+    docs, palabras, pesos = [], [], []
+    for campo, peso in CAMPOS_MOTOR:
+        if campo not in df.columns:
+            continue
+        columna = df[campo].iloc[posiciones]
+        con_texto = columna.notna().to_numpy()
+        codigos, textos = pd.factorize(columna[con_texto].astype(str))
+        palabras_textos = [palabras_motor(texto) for texto in textos]
+        cantidades = np.array([len(p) for p in palabras_textos], dtype=np.int64)[codigos]
+        docs.append(np.repeat(posiciones[con_texto], cantidades))
+        palabras.extend(itertools.chain.from_iterable(palabras_textos[c] for c in codigos))
+        pesos.append(np.full(int(cantidades.sum()), peso, dtype=np.float32))
+    docs = np.concatenate(docs).astype(np.int64) if docs else np.empty(0, dtype=np.int64)
+    pesos = np.concatenate(pesos) if pesos else np.empty(0, dtype=np.float32)
+    return docs, palabras, pesos
+
+
+# Función para armar el índice de pares de letras (con bordes) de los términos, para los errores de tipeo
+def _indexar_bigramas(terminos, numeros):
+    por_bigrama = {}
+    for numero, termino in zip(numeros, terminos):
+        for bigrama in _bigramas(termino):
+            por_bigrama.setdefault(bigrama, []).append(numero)
+    return {b: np.array(lista, dtype=np.int32) for b, lista in por_bigrama.items()}
+
+
+# Motor de búsqueda por relevancia (BM25) sobre nombre, marca, categorías y descripción
+# Se arma una vez por versión del catálogo; cada término guarda sus filas y su peso BM25 ya calculado,
+# así una consulta es sumar unos pocos arrays. Tolera acentos, plurales, texto mal codificado y errores de tipeo
+# Con aplicar_delta solo se leen las filas quitadas y agregadas; los pesos BM25 se recalculan enteros
+# porque dependen de la cantidad de filas y del largo medio de todo el catálogo
+class MotorBusqueda:
+    def __init__(self, indice):
+        self.indice = indice
+        self.version = indice.version
+        self.total_filas = len(indice.df)
+        docs, palabras, pesos = _palabras_filas(indice.df, np.flatnonzero(indice.vivas))
+
+        # Palabras distintas -> términos (raíz), descartando las palabras vacías
+        numeros_palabra, distintas = pd.factorize(pd.Series(palabras, dtype=object))
+        self._palabras = dict(zip(distintas, np.bincount(numeros_palabra, minlength=len(distintas)).tolist()))
+        self.vocabulario, numeros_termino = np.unique(self._raices(distintas), return_inverse=True)
+        termino = numeros_termino[numeros_palabra]
+        if len(self.vocabulario) and self.vocabulario[0] == '':
+            validas = termino > 0
+            docs, pesos, termino = docs[validas], pesos[validas], termino[validas] - 1
+            self.vocabulario = self.vocabulario[1:]
+
+        self._calcular_pesos(*self._agrupar(termino, docs, pesos))
+        self._por_bigrama = _indexar_bigramas(self.vocabulario.tolist(), range(len(self.vocabulario)))
+
+    # Términos (raíz) de palabras distintas, con '' para las palabras vacías
+    def _raices(self, palabras):
+        palabras = _resolver_perdidas(list(palabras), self._palabras)
+        return np.array([raiz(p) if p not in PALABRAS_VACIAS else '' for p in palabras], dtype=object)
+
+    # Frecuencia ponderada de cada término en cada fila, ordenada por término y fila
+    def _agrupar(self, termino, docs, pesos):
+        claves, inversa = np.unique(termino.astype(np.int64) * self.total_filas + docs, return_inverse=True)
+        frecuencia = np.bincount(inversa, weights=pesos)
+        return claves // self.total_filas, claves % self.total_filas, frecuencia
+
+    # Pesos BM25 por (término, fila), a partir de las frecuencias ordenadas por término y fila
+    def _calcular_pesos(self, termino, docs, frecuencia):
+        self._numero = {t: i for i, t in enumerate(self.vocabulario.tolist())}
+        largo = np.bincount(docs, weights=frecuencia, minlength=self.total_filas)
+        cantidad = max(int(self.indice.vivas.sum()), 1)
+        largo_medio = max(largo.sum() / cantidad, 1e-9)
+
+        self.frecuencia_documental = np.bincount(termino, minlength=len(self.vocabulario))
+        idf = np.log(1 + (cantidad - self.frecuencia_documental + 0.5) / (self.frecuencia_documental + 0.5))
+        normalizacion = BM25_K1 * (1 - BM25_B + BM25_B * largo[docs] / largo_medio)
+        self._pesos = (idf[termino] * frecuencia * (BM25_K1 + 1) / (frecuencia + normalizacion)).astype(np.float32)
+        self._docs = docs.astype(np.int32)
+        self._frecuencias = np.asarray(frecuencia, dtype=np.float32)
+        self._inicio = np.concatenate([[0], np.cumsum(self.frecuencia_documental)])
+
+    # Devuelve un motor nuevo con los cambios que `indice` trae respecto del índice de este motor
+    # Si `indice` no se derivó del índice de este motor con aplicar_delta, se arma uno desde cero
+    # (las palabras con un carácter perdido de las filas que no cambiaron conservan el término que ya tenían)
+    def aplicar_delta(self, indice):
+        if indice.base != self.version:
+            return MotorBusqueda(indice)
+        nuevo = copy.copy(self)
+        nuevo.indice = indice
+        nuevo.version = indice.version
+        nuevo.total_filas = len(indice.df)
+
+        # Las palabras de las filas quitadas dejan de contar y se suman las de las agregadas
+        docs, palabras, pesos = _palabras_filas(indice.df, indice.agregadas)
+        nuevo._palabras = dict(self._palabras)
+        for palabra in _palabras_filas(indice.df, indice.quitadas)[1]:
+            nuevo._palabras[palabra] -= 1
+            if not nuevo._palabras[palabra]:
+                del nuevo._palabras[palabra]
+        for palabra in palabras:
+            nuevo._palabras[palabra] = nuevo._palabras.get(palabra, 0) + 1
+        numeros_palabra, distintas = pd.factorize(pd.Series(palabras, dtype=object))
+        raices = nuevo._raices(distintas)[numeros_palabra]
+        validas = raices != ''
+        raices, docs, pesos = raices[validas], docs[validas], pesos[validas]
+
+        # Vocabulario con los términos nuevos, que sigue ordenado para las búsquedas por prefijo
+        vocabulario = np.union1d(self.vocabulario, raices).astype(object)
+        renumerados = np.searchsorted(vocabulario, self.vocabulario)
+        conservar = ~np.isin(self._docs, indice.quitadas)
+        termino = renumerados[np.repeat(np.arange(len(self.vocabulario)), self.frecuencia_documental)[conservar]]
+        docs_conservados, frecuencia = self._docs[conservar].astype(np.int64), self._frecuencias[conservar]
+
+        # Las filas agregadas van al final del catálogo: sus pares (término, fila) se intercalan sin reordenar el resto
+        termino_nuevo, docs_nuevos, frecuencia_nueva = nuevo._agrupar(np.searchsorted(vocabulario, raices), docs, pesos)
+        donde = np.searchsorted(termino * nuevo.total_filas + docs_conservados,
+                                termino_nuevo * nuevo.total_filas + docs_nuevos)
+        termino = np.insert(termino, donde, termino_nuevo)
+        docs = np.insert(docs_conservados, donde, docs_nuevos)
+        frecuencia = np.insert(frecuencia.astype(np.float64), donde, frecuencia_nueva)
+
+        # Los términos que quedaron sin filas salen del vocabulario
+        usados = np.bincount(termino, minlength=len(vocabulario)) > 0
+        numeros = np.cumsum(usados) - 1
+        nuevo.vocabulario = vocabulario[usados]
+        nuevo._calcular_pesos(numeros[termino], docs, frecuencia)
+
+        # Los pares de letras de los términos que ya estaban se renumeran; solo se calculan los de los nuevos
+        numero_anterior = np.where(usados[renumerados], numeros[renumerados], -1)
+        nuevo._por_bigrama = {}
+        for bigrama, lista in self._por_bigrama.items():
+            lista = numero_anterior[lista]
+            lista = lista[lista >= 0]
+            if len(lista):
+                nuevo._por_bigrama[bigrama] = lista.astype(np.int32)
+        nuevos = [(numero, t) for numero, t in enumerate(nuevo.vocabulario.tolist()) if t not in self._numero]
+        for bigrama, lista in _indexar_bigramas([t for _, t in nuevos], [n for n, _ in nuevos]).items():
+            anterior = nuevo._por_bigrama.get(bigrama)
+            nuevo._por_bigrama[bigrama] = lista if anterior is None else np.sort(np.concatenate([anterior, lista]))
+        return nuevo
+
+    # Términos del vocabulario a una distancia de edición chica (1 error hasta 5 letras, 2 si es más larga),
+    # con su distancia. Cada error cambia a lo sumo 3 pares de letras, así que solo se verifican los términos
+    # que comparten el resto
+    def _aproximados(self, termino):
+        maximo = 1 if len(termino) <= 5 else 2
+        bigramas = _bigramas(termino)
+        listas = [self._por_bigrama[b] for b in bigramas if b in self._por_bigrama]
+        if not listas:
+            return []
+        numeros, compartidos = np.unique(np.concatenate(listas), return_counts=True)
+        elegidos = compartidos >= max(1, len(bigramas) - 3 * maximo)
+        numeros, compartidos = numeros[elegidos], compartidos[elegidos]
+        numeros = numeros[np.argsort(-compartidos, kind='stable')][:MAX_CANDIDATOS_APROXIMADOS]
+        aproximados = []
+        for numero in numeros.tolist():
+            distancia = distancia_edicion(termino, self.vocabulario[numero], maximo)
+            if distancia <= maximo:
+                aproximados.append((numero, distancia))
+                if len(aproximados) == MAX_EXPANSIONES:
+                    break
+        return aproximados
+
+    # Términos del vocabulario que cuentan para un término de la consulta, con su factor de peso
+    # La última palabra también vale como prefijo (se está terminando de escribir)
+    def _expansiones(self, termino, ultimo):
+        expansiones = {}
+        numero = self._numero.get(termino)
+        if numero is not None:
+            expansiones[numero] = 1.0
+        if ultimo:
+            inicio = int(np.searchsorted(self.vocabulario, termino, side='left'))
+            fin = int(np.searchsorted(self.vocabulario, termino + '\uffff', side='left'))
+            prefijos = np.arange(inicio, fin)
+            if len(prefijos) > MAX_EXPANSIONES:
+                prefijos = prefijos[np.argsort(-self.frecuencia_documental[prefijos], kind='stable')[:MAX_EXPANSIONES]]
+            for numero_prefijo in prefijos.tolist():
+                expansiones.setdefault(numero_prefijo, PESO_PREFIJO)
+        if numero is None and len(termino) >= 4:
+            # Distancia 0 es una palabra del catálogo con un carácter perdido que coincide en todo lo demás
+            for numero_aproximado, distancia in self._aproximados(termino):
+                factor = 1.0 if distancia == 0 else PESO_APROXIMADO
+                expansiones[numero_aproximado] = max(expansiones.get(numero_aproximado, 0), factor)
+        return expansiones
+
+    # Devuelve las posiciones de las `limite` filas más relevantes para la consulta
+    # Primero las que coinciden con más palabras de la consulta y, entre ellas, por puntaje BM25
+    def buscar(self, consulta, limite=MAX_RESULTADOS):
+        consulta = terminos(consulta)
+        if not consulta or not len(self.vocabulario):
+            return []
+        puntaje = np.zeros(self.total_filas, dtype=np.float32)
+        coincidencias = np.zeros(self.total_filas, dtype=np.int16)
+        for i, termino in enumerate(consulta):
+            aporte = np.zeros(self.total_filas, dtype=np.float32)
+            for numero, factor in self._expansiones(termino, i == len(consulta) - 1).items():
+                inicio, fin = self._inicio[numero], self._inicio[numero + 1]
+                docs = self._docs[inicio:fin]
+                aporte[docs] = np.maximum(aporte[docs], self._pesos[inicio:fin] * factor)
+            puntaje += aporte
+            coincidencias += aporte > 0
+
+        candidatos = np.flatnonzero(coincidencias)
+        if not len(candidatos):
+            return []
+        clave = coincidencias[candidatos] * (float(puntaje.max()) + 1) + puntaje[candidatos]
+        if len(candidatos) > limite:
+            mejores = np.argpartition(-clave, limite)[:limite]
+            candidatos, clave = candidatos[mejores], clave[mejores]
+        return candidatos[np.lexsort((candidatos, -clave))].tolist()
+
+
+# Función para combinar las búsquedas: códigos exactos o por prefijo primero, después los resultados por
+# relevancia del motor y, si faltan, las coincidencias por prefijo o subcadena del índice rápido
+def buscar_productos(buscador, motor, consulta, limite=MAX_RESULTADOS):
+    resultados = dict.fromkeys(buscador.buscar_codigos(consulta, limite))
+    for busqueda in (motor.buscar, buscador.buscar):
+        if len(resultados) >= limite:
+            break
+        resultados.update(dict.fromkeys(busqueda(consulta, limite)))
+    return list(resultados)[:limite]
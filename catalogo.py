@@ -0,0 +1,803 @@
+import copy
+import csv
+import hashlib
+import itertools
+import json
+import os
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from archivos import escribir_atomico
+
+# Carpeta donde se guardan los snapshots columnares del catálogo
+DIR_CACHE_CATALOGO = '.cache_catalogo'
+
+# Renombrar columnas para que coincidan con lo esperado
+COLUMNAS_RENOMBRADAS = {
+    "Id": "id",
+    "Id Externo": "id externo",
+    "Codigo": "Codigo",
+    "Nombre": "Nombre",
+    "Precio x Mayor": "Precio x Mayor",
+    "Activo": "Activo",
+    "Fecha Creado": "Fecha Creado",
+    "Fecha Modificado": "Fecha Modificado",
+    "Descripcion": "Descripcion",
+    "Orden": "Orden",
+    "Codigo de Barras": "Codigo de Barras",
+    "unidad por bulto": "unidad por bulto",
+    "inner": "Presentacion/paquete",
+    "forzar multiplos": "forzar venta x cantidad",
+    "Costo usd": "Costo (USD)",
+    "Costo": "Costo (Pesos)",
+    "Etiquetas": "Etiquetas",
+    "Stock": "Stock",
+    "StockSuc2": "StockSuc2",
+    "Marca": "Marca",
+    "categorias": "Categorias",
+    "imagen": "imagen",
+    "Proveedor": "Proveedor",
+    "Pasillo": "Pasillo",
+    "Estante": "Estante",
+    "de Vencimiento": "Fecha de Vencimiento",
+    "Columna": "Columna",
+    "Precio": "Precio",
+    "Precio face": "Ultimo Precio (Pesos)",
+    "Mayorista": "Ultimo Precio (USD)"
+}
+
+# Columnas de las exportaciones CSV del sistema que en el Excel del catálogo tienen otro nombre:
+# el "Precio" de la exportación es el precio por mayor y el de lista es "Precio Jugueterias face"
+# ("Precio Mayorista" viene vacío en casi todas las filas)
+COLUMNAS_EXPORTACION_CSV = {
+    "Precio": "Precio x Mayor",
+    "Precio Jugueterias face": "Precio",
+}
+
+# Columnas de texto de las exportaciones CSV: se leen como texto para no perder ceros a la izquierda
+# ni mezclar tipos (ej. códigos de barras numéricos); el resto lo tipa el parser C
+COLUMNAS_TEXTO_CSV = [
+    "Codigo", "Nombre", "Fecha Creado", "Fecha Modificado", "Descripcion", "Codigo de Barras",
+    "Etiquetas", "Marca", "Categorias", "categorias", "imagen", "Proveedor", "Pasillo", "Estante",
+]
+
+# Separadores que se prueban al detectar el formato de un CSV
+SEPARADORES_CSV = ';,\t|'
+
+# Bytes del principio de un CSV que se usan para detectar su formato al leerlo por partes, y bytes por parte
+MUESTRA_FORMATO_CSV = 1 << 20
+BYTES_POR_PARTE_CSV = 8 << 20
+
+# Versión del formato de los snapshots: se cambia cuando cambia lo que guarda compactar_catalogo
+VERSION_SNAPSHOT = 5
+
+# Columnas que usan la app y el buscador; el resto de la exportación no se guarda en el catálogo cargado
+COLUMNAS_CATALOGO = [
+    "id", "Codigo", "Nombre", "Descripcion", "Codigo de Barras", "Precio", "Precio x Mayor", "Stock", "StockSuc2",
+    "Marca", "Categorias", "imagen", "Proveedor", "Pasillo", "Estante", "Fecha Creado", "Fecha Modificado",
+    "forzar venta x cantidad",
+]
+
+# Columnas con pocos valores distintos que se guardan codificadas como diccionario (dtype category)
+COLUMNAS_DICCIONARIO = ["Marca", "Proveedor", "Pasillo", "Estante", "Categorias"]
+
+# Los precios se guardan en punto fijo: enteros en centavos
+COLUMNAS_PRECIO = ["Precio", "Precio x Mayor"]
+ESCALA_PRECIO = 100
+
+COLUMNAS_STOCK = ["Stock", "StockSuc2"]
+
+# Cantidades enteras por producto (0 = sin dato): múltiplo de venta forzada
+COLUMNAS_CANTIDAD = ["forzar venta x cantidad"]
+
+
+# Función para saber cómo renombrar las columnas de un archivo (Excel o exportación CSV) al esquema del Excel
+# Las exportaciones CSV se reconocen porque traen "Precio Jugueterias face" y no "Precio x Mayor"
+def renombres_catalogo(columnas):
+    columnas = set(columnas)
+    # Si el archivo ya trae la columna destino se conserva esa
+    renombres = {origen: destino for origen, destino in COLUMNAS_RENOMBRADAS.items()
+                 if origen == destino or destino not in columnas}
+    if "Precio Jugueterias face" in columnas and "Precio x Mayor" not in columnas:
+        renombres.update(COLUMNAS_EXPORTACION_CSV)
+    return renombres
+
+
+# Función para aplicar el renombrado y las conversiones de tipos una sola vez
+def normalizar_catalogo(df):
+    df = df.rename(columns=renombres_catalogo(df.columns))
+
+    # Asegurar que StockSuc2 tenga valores numéricos y rellenar con 0 si falta
+    if 'StockSuc2' in df.columns:
+        df['StockSuc2'] = pd.to_numeric(df['StockSuc2'], errors='coerce').fillna(0)
+    else:
+        df['StockSuc2'] = 0
+
+    # Convertir 'Fecha Creado' a datetime si no está ya en ese formato
+    if 'Fecha Creado' in df.columns:
+        df['Fecha Creado'] = pd.to_datetime(df['Fecha Creado'], errors='coerce')
+
+    # Las columnas de texto con tipos mezclados (ej. códigos de barras numéricos) se pasan a str
+    # para que el snapshot tenga un tipo fijo por columna
+    # (las que ya son todas texto, como las que vienen de pyarrow, no se tocan)
+    for columna in df.columns:
+        if df[columna].dtype == object and pd.api.types.infer_dtype(df[columna], skipna=True) != 'string':
+            no_nulos = df[columna].notna()
+            df.loc[no_nulos, columna] = df.loc[no_nulos, columna].astype(str)
+
+    return df
+
+
+# Función para codificar una columna como diccionario de textos (así el tipo de las categorías no depende del archivo)
+def _a_diccionario(columna):
+    if isinstance(columna.dtype, pd.CategoricalDtype):
+        return columna.cat.rename_categories(columna.cat.categories.astype(str))
+    valores = columna.astype(object)
+    no_nulos = valores.notna()
+    valores[no_nulos] = valores[no_nulos].astype(str)
+    return pd.Series(pd.Categorical(valores, categories=pd.Index(sorted(valores[no_nulos].unique()), dtype=str)),
+                     index=columna.index)
+
+
+# Función para quedarse con una representación compacta y tipada del catálogo ya normalizado:
+# solo las columnas que se usan, texto repetido como diccionario, precios en centavos y stock y cantidades en int32
+def compactar_catalogo(df):
+    df = df[[columna for columna in COLUMNAS_CATALOGO if columna in df.columns]].copy()
+    for columna in COLUMNAS_PRECIO:
+        if columna in df.columns:
+            precios = pd.to_numeric(df[columna], errors='coerce').fillna(0).to_numpy(dtype=float)
+            df[columna] = np.round(precios * ESCALA_PRECIO).astype(np.int64)
+    for columna in COLUMNAS_STOCK + COLUMNAS_CANTIDAD:
+        if columna in df.columns:
+            stock = pd.to_numeric(df[columna], errors='coerce').fillna(0).to_numpy(dtype=float)
+            df[columna] = np.round(stock).astype(np.int32)
+    for columna in COLUMNAS_DICCIONARIO:
+        if columna in df.columns:
+            df[columna] = _a_diccionario(df[columna])
+    if 'Fecha Modificado' in df.columns:
+        df['Fecha Modificado'] = pd.to_datetime(df['Fecha Modificado'], errors='coerce')
+    return df
+
+
+# Función para pasar precios guardados en centavos a pesos (acepta un valor o un array)
+def pesos(centavos):
+    return centavos / ESCALA_PRECIO
+
+
+# Función para calcular el hash del contenido de un archivo
+def hash_archivo(file_path):
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+# Función para detectar una sola vez la codificación y el separador de un CSV exportado
+# Las exportaciones del sistema vienen en Latin-1 con ';', pero también se aceptan UTF-8 y otros separadores
+def detectar_formato_csv(datos):
+    if datos.startswith(b'\xef\xbb\xbf'):
+        codificacion = 'utf-8-sig'
+    else:
+        try:
+            datos.decode('utf-8')
+            codificacion = 'utf-8'
+        except UnicodeDecodeError as e:
+            # Si `datos` es solo el principio del archivo puede cortar un carácter UTF-8 a la mitad
+            codificacion = 'utf-8' if e.reason == 'unexpected end of data' else 'latin-1'
+    encabezado = datos[:datos.find(b'\n')].decode(codificacion, errors='replace')
+    try:
+        separador = csv.Sniffer().sniff(encabezado, delimiters=SEPARADORES_CSV).delimiter
+    except csv.Error:
+        separador = ';'
+    return codificacion, separador
+
+
+# Función para leer un CSV exportado con el parser C y tipos explícitos para las columnas de texto
+def leer_csv(datos):
+    codificacion, separador = detectar_formato_csv(datos)
+    return pd.read_csv(BytesIO(datos), sep=separador, encoding=codificacion, engine='c',
+                       dtype={columna: str for columna in COLUMNAS_TEXTO_CSV})
+
+
+# Función para pasar a UTF-8 una columna de bytes en Latin-1 de una sola vez, sin convertir valor por valor
+# Cada byte >= 0x80 pasa a ocupar dos bytes, así que cada offset se corre en la cantidad de esos bytes anteriores
+def _latin1_a_utf8(columna):
+    validos, offsets, datos = columna.buffers()
+    offsets = np.frombuffer(offsets, dtype=np.int32)[:columna.offset + len(columna) + 1]
+    datos = np.frombuffer(datos, dtype=np.uint8)[:offsets[-1]] if datos is not None else np.zeros(0, dtype=np.uint8)
+    altos = np.flatnonzero(datos >= 0x80)
+    utf8 = datos.tobytes().decode('latin-1').encode('utf-8')
+    offsets = (offsets + np.searchsorted(altos, offsets)).astype(np.int32)
+    return pa.StringArray.from_buffers(len(columna), pa.py_buffer(offsets), pa.py_buffer(utf8), validos,
+                                       columna.null_count, columna.offset)
+
+
+# Función para leer un CSV exportado por partes ya normalizadas, sin tenerlo entero en memoria
+# Usa el lector en streaming de pyarrow; el formato se detecta con el principio del archivo
+# y `columnas` (nombres ya normalizados) limita las columnas que se convierten
+# Con `bytes_por_parte=None` se lee entero en una sola parte (más rápido, con los tipos inferidos sobre todo el archivo)
+# Las exportaciones en Latin-1 no se transcodifican enteras (era la mitad del tiempo de lectura):
+# el texto se lee como bytes y se pasa a UTF-8 solo en las columnas que se convierten
+def leer_csv_por_partes(ruta, columnas=None, bytes_por_parte=BYTES_POR_PARTE_CSV):
+    with open(ruta, 'rb') as f:
+        muestra = f.read(MUESTRA_FORMATO_CSV)
+    codificacion, separador = detectar_formato_csv(muestra)
+    encabezado = muestra[:muestra.find(b'\n')].decode(codificacion, errors='replace').strip('\r\ufeff')
+    todas = next(csv.reader([encabezado], delimiter=separador))
+    nombres = todas
+    if columnas is not None:
+        renombres = renombres_catalogo(todas)
+        nombres = [c for c in todas if renombres.get(c, c) in columnas]
+    latin1 = codificacion == 'latin-1'
+    tipo_texto = pa.binary() if latin1 else pa.string()
+
+    opciones = dict(
+        read_options=pacsv.ReadOptions(encoding='utf8' if latin1 else codificacion, column_names=todas, skip_rows=1),
+        parse_options=pacsv.ParseOptions(delimiter=separador, newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=nombres,
+            column_types={c: tipo_texto for c in COLUMNAS_TEXTO_CSV if c in nombres},
+        ),
+    )
+    if bytes_por_parte is None:
+        partes = [pacsv.read_csv(ruta, **opciones)]
+    else:
+        opciones['read_options'].block_size = bytes_por_parte
+        partes = (pa.Table.from_batches([parte]) for parte in pacsv.open_csv(ruta, **opciones))
+    for parte in partes:
+        if latin1:
+            parte = pa.table([pa.chunked_array([_latin1_a_utf8(c) for c in columna.chunks], pa.string())
+                              if pa.types.is_binary(columna.type) else columna for columna in parte.columns],
+                             names=parte.column_names)
+        yield normalizar_catalogo(parte.to_pandas())
+
+
+# Función para leer el archivo fuente del catálogo (Excel o CSV) sin normalizar
+def leer_fuente(file_path):
+    if os.path.splitext(file_path)[1].lower() == '.csv':
+        with open(file_path, 'rb') as f:
+            return leer_csv(f.read())
+    return pd.read_excel(file_path, engine='openpyxl')
+
+
+# Ruta del manifiesto que dice qué snapshot corresponde al catálogo de `file_path`
+def ruta_manifiesto(file_path, dir_cache):
+    nombre = os.path.basename(file_path)
+    return os.path.join(dir_cache, f"{nombre}.json")
+
+
+# Función para leer un manifiesto; devuelve None si no existe o está dañado
+def leer_manifiesto(ruta):
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _nombre_snapshot(contenido):
+    return f"{contenido}.v{VERSION_SNAPSHOT}.parquet"
+
+
+# Función para guardar un DataFrame ya compactado como snapshot Parquet
+def guardar_snapshot(df, ruta_snapshot):
+    escribir_atomico(ruta_snapshot, lambda ruta: df.to_parquet(ruta, index=False))
+
+
+# Función para volver a codificar las columnas diccionario de un catálogo leído de Parquet o Arrow
+# (las que no tienen ningún valor vuelven como texto suelto)
+def restaurar_diccionarios(df):
+    for columna in COLUMNAS_DICCIONARIO:
+        if columna in df.columns:
+            df[columna] = _a_diccionario(df[columna])
+    return df
+
+
+# Función para leer un snapshot del catálogo
+def leer_snapshot(ruta_snapshot):
+    return restaurar_diccionarios(pd.read_parquet(ruta_snapshot))
+
+
+# Función para cargar el catálogo (Excel o CSV) usando el snapshot Parquet si el archivo fuente no cambió
+def cargar_catalogo(file_path, dir_cache=DIR_CACHE_CATALOGO):
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"El archivo '{file_path}' no se encuentra en el directorio.")
+
+    os.makedirs(dir_cache, exist_ok=True)
+    estado = os.stat(file_path)
+    manifiesto = leer_manifiesto(ruta_manifiesto(file_path, dir_cache))
+
+    # Camino rápido: mismo mtime y tamaño que el snapshot anterior, no hace falta ni hashear
+    # (los snapshots de otra versión del formato no sirven y se rehacen)
+    if (manifiesto and manifiesto.get('mtime_ns') == estado.st_mtime_ns and manifiesto.get('tamano') == estado.st_size
+            and manifiesto.get('snapshot') == _nombre_snapshot(manifiesto.get('sha256'))):
+        ruta_snapshot = os.path.join(dir_cache, manifiesto['snapshot'])
+        if os.path.isfile(ruta_snapshot):
+            return leer_snapshot(ruta_snapshot)
+
+    # El mtime cambió: si el contenido es el mismo se reutiliza el snapshot existente
+    contenido = hash_archivo(file_path)
+    ruta_snapshot = os.path.join(dir_cache, _nombre_snapshot(contenido))
+    if os.path.isfile(ruta_snapshot):
+        df = leer_snapshot(ruta_snapshot)
+    else:
+        df = compactar_catalogo(normalizar_catalogo(leer_fuente(file_path)))
+        guardar_snapshot(df, ruta_snapshot)
+
+    _registrar_snapshot(file_path, dir_cache, manifiesto, estado, contenido, ruta_snapshot)
+    return df
+
+
+# Función para apuntar el manifiesto de `file_path` a un snapshot y borrar el anterior si quedó huérfano
+def _registrar_snapshot(file_path, dir_cache, manifiesto, estado, contenido, ruta_snapshot, origen=None):
+    nuevo_manifiesto = {
+        'archivo': os.path.basename(file_path),
+        'mtime_ns': estado.st_mtime_ns,
+        'tamano': estado.st_size,
+        'sha256': contenido,
+        'snapshot': os.path.basename(ruta_snapshot),
+    }
+    if origen:
+        nuevo_manifiesto['origen'] = origen
+
+    def escribir_manifiesto(ruta):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(nuevo_manifiesto, f)
+
+    escribir_atomico(ruta_manifiesto(file_path, dir_cache), escribir_manifiesto)
+
+    if manifiesto and manifiesto.get('snapshot') != nuevo_manifiesto['snapshot']:
+        try:
+            os.remove(os.path.join(dir_cache, manifiesto['snapshot']))
+        except OSError:
+            pass
+
+
+# Función para ingerir un CSV subido directamente al snapshot del catálogo, sin pasar por un Excel intermedio
+# El manifiesto de `file_path` queda apuntando al snapshot del CSV hasta que el archivo fuente cambie
+# `df` es el mismo CSV ya leído con leer_csv (ej. al validarlo), para no leerlo dos veces
+def ingerir_csv(datos, file_path, dir_cache=DIR_CACHE_CATALOGO, origen=None, df=None):
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"El archivo '{file_path}' no se encuentra en el directorio.")
+
+    os.makedirs(dir_cache, exist_ok=True)
+    contenido = hashlib.sha256(datos).hexdigest()
+    ruta_snapshot = os.path.join(dir_cache, _nombre_snapshot(contenido))
+    if os.path.isfile(ruta_snapshot):
+        df = leer_snapshot(ruta_snapshot)
+    else:
+        df = compactar_catalogo(normalizar_catalogo(leer_csv(datos) if df is None else df))
+        guardar_snapshot(df, ruta_snapshot)
+
+    manifiesto = leer_manifiesto(ruta_manifiesto(file_path, dir_cache))
+    _registrar_snapshot(file_path, dir_cache, manifiesto, os.stat(file_path), contenido, ruta_snapshot, origen)
+    return df
+
+
+# Firma de la versión vigente del catálogo: cambia si cambia el archivo fuente o si se ingirió un CSV
+def firma_catalogo(file_path, dir_cache=DIR_CACHE_CATALOGO):
+    manifiesto = leer_manifiesto(ruta_manifiesto(file_path, dir_cache)) or {}
+    return os.stat(file_path).st_mtime_ns, manifiesto.get('snapshot')
+
+
+# Función para normalizar una clave de búsqueda (códigos numéricos, espacios sobrantes)
+def _clave(valor):
+    if valor is None or (isinstance(valor, float) and pd.isna(valor)):
+        return ''
+    return str(valor).strip()
+
+
+# Función para agregar claves a un mapa clave -> posición; ante duplicados gana la primera fila
+# Las claves que aparecen más de una vez se anotan en `repetidas`: son las únicas a revisar al quitar filas
+def _agregar_claves(mapa, repetidas, valores, posiciones):
+    for posicion, valor in zip(posiciones, valores):
+        clave = _clave(valor)
+        if not clave:
+            continue
+        if clave in mapa:
+            repetidas.add(clave)
+        else:
+            mapa[clave] = int(posicion)
+
+
+# Función para armar un mapa clave -> posición; ante duplicados gana la primera fila
+def _mapa_primera_fila(columna):
+    mapa, repetidas = {}, set()
+    _agregar_claves(mapa, repetidas, columna.tolist(), range(len(columna)))
+    return mapa, repetidas
+
+
+# Función para separar el texto de 'Categorias' ("A,B,C") en una lista de categorías limpias
+def separar_categorias(valor):
+    if not isinstance(valor, str):
+        return []
+    return [c.strip() for c in valor.split(',') if c.strip()]
+
+
+# Función para pasar la columna 'Categorias' a bitsets: una fila de bytes por producto y un bit por categoría
+# `numeros` (categoría -> número de bit) se completa con las categorías nuevas; los bits ya asignados no cambian
+# Cada combinación distinta de categorías se separa una sola vez (la columna viene codificada como diccionario)
+def bits_categorias(columna, numeros):
+    combinaciones = pd.Categorical(columna)
+    listas = [separar_categorias(valor) for valor in combinaciones.categories]
+    for categorias in listas:
+        for categoria in categorias:
+            numeros.setdefault(categoria, len(numeros))
+    # La última fila queda en cero para las filas sin categorías (código -1)
+    matriz = np.zeros((len(listas) + 1, max(len(numeros), 1)), dtype=bool)
+    for i, categorias in enumerate(listas):
+        matriz[i, [numeros[c] for c in categorias]] = True
+    return np.packbits(matriz, axis=1)[combinaciones.codes]
+
+
+# Función para agregar bytes en cero a unos bitsets hasta `ancho` bytes por fila
+def _ensanchar_bits(bits, ancho):
+    return np.pad(bits, ((0, 0), (0, ancho - bits.shape[1])))
+
+
+# Función para saber qué filas tienen prendido el bit `numero`
+def _tiene_bit(bits, numero):
+    return ((bits[..., numero >> 3] >> (7 - (numero & 7))) & 1).astype(bool)
+
+
+# Función para armar el índice invertido categoría -> posiciones ordenadas a partir de los bitsets
+def indice_categorias(bits, numeros, posiciones=None):
+    if posiciones is None:
+        posiciones = np.arange(len(bits), dtype=np.int32)
+    posiciones = np.asarray(posiciones, dtype=np.int32)
+    posiciones_por_categoria = {}
+    for categoria, numero in numeros.items():
+        filas = np.flatnonzero(_tiene_bit(bits, numero))
+        if len(filas):
+            posiciones_por_categoria[categoria] = posiciones[filas]
+    return posiciones_por_categoria
+
+
+# Función para armar el índice de prefijos de código: códigos en minúsculas ordenados y sus posiciones
+def indice_prefijos(columna, posiciones=None):
+    if posiciones is None:
+        posiciones = range(len(columna))
+    pares = sorted((_clave(valor).lower(), int(posicion)) for posicion, valor in zip(posiciones, columna.tolist()))
+    pares = [(codigo, posicion) for codigo, posicion in pares if codigo]
+    codigos = np.array([codigo for codigo, _ in pares], dtype=object)
+    posiciones = np.array([posicion for _, posicion in pares], dtype=np.int32)
+    return codigos, posiciones
+
+
+# Columnas de fecha por las que se puede listar "lo más nuevo primero"
+COLUMNAS_NOVEDAD = ['Fecha Creado', 'Fecha Modificado']
+
+
+# Clave de orden para "más nuevo primero": menor = más nuevo, las fechas vacías (NaT) van al final
+def clave_novedad(fechas):
+    valores = pd.to_datetime(fechas, errors='coerce').to_numpy(dtype='datetime64[ns]')
+    return np.where(np.isnat(valores), np.iinfo(np.int64).max, -valores.view(np.int64))
+
+
+# Función para ordenar todas las filas de la más nueva a la más vieja (a igual fecha, orden del archivo)
+def orden_novedades(clave):
+    return np.argsort(clave, kind='stable').astype(np.int32)
+
+
+# Función para intercalar filas nuevas en un orden por novedad ya armado, sin reordenar las existentes
+def _intercalar(orden, nuevas, clave):
+    nuevas = nuevas[np.argsort(clave[nuevas], kind='stable')]
+    donde = np.searchsorted(clave[orden], clave[nuevas], side='right')
+    return np.insert(orden, donde, nuevas).astype(np.int32)
+
+
+# Función para rehacer el orden a partir del catálogo anterior: las filas con el mismo Id y la misma fecha
+# conservan su orden relativo y solo se ordenan e intercalan las filas nuevas o con fecha cambiada
+def actualizar_orden_novedades(clave, ids, orden_anterior, clave_anterior, ids_anteriores):
+    pos_anterior = pd.Index(ids_anteriores).get_indexer(ids)
+    sin_cambios = pos_anterior >= 0
+    sin_cambios[sin_cambios] = clave_anterior[pos_anterior[sin_cambios]] == clave[sin_cambios]
+
+    # Recorrer el orden anterior quedándose con las filas que siguen igual, ya en posiciones nuevas
+    nueva_posicion = np.full(len(ids_anteriores), -1, dtype=np.int64)
+    nueva_posicion[pos_anterior[sin_cambios]] = np.flatnonzero(sin_cambios)
+    conservadas = nueva_posicion[orden_anterior]
+    conservadas = conservadas[conservadas >= 0]
+
+    return _intercalar(conservadas, np.flatnonzero(~sin_cambios), clave)
+
+
+# Función para calcular un hash por fila, para detectar qué filas cambiaron entre dos exportaciones
+def hash_filas(df):
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+# Función para armar claves únicas a partir de los Ids: las exportaciones repiten algunos Ids (variantes
+# del mismo producto), así que cada fila se identifica por (Id, número de aparición de ese Id)
+def _claves_id(ids):
+    if pd.isna(ids).any():
+        raise ValueError("Hay filas sin Id en el catálogo.")
+    ids = pd.Series(ids)
+    return pd.MultiIndex.from_arrays([ids.to_numpy(), ids.groupby(ids).cumcount().to_numpy()])
+
+
+# Columnas con mapa clave -> fila, y el atributo del índice donde se guarda cada mapa
+MAPAS_CLAVE = [('por_codigo', 'Codigo'), ('por_nombre', 'Nombre'), ('por_codigo_barras', 'Codigo de Barras')]
+
+# Proporción máxima de filas dadas de baja en el índice antes de reconstruirlo desde cero
+MAX_FILAS_MUERTAS = 0.25
+
+_versiones = itertools.count()
+
+
+# Cambios de una exportación nueva respecto del catálogo cargado, comparando las filas por Id
+class DeltaCatalogo:
+    def __init__(self, insertados, actualizados, eliminados, quitadas, nuevas, hashes_nuevas):
+        # Ids de los productos nuevos, modificados y borrados
+        self.insertados = insertados
+        self.actualizados = actualizados
+        self.eliminados = eliminados
+        # Posiciones del índice que dejan de valer (borradas y versión vieja de las modificadas)
+        self.quitadas = quitadas
+        # Filas a agregar al final (nuevas y versión nueva de las modificadas) y sus hashes
+        self.nuevas = nuevas
+        self.hashes_nuevas = hashes_nuevas
+
+    def __len__(self):
+        return len(self.insertados) + len(self.actualizados) + len(self.eliminados)
+
+
+# Función para sumar a un diccionario de categorías los valores nuevos de una columna, sin reordenar los existentes
+def _unir_categorias(tipo, columna):
+    valores = columna.cat.categories if isinstance(columna.dtype, pd.CategoricalDtype) else columna.dropna().unique()
+    nuevas = pd.Index(valores).difference(tipo.categories)
+    if not len(nuevas):
+        return tipo
+    return pd.CategoricalDtype(tipo.categories.append(nuevas))
+
+
+# Función para comparar una exportación ya compactada con el catálogo cargado en `indice`
+# Lanza ValueError si no se puede comparar por Id (sin columna 'id', filas sin Id o columnas distintas)
+def calcular_delta(indice, nuevo):
+    if indice.ids is None or 'id' not in nuevo.columns:
+        raise ValueError("El catálogo no tiene columna 'id'.")
+    if set(nuevo.columns) != set(indice.df.columns):
+        raise ValueError("Las columnas de la exportación no coinciden con las del catálogo cargado.")
+    tipos = indice.df.dtypes.to_dict()
+    for columna, tipo in tipos.items():
+        if isinstance(tipo, pd.CategoricalDtype):
+            tipos[columna] = _unir_categorias(tipo, nuevo[columna])
+    try:
+        nuevo = nuevo[list(indice.df.columns)].astype(tipos).reset_index(drop=True)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Los tipos de la exportación no coinciden con los del catálogo cargado: {e}")
+
+    vivas = np.flatnonzero(indice.vivas)
+    ids_vivos = _claves_id(indice.ids[vivas])
+    ids_nuevos = _claves_id(nuevo['id'].to_numpy())
+
+    hashes_nuevos = hash_filas(nuevo)
+    pos_anterior = ids_vivos.get_indexer(ids_nuevos)
+    insertado = pos_anterior < 0
+    actualizado = np.zeros(len(nuevo), dtype=bool)
+    actualizado[~insertado] = indice.hashes()[vivas[pos_anterior[~insertado]]] != hashes_nuevos[~insertado]
+    eliminado = ~ids_vivos.isin(ids_nuevos)
+
+    quitadas = np.sort(np.concatenate([vivas[eliminado], vivas[pos_anterior[actualizado]]])).astype(np.int32)
+    filas_nuevas = np.flatnonzero(insertado | actualizado)
+    return DeltaCatalogo(
+        insertados=ids_nuevos.get_level_values(0)[insertado].to_numpy(),
+        actualizados=ids_nuevos.get_level_values(0)[actualizado].to_numpy(),
+        eliminados=ids_vivos.get_level_values(0)[eliminado].to_numpy(),
+        quitadas=quitadas,
+        nuevas=nuevo.iloc[filas_nuevas].reset_index(drop=True),
+        hashes_nuevas=hashes_nuevos[filas_nuevas],
+    )
+
+
+# Función para pasar del índice cargado al de una exportación nueva aplicando solo las diferencias
+# Si no se puede comparar por Id o quedarían demasiadas filas dadas de baja, se reconstruye completo
+def actualizar_indice(anterior, df):
+    try:
+        delta = calcular_delta(anterior, df)
+    except ValueError:
+        return IndiceCatalogo(df, anterior)
+    muertas = len(anterior.df) - int(anterior.vivas.sum()) + len(delta.quitadas)
+    if muertas > MAX_FILAS_MUERTAS * (len(anterior.df) + len(delta.nuevas)):
+        return IndiceCatalogo(df, anterior)
+    return anterior.aplicar_delta(delta)
+
+
+# Índice del catálogo: se arma una vez por snapshot cargado y resuelve búsquedas en O(1)
+# Si se pasa el índice de la versión anterior, los órdenes por novedad se actualizan en vez de reordenar todo
+# Con aplicar_delta las filas modificadas o borradas se dan de baja (quedan "muertas" en `df`) y las nuevas
+# se agregan al final, así las posiciones de las demás filas no cambian y solo se tocan las entradas afectadas
+class IndiceCatalogo:
+    def __init__(self, df, anterior=None):
+        # Sin copiar el catálogo si ya tiene índice posicional (ej. una generación compartida mapeada en memoria)
+        self.df = df if df.index.equals(pd.RangeIndex(len(df))) else df.reset_index(drop=True)
+        self.version = next(_versiones)
+        # Versión de la que se derivó con aplicar_delta, y posiciones quitadas/agregadas en ese paso
+        self.base = None
+        self.quitadas = np.empty(0, dtype=np.int32)
+        self.agregadas = np.empty(0, dtype=np.int32)
+        self.urls_quitadas = []
+        self.vivas = np.ones(len(self.df), dtype=bool)
+        self._hashes = None
+        self._repetidas = {}
+        for atributo, columna in MAPAS_CLAVE:
+            if columna in self.df.columns:
+                mapa, self._repetidas[atributo] = _mapa_primera_fila(self.df[columna])
+            else:
+                mapa, self._repetidas[atributo] = {}, set()
+            setattr(self, atributo, mapa)
+        # Categorías: coincidencia exacta ("Peluches" no trae "Peluches Grandes")
+        # Las categorías de cada fila se guardan como bitset (número de bit en `numeros_categorias`)
+        self.numeros_categorias = {}
+        if 'Categorias' in self.df.columns:
+            self.bits_categorias = bits_categorias(self.df['Categorias'], self.numeros_categorias)
+        else:
+            self.bits_categorias = np.zeros((len(self.df), 1), dtype=np.uint8)
+        self.por_categoria = indice_categorias(self.bits_categorias, self.numeros_categorias)
+        # Códigos ordenados (sin distinguir mayúsculas) para listar por inicio de código
+        self.codigos_ordenados, self.posiciones_por_codigo = indice_prefijos(self.df['Codigo'])
+        # Órdenes "más nuevo primero" por cada columna de fecha, para paginar sin ordenar en cada rerun
+        self.ids = self.df['id'].to_numpy() if 'id' in self.df.columns else None
+        self.claves_novedad = {}
+        self.por_novedad = {}
+        for columna in COLUMNAS_NOVEDAD:
+            if columna in self.df.columns:
+                self.claves_novedad[columna] = clave_novedad(self.df[columna])
+                self.por_novedad[columna] = self._orden_novedad(columna, anterior)
+        self._listas()
+
+    # Listas para los selectbox, en el orden original del archivo y sin duplicados
+    def _listas(self):
+        self.codigos = list(self.por_codigo)
+        self.nombres = list(self.por_nombre)
+        self.categorias = sorted(self.por_categoria)
+
+    def _orden_novedad(self, columna, anterior):
+        clave = self.claves_novedad[columna]
+        incremental = (
+            anterior is not None and columna in anterior.por_novedad and anterior.vivas.all()
+            and self.ids is not None and anterior.ids is not None
+            and pd.Index(self.ids).is_unique and pd.Index(anterior.ids).is_unique
+        )
+        if not incremental:
+            return orden_novedades(clave)
+        return actualizar_orden_novedades(clave, self.ids, anterior.por_novedad[columna],
+                                          anterior.claves_novedad[columna], anterior.ids)
+
+    # Hash de cada fila, calculado recién la primera vez que se compara contra una exportación nueva
+    def hashes(self):
+        if self._hashes is None:
+            self._hashes = hash_filas(self.df)
+        return self._hashes
+
+    # Devuelve un índice nuevo con el delta aplicado; este índice no se modifica (puede estar en uso)
+    def aplicar_delta(self, delta):
+        nuevo = copy.copy(self)
+        nuevo.version = next(_versiones)
+        nuevo.base = self.version
+        quitadas = delta.quitadas
+        agregadas = np.arange(len(self.df), len(self.df) + len(delta.nuevas), dtype=np.int32)
+        nuevo.quitadas, nuevo.agregadas = quitadas, agregadas
+
+        # Las columnas diccionario del delta traen las categorías de este índice más las nuevas
+        tipos = {columna: delta.nuevas[columna].dtype for columna in self.df.columns
+                 if isinstance(self.df[columna].dtype, pd.CategoricalDtype) and self.df[columna].dtype != delta.nuevas[columna].dtype}
+        nuevo.df = pd.concat([self.df.astype(tipos) if tipos else self.df, delta.nuevas], ignore_index=True)
+        nuevo.vivas = np.concatenate([self.vivas, np.ones(len(agregadas), dtype=bool)])
+        nuevo.vivas[quitadas] = False
+        nuevo.ids = np.concatenate([self.ids, delta.nuevas['id'].to_numpy()])
+        nuevo._hashes = np.concatenate([self.hashes(), delta.hashes_nuevas])
+
+        nuevo._repetidas = dict(self._repetidas)
+        for atributo, columna in MAPAS_CLAVE:
+            if columna in nuevo.df.columns:
+                self._actualizar_mapa(nuevo, atributo, columna, quitadas, agregadas)
+
+        if 'Categorias' in nuevo.df.columns:
+            nuevo.numeros_categorias = dict(self.numeros_categorias)
+            bits_nuevas = bits_categorias(delta.nuevas['Categorias'], nuevo.numeros_categorias)
+            ancho = max(self.bits_categorias.shape[1], bits_nuevas.shape[1])
+            nuevo.bits_categorias = np.concatenate([_ensanchar_bits(self.bits_categorias, ancho),
+                                                    _ensanchar_bits(bits_nuevas, ancho)])
+            nuevo.por_categoria = dict(self.por_categoria)
+            bits_quitadas = np.bitwise_or.reduce(self.bits_categorias[quitadas], axis=0)
+            afectadas = [c for c, numero in self.numeros_categorias.items() if _tiene_bit(bits_quitadas, numero)]
+            for categoria in afectadas:
+                posiciones = nuevo.por_categoria[categoria]
+                posiciones = posiciones[~np.isin(posiciones, quitadas)]
+                if len(posiciones):
+                    nuevo.por_categoria[categoria] = posiciones
+                else:
+                    del nuevo.por_categoria[categoria]
+            # Las posiciones agregadas son mayores que todas las existentes: concatenar mantiene el orden
+            for categoria, posiciones in indice_categorias(bits_nuevas, nuevo.numeros_categorias, agregadas).items():
+                existentes = nuevo.por_categoria.get(categoria, np.empty(0, dtype=np.int32))
+                nuevo.por_categoria[categoria] = np.concatenate([existentes, posiciones])
+
+        conservar = ~np.isin(self.posiciones_por_codigo, quitadas)
+        codigos, posiciones = self.codigos_ordenados[conservar], self.posiciones_por_codigo[conservar]
+        codigos_nuevos, posiciones_nuevas = indice_prefijos(delta.nuevas['Codigo'], agregadas)
+        donde = np.searchsorted(codigos, codigos_nuevos, side='right')
+        nuevo.codigos_ordenados = np.insert(codigos, donde, codigos_nuevos)
+        nuevo.posiciones_por_codigo = np.insert(posiciones, donde, posiciones_nuevas).astype(np.int32)
+
+        nuevo.claves_novedad, nuevo.por_novedad = {}, {}
+        for columna, clave in self.claves_novedad.items():
+            clave = np.concatenate([clave, clave_novedad(delta.nuevas[columna])])
+            orden = self.por_novedad[columna]
+            nuevo.claves_novedad[columna] = clave
+            nuevo.por_novedad[columna] = _intercalar(orden[~np.isin(orden, quitadas)], agregadas, clave)
+
+        # Imágenes que ya no usa ningún producto vigente de los que cambiaron
+        if 'imagen' in nuevo.df.columns:
+            urls_viejas = set(self.df['imagen'].iloc[quitadas].dropna())
+            nuevo.urls_quitadas = sorted(urls_viejas - set(delta.nuevas['imagen'].dropna()))
+
+        nuevo._listas()
+        return nuevo
+
+    def _actualizar_mapa(self, nuevo, atributo, columna, quitadas, agregadas):
+        mapa = dict(getattr(self, atributo))
+        repetidas = set(self._repetidas[atributo])
+        valores = nuevo.df[columna]
+        huerfanas = []
+        for posicion, valor in zip(quitadas, valores.iloc[quitadas].tolist()):
+            clave = _clave(valor)
+            if mapa.get(clave) == posicion:
+                del mapa[clave]
+                if clave in repetidas:
+                    huerfanas.append(clave)
+        _agregar_claves(mapa, repetidas, valores.iloc[agregadas].tolist(), agregadas)
+        # Una clave repetida que perdió su fila pasa a la primera fila vigente que la tenga
+        if huerfanas:
+            normalizadas = valores.where(valores.notna(), '').astype(str).str.strip().to_numpy()
+            candidatas = np.flatnonzero(pd.Index(normalizadas).isin(huerfanas) & nuevo.vivas)
+            for posicion in candidatas[::-1]:
+                mapa[normalizadas[posicion]] = int(posicion)
+        setattr(nuevo, atributo, mapa)
+        nuevo._repetidas[atributo] = repetidas
+
+    def __len__(self):
+        return int(self.vivas.sum())
+
+    # Producto de una posición como dict; se arma al pedirlo para no tener el catálogo duplicado en objetos Python
+    def fila(self, posicion):
+        return self.df.iloc[posicion].to_dict()
+
+    def _buscar(self, mapa, valor):
+        posicion = mapa.get(_clave(valor))
+        return None if posicion is None else self.fila(posicion)
+
+    def buscar_codigo(self, codigo):
+        return self._buscar(self.por_codigo, codigo)
+
+    def buscar_nombre(self, nombre):
+        return self._buscar(self.por_nombre, nombre)
+
+    def buscar_codigo_barras(self, codigo_barras):
+        return self._buscar(self.por_codigo_barras, codigo_barras)
+
+    # Posiciones (ordenadas) de las filas que tienen exactamente esa categoría
+    def posiciones_categoria(self, categoria):
+        return self.por_categoria.get(categoria, np.empty(0, dtype=np.int32))
+
+    # Rango [inicio, fin) de los códigos que empiezan con `prefijo`, con dos búsquedas binarias
+    def rango_prefijo(self, prefijo):
+        prefijo = _clave(prefijo).lower()
+        inicio = int(np.searchsorted(self.codigos_ordenados, prefijo, side='left'))
+        fin = int(np.searchsorted(self.codigos_ordenados, prefijo + '\uffff', side='left'))
+        return inicio, fin
+
+    # Posiciones de las filas cuyo código empieza con `prefijo`, ordenadas por código (es una vista, no copia)
+    def posiciones_prefijo(self, prefijo):
+        inicio, fin = self.rango_prefijo(prefijo)
+        return self.posiciones_por_codigo[inicio:fin]
+
+    # Posiciones de todas las filas de la más nueva a la más vieja según la columna de fecha
+    def posiciones_novedad(self, columna='Fecha Creado'):
+        return self.por_novedad.get(columna, np.empty(0, dtype=np.int32))
@@ -0,0 +1,244 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from archivos import escribir_atomico
+from catalogo import DIR_CACHE_CATALOGO, cargar_catalogo, firma_catalogo, restaurar_diccionarios
+
+# Carpeta donde el proceso cargador publica las generaciones del catálogo para todas las instancias de la app
+DIR_CATALOGO_COMPARTIDO = '.catalogo_compartido'
+
+# Archivo puntero a la generación vigente: se reemplaza de forma atómica en cada publicación
+PUNTERO = 'actual.json'
+
+# Historial de generaciones publicadas (la más reciente al final), para listar versiones y volver atrás
+HISTORIAL = 'historial.json'
+MAX_HISTORIAL = 200
+
+# Versiones distintas del catálogo que se conservan en disco: permiten volver atrás sin recargar nada,
+# y un proceso puede seguir leyendo la anterior hasta su próximo rerun
+CONSERVAR_GENERACIONES = 5
+
+# Segundos entre revisiones del archivo fuente cuando el cargador queda vigilando
+INTERVALO_VIGILANCIA = 5
+
+
+# Función para leer el puntero a la generación vigente (None si todavía no se publicó nada)
+def generacion_actual(dir_compartido=DIR_CATALOGO_COMPARTIDO):
+    try:
+        with open(os.path.join(dir_compartido, PUNTERO), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _escribir_json(ruta_destino, datos):
+    def escribir(ruta):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False)
+
+    escribir_atomico(ruta_destino, escribir)
+
+
+# Función para leer el historial de generaciones publicadas (lista vacía si no hay)
+def historial_generaciones(dir_compartido=DIR_CATALOGO_COMPARTIDO):
+    try:
+        with open(os.path.join(dir_compartido, HISTORIAL), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+# Función para mover el puntero a un archivo de catálogo ya escrito, como generación nueva
+# Primero se escribe el archivo de la versión y recién después se mueve el puntero, así ningún
+# proceso ve una versión a medio escribir
+def _apuntar(dir_compartido, datos, conservar):
+    anterior = generacion_actual(dir_compartido)
+    puntero = dict(datos, generacion=anterior['generacion'] + 1 if anterior else 1,
+                   fecha=time.strftime('%Y-%m-%d %H:%M:%S'))
+    _escribir_json(os.path.join(dir_compartido, PUNTERO), puntero)
+    historial = historial_generaciones(dir_compartido) + [puntero]
+    _escribir_json(os.path.join(dir_compartido, HISTORIAL), historial)
+    borrar_generaciones_viejas(dir_compartido, conservar)
+    return puntero
+
+
+# Función para publicar un catálogo ya compactado como nueva generación (Arrow IPC sin comprimir)
+# Los archivos se nombran por el hash de su contenido: volver a publicar un catálogo igual a una
+# versión conservada no escribe nada, solo mueve el puntero
+def publicar_catalogo(df, dir_compartido=DIR_CATALOGO_COMPARTIDO, snapshot=None, origen=None,
+                      conservar=CONSERVAR_GENERACIONES):
+    os.makedirs(dir_compartido, exist_ok=True)
+    # Un solo lote por generación: así cada columna queda contigua y se puede mapear sin copiar
+    # El texto se guarda como large_string, que es lo que usan las columnas de texto de pandas sobre Arrow
+    # (con string habría que convertir los offsets al abrir y eso los copia)
+    tabla = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+    tabla = tabla.cast(pa.schema([campo.with_type(pa.large_string()) if pa.types.is_string(campo.type) else campo
+                                  for campo in tabla.schema]))
+    salida = pa.BufferOutputStream()
+    with pa.ipc.new_file(salida, tabla.schema) as escritor:
+        escritor.write_table(tabla)
+    contenido = salida.getvalue()
+    sha = hashlib.sha256(contenido).hexdigest()
+    archivo = f"catalogo-{sha[:24]}.arrow"
+
+    ruta = os.path.join(dir_compartido, archivo)
+    if not os.path.isfile(ruta):
+        def escribir_generacion(ruta_tmp):
+            with pa.OSFile(ruta_tmp, 'wb') as sink:
+                sink.write(contenido)
+
+        escribir_atomico(ruta, escribir_generacion)
+
+    return _apuntar(dir_compartido, {'archivo': archivo, 'sha256': sha, 'snapshot': snapshot, 'filas': len(df),
+                                     'origen': origen, 'fuente': snapshot}, conservar)
+
+
+# Función para volver a una versión anterior del catálogo: solo se mueve el puntero a un archivo
+# que ya está en disco (las instancias lo toman en su próximo rerun, sin recargar ni reindexar si lo tenían)
+# Sin `generacion` se vuelve a la versión distinta inmediatamente anterior a la vigente
+# La vuelta atrás queda fija hasta que cambie el archivo fuente: el puntero conserva en 'fuente' el
+# snapshot publicado por última vez, así publicar_si_cambio no vuelve a publicar la versión descartada
+def revertir(dir_compartido=DIR_CATALOGO_COMPARTIDO, generacion=None, conservar=CONSERVAR_GENERACIONES):
+    actual = generacion_actual(dir_compartido)
+    if actual is None:
+        raise ValueError(f"Todavía no se publicó ningún catálogo en '{dir_compartido}'.")
+    historial = historial_generaciones(dir_compartido)
+    if generacion is None:
+        candidatas = [g for g in reversed(historial) if g['archivo'] != actual['archivo']]
+    else:
+        candidatas = [g for g in historial if g['generacion'] == generacion]
+    candidatas = [g for g in candidatas if os.path.isfile(os.path.join(dir_compartido, g['archivo']))]
+    if not candidatas:
+        raise ValueError("No hay ninguna versión anterior conservada a la que volver.")
+    destino = candidatas[0]
+    datos = {clave: destino.get(clave) for clave in ('archivo', 'sha256', 'snapshot', 'filas', 'origen')}
+    return _apuntar(dir_compartido, dict(datos, revertido_a=destino['generacion'], fuente=_fuente(actual)), conservar)
+
+
+# Snapshot del archivo fuente publicado por última vez (los punteros viejos no tienen 'fuente')
+def _fuente(puntero):
+    return puntero.get('fuente', puntero.get('snapshot'))
+
+
+# Función para borrar los archivos de versiones que ya no se conservan (quedan las `conservar`
+# versiones distintas más recientes del historial); en Windows un archivo mapeado por otro proceso
+# no se puede borrar, así que se deja para la próxima publicación
+def borrar_generaciones_viejas(dir_compartido=DIR_CATALOGO_COMPARTIDO, conservar=CONSERVAR_GENERACIONES):
+    historial = historial_generaciones(dir_compartido)
+    conservados = []
+    for generacion in reversed(historial):
+        if generacion['archivo'] not in conservados:
+            conservados.append(generacion['archivo'])
+    conservados = set(conservados[:conservar])
+    # La generación vigente nunca se borra (ej. una publicada antes de que existiera el historial)
+    actual = generacion_actual(dir_compartido)
+    if actual:
+        conservados.add(actual['archivo'])
+    for nombre in os.listdir(dir_compartido):
+        if nombre.endswith('.arrow') and nombre not in conservados:
+            try:
+                os.remove(os.path.join(dir_compartido, nombre))
+            except OSError:
+                pass
+    vigentes = [g for g in historial if g['archivo'] in conservados][-MAX_HISTORIAL:]
+    if len(vigentes) < len(historial):
+        _escribir_json(os.path.join(dir_compartido, HISTORIAL), vigentes)
+
+
+# Tipo de pandas para el texto sobre Arrow con NaN como faltante (igual que el texto de numpy/object):
+# en pandas 3 es el tipo de texto por defecto, en pandas 2.x se llama "pyarrow_numpy"
+def _tipo_texto():
+    try:
+        return pd.StringDtype('pyarrow', na_value=np.nan)
+    except TypeError:
+        return pd.StringDtype('pyarrow_numpy')
+
+
+# Función para mapear una generación en memoria sin copiarla: las columnas numéricas y de texto quedan
+# apuntando al archivo mapeado, que el sistema operativo comparte entre todos los procesos que lo abren
+def abrir_catalogo(dir_compartido, archivo):
+    with pa.memory_map(os.path.join(dir_compartido, archivo), 'r') as mapa:
+        tabla = pa.ipc.open_file(mapa).read_all()
+    texto = _tipo_texto()
+    columnas = {}
+    for nombre, columna in zip(tabla.column_names, tabla.columns):
+        # to_pandas copia los enteros y las fechas; sin nulos se pueden ver directamente como arrays de numpy
+        if (columna.num_chunks == 1 and columna.null_count == 0
+                and (pa.types.is_integer(columna.type) or pa.types.is_timestamp(columna.type))):
+            columnas[nombre] = columna.chunk(0).to_numpy(zero_copy_only=True)
+        elif pa.types.is_string(columna.type) or pa.types.is_large_string(columna.type):
+            # Sin types_mapper el texto pasaría a objetos de Python: una copia privada en cada proceso
+            columnas[nombre] = columna.to_pandas(types_mapper={columna.type: texto}.get)
+        else:
+            columnas[nombre] = columna.to_pandas()
+    return restaurar_diccionarios(pd.DataFrame(columnas, copy=False))
+
+
+# Función para publicar el catálogo de `file_path` si cambió desde la última publicación
+# Devuelve el puntero nuevo, o None si ese snapshot ya se publicó (aunque después se haya vuelto atrás)
+def publicar_si_cambio(file_path, dir_compartido=DIR_CATALOGO_COMPARTIDO, dir_cache=DIR_CACHE_CATALOGO, origen=None,
+                       conservar=CONSERVAR_GENERACIONES):
+    df = cargar_catalogo(file_path, dir_cache)
+    _, snapshot = firma_catalogo(file_path, dir_cache)
+    actual = generacion_actual(dir_compartido)
+    if actual and _fuente(actual) == snapshot:
+        return None
+    return publicar_catalogo(df, dir_compartido, snapshot, origen or os.path.basename(file_path), conservar)
+
+
+def _describir(generacion):
+    texto = f"{generacion['generacion']:>5}  {generacion['fecha']}  {generacion['filas']:>7} filas  {generacion['archivo']}"
+    if generacion.get('revertido_a'):
+        texto += f"  (vuelta a la generación {generacion['revertido_a']})"
+    elif generacion.get('origen'):
+        texto += f"  ({generacion['origen']})"
+    return texto
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publica el catálogo para que varias instancias de la app lo compartan.")
+    parser.add_argument('archivo', nargs='?', help="Archivo fuente del catálogo (Excel o CSV)")
+    parser.add_argument('--dir', default=DIR_CATALOGO_COMPARTIDO, help="Carpeta de las generaciones publicadas")
+    parser.add_argument('--vigilar', action='store_true', help="Seguir revisando el archivo y publicar cada cambio")
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_VIGILANCIA, help="Segundos entre revisiones")
+    parser.add_argument('--conservar', type=int, default=CONSERVAR_GENERACIONES, help="Versiones que se conservan en disco")
+    parser.add_argument('--historial', action='store_true', help="Listar las generaciones publicadas y salir")
+    parser.add_argument('--revertir', nargs='?', type=int, const=0, metavar='GENERACION',
+                        help="Volver a una generación anterior (sin número, a la versión previa a la vigente)")
+    args = parser.parse_args(argv)
+
+    if args.historial:
+        actual = generacion_actual(args.dir) or {}
+        for generacion in historial_generaciones(args.dir):
+            marca = '*' if generacion['generacion'] == actual.get('generacion') else ' '
+            print(f"{marca}{_describir(generacion)}")
+        return 0
+    if args.revertir is not None:
+        try:
+            puntero = revertir(args.dir, args.revertir or None, args.conservar)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Generación {puntero['generacion']} publicada: {puntero['archivo']} ({puntero['filas']} filas)")
+        return 0
+    if not args.archivo:
+        parser.error("Falta el archivo fuente del catálogo.")
+
+    while True:
+        puntero = publicar_si_cambio(args.archivo, args.dir, conservar=args.conservar)
+        if puntero:
+            print(f"Generación {puntero['generacion']} publicada: {puntero['archivo']} ({puntero['filas']} filas)")
+        if not args.vigilar:
+            return 0
+        time.sleep(args.intervalo)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+# Deja importar los módulos de la raíz del repo desde tests/
@@ -0,0 +1,222 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from catalogo import BYTES_POR_PARTE_CSV, leer_csv_por_partes, leer_fuente, normalizar_catalogo
+
+# Columnas (ya normalizadas) que se comparan entre dos exportaciones
+CAMPOS_PRECIO = ['Precio', 'Precio x Mayor']
+CAMPOS_STOCK = ['Stock', 'StockSuc2']
+CAMPOS_PRODUCTO = ['id', 'Codigo', 'Nombre']
+CAMPOS = CAMPOS_PRODUCTO + CAMPOS_PRECIO + CAMPOS_STOCK
+
+# Columnas del reporte de cambios, una fila por cambio
+COLUMNAS_REPORTE = ['tipo', 'id', 'Codigo', 'Nombre', 'campo', 'anterior', 'nuevo', 'diferencia']
+
+
+# Función para leer una exportación (CSV por partes o Excel entero) con solo las columnas comparadas
+def leer_partes(ruta, bytes_por_parte=BYTES_POR_PARTE_CSV):
+    if os.path.splitext(ruta)[1].lower() == '.csv':
+        partes = leer_csv_por_partes(ruta, set(CAMPOS), bytes_por_parte)
+    else:
+        partes = [normalizar_catalogo(leer_fuente(ruta))]
+    for parte in partes:
+        for campo in CAMPOS:
+            if campo not in parte.columns:
+                parte[campo] = np.nan
+        yield parte[CAMPOS]
+
+
+# Función para pasar los Ids a números para el join (los Ids de las exportaciones son enteros)
+def _ids(columna):
+    return pd.to_numeric(columna, errors='coerce').to_numpy(dtype=float)
+
+
+# Lado anterior del join: solo las columnas comparadas de la exportación anterior, leída por partes,
+# con los Ids ordenados una vez para emparejar cada parte de la nueva con búsquedas binarias
+# Las exportaciones repiten algunos Ids (variantes del mismo producto): la k-ésima aparición de un Id
+# en la nueva se empareja con su k-ésima aparición en la anterior, en el orden del archivo
+class LadoAnterior:
+    def __init__(self, partes):
+        anterior = pd.concat(list(partes), ignore_index=True)
+        self.productos = anterior[CAMPOS_PRODUCTO]
+        self.valores = {campo: pd.to_numeric(anterior[campo], errors='coerce').to_numpy(dtype=float)
+                        for campo in CAMPOS_PRECIO + CAMPOS_STOCK}
+        ids = _ids(anterior['id'])
+        self.orden = np.argsort(ids, kind='stable')
+        self.unicos, self.inicio, self.cantidad = np.unique(ids[self.orden], return_index=True, return_counts=True)
+        # Apariciones de cada Id ya emparejadas por las partes anteriores de la nueva
+        self.usados = np.zeros(len(self.unicos), dtype=np.int64)
+        self.vista = np.zeros(len(ids), dtype=bool)
+
+    def __len__(self):
+        return len(self.vista)
+
+    # Función para emparejar una parte de la nueva: posición en la anterior de cada fila, o -1 si es un alta
+    def emparejar(self, ids):
+        ids = _ids(ids)
+        numero = np.minimum(np.searchsorted(self.unicos, ids), max(len(self.unicos) - 1, 0))
+        if len(self.unicos):
+            unicos = self.unicos[numero]
+            existe = (unicos == ids) | (np.isnan(unicos) & np.isnan(ids))
+        else:
+            existe = np.zeros(len(ids), dtype=bool)
+        filas = np.flatnonzero(existe)
+        numero = numero[filas]
+
+        # Número de aparición: las del mismo Id en partes anteriores más las previas dentro de esta parte
+        orden = np.argsort(numero, kind='stable')
+        indices = np.arange(len(orden))
+        comienzos = np.r_[True, numero[orden][1:] != numero[orden][:-1]] if len(orden) else np.zeros(0, dtype=bool)
+        aparicion = np.empty(len(orden), dtype=np.int64)
+        aparicion[orden] = indices - np.maximum.accumulate(np.where(comienzos, indices, 0))
+        aparicion += self.usados[numero]
+        self.usados += np.bincount(numero, minlength=len(self.unicos))
+
+        posiciones = np.full(len(ids), -1, dtype=np.int64)
+        hay = aparicion < self.cantidad[numero]
+        posiciones[filas[hay]] = self.orden[self.inicio[numero[hay]] + aparicion[hay]]
+        self.vista[posiciones[posiciones >= 0]] = True
+        return posiciones
+
+
+# Función para comparar dos columnas numéricas tratando NaN == NaN como "sin cambio"
+def _distintos(anterior, nuevo):
+    anterior = np.asarray(pd.to_numeric(anterior, errors='coerce'), dtype=float)
+    nuevo = np.asarray(pd.to_numeric(nuevo, errors='coerce'), dtype=float)
+    iguales = (anterior == nuevo) | (np.isnan(anterior) & np.isnan(nuevo))
+    return ~iguales, anterior, nuevo
+
+
+def _registros(tipo, productos, campo=None, anterior=None, nuevo=None):
+    registros = pd.DataFrame({
+        'tipo': tipo,
+        'id': productos['id'].to_numpy(),
+        'Codigo': productos['Codigo'].to_numpy(),
+        'Nombre': productos['Nombre'].to_numpy(),
+        'campo': campo,
+        'anterior': anterior,
+        'nuevo': nuevo,
+    })
+    registros['diferencia'] = None if anterior is None else nuevo - anterior
+    return registros[COLUMNAS_REPORTE]
+
+
+# Escribe el reporte a medida que se generan los cambios (CSV, JSON o JSON Lines según la extensión)
+class EscritorReporte:
+    def __init__(self, ruta):
+        self.ruta = ruta
+        extension = os.path.splitext(ruta)[1].lower() if ruta else ''
+        self.formato = {'.json': 'json', '.jsonl': 'jsonl'}.get(extension, 'csv')
+        self.archivo = open(ruta, 'w', encoding='utf-8', newline='') if ruta else None
+        self.primero = True
+
+    def escribir(self, registros):
+        if self.archivo is None or registros.empty:
+            return
+        if self.formato == 'csv':
+            registros.to_csv(self.archivo, index=False, header=self.primero)
+        else:
+            lineas = registros.to_json(orient='records', lines=True, force_ascii=False).strip()
+            if self.formato == 'json':
+                lineas = ('[\n' if self.primero else ',\n') + lineas.replace('\n', ',\n')
+            self.archivo.write(lineas + '\n')
+        self.primero = False
+
+    def cerrar(self):
+        if self.archivo is None:
+            return
+        if self.formato == 'csv' and self.primero:
+            self.archivo.write(','.join(COLUMNAS_REPORTE) + '\n')
+        elif self.formato == 'json':
+            self.archivo.write('[]\n' if self.primero else ']\n')
+        self.archivo.close()
+
+
+# Función para comparar dos exportaciones con un join por Id en una sola pasada sobre la nueva
+# Las dos se leen por partes; de la anterior se guardan solo las columnas comparadas (ids, textos del
+# reporte y valores como arrays) y la nueva se compara parte por parte sin guardarla
+def comparar_exportaciones(ruta_anterior, ruta_nueva, escritor, bytes_por_parte=BYTES_POR_PARTE_CSV):
+    anterior = LadoAnterior(leer_partes(ruta_anterior, bytes_por_parte))
+
+    resumen = {
+        'filas_anterior': len(anterior),
+        'filas_nueva': 0,
+        'altas': 0,
+        'bajas': 0,
+        'cambios_precio': {campo: 0 for campo in CAMPOS_PRECIO},
+        'movimientos_stock': {campo: {'productos': 0, 'unidades': 0.0} for campo in CAMPOS_STOCK},
+    }
+    for parte in leer_partes(ruta_nueva, bytes_por_parte):
+        resumen['filas_nueva'] += len(parte)
+        posiciones = anterior.emparejar(parte['id'])
+        existe = posiciones >= 0
+
+        altas = parte[~existe]
+        resumen['altas'] += len(altas)
+        escritor.escribir(_registros('alta', altas))
+
+        actuales = parte[existe]
+        posiciones = posiciones[existe]
+        for tipo, campos in (('precio', CAMPOS_PRECIO), ('stock', CAMPOS_STOCK)):
+            for campo in campos:
+                cambio, valores_previos, valores_nuevos = _distintos(anterior.valores[campo][posiciones],
+                                                                     actuales[campo])
+                if not cambio.any():
+                    continue
+                registros = _registros(tipo, actuales[cambio], campo, valores_previos[cambio], valores_nuevos[cambio])
+                escritor.escribir(registros)
+                if tipo == 'precio':
+                    resumen['cambios_precio'][campo] += int(cambio.sum())
+                else:
+                    resumen['movimientos_stock'][campo]['productos'] += int(cambio.sum())
+                    resumen['movimientos_stock'][campo]['unidades'] += float(np.nansum(registros['diferencia']))
+
+    bajas = anterior.productos[~anterior.vista]
+    resumen['bajas'] = len(bajas)
+    escritor.escribir(_registros('baja', bajas))
+    return resumen
+
+
+def formatear_resumen(resumen):
+    lineas = [
+        f"Filas: {resumen['filas_anterior']} antes, {resumen['filas_nueva']} ahora",
+        f"Altas: {resumen['altas']}",
+        f"Bajas: {resumen['bajas']}",
+    ]
+    for campo, cantidad in resumen['cambios_precio'].items():
+        lineas.append(f"Cambios de {campo}: {cantidad}")
+    for campo, movimiento in resumen['movimientos_stock'].items():
+        lineas.append(f"Movimientos de {campo}: {movimiento['productos']} productos, {movimiento['unidades']:+,.0f} unidades")
+    return '\n'.join(lineas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reporte de cambios entre dos exportaciones del catálogo (tmp_28_*.csv).")
+    parser.add_argument('anterior', help="Exportación anterior (CSV o Excel)")
+    parser.add_argument('nueva', help="Exportación nueva (CSV o Excel)")
+    parser.add_argument('-o', '--salida', help="Archivo del reporte de cambios: .csv, .json o .jsonl")
+    parser.add_argument('--resumen', help="Archivo JSON donde guardar el resumen")
+    parser.add_argument('--bytes-por-parte', type=int, default=BYTES_POR_PARTE_CSV,
+                        help="Bytes de la exportación nueva que se procesan por vez")
+    args = parser.parse_args(argv)
+
+    escritor = EscritorReporte(args.salida)
+    try:
+        resumen = comparar_exportaciones(args.anterior, args.nueva, escritor, args.bytes_por_parte)
+    finally:
+        escritor.cerrar()
+
+    if args.resumen:
+        with open(args.resumen, 'w', encoding='utf-8') as f:
+            json.dump(resumen, f, ensure_ascii=False, indent=2)
+    print(formatear_resumen(resumen))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import time
+
+# Cantidad de escaneos recientes que se recuerdan por sesión
+MAX_HISTORIAL = 10
+
+# Largo máximo de una lectura que se intenta separar en varios códigos (ráfagas pegadas)
+MAX_LARGO_RAFAGA = 200
+
+
+# Función para llevar una lectura del escáner a la clave del índice: sin espacios en los extremos, sin
+# distinguir mayúsculas (el Bloq Mayús cambia lo que manda el lector) y sin el ".0" de los códigos
+# numéricos que Excel guarda como número
+def clave_escaneo(lectura):
+    clave = str(lectura).strip().lower()
+    if clave.endswith('.0') and clave[:-2].isdigit():
+        clave = clave[:-2]
+    return clave
+
+
+# Índice hash de lecturas del escáner: código de barras o código del producto -> posición en el catálogo
+# Se arma una vez por versión del catálogo a partir de los mapas del índice; ante claves repetidas
+# gana el código de barras sobre el código
+class LectorCodigos:
+    def __init__(self, indice):
+        self.indice = indice
+        self.posiciones = {}
+        for mapa in (indice.por_codigo_barras, indice.por_codigo):
+            for valor, posicion in mapa.items():
+                self.posiciones.setdefault(clave_escaneo(valor), posicion)
+        self.largo_maximo = max((len(clave) for clave in self.posiciones), default=0)
+
+    def __len__(self):
+        return len(self.posiciones)
+
+    # Posición de la fila de una lectura, o None si no corresponde a ningún producto
+    def resolver(self, lectura):
+        return self.posiciones.get(clave_escaneo(lectura))
+
+    # Función para separar una lectura en códigos conocidos: si se escanea otro producto antes de que
+    # termine el rerun, las lecturas llegan pegadas en el mismo campo ("AB1-DECOTM-26494")
+    # Devuelve (claves, sobrante); el sobrante es el texto que no se pudo reconocer
+    def separar(self, lectura):
+        texto = clave_escaneo(lectura)
+        if texto in self.posiciones:
+            return [texto], ''
+        if len(texto) > MAX_LARGO_RAFAGA:
+            return [], texto
+        claves = []
+        inicio = 0
+        while inicio < len(texto):
+            # Se toma el código conocido más largo que empieza en `inicio`
+            for fin in range(min(len(texto), inicio + self.largo_maximo), inicio, -1):
+                clave = texto[inicio:fin].strip()
+                if clave in self.posiciones:
+                    claves.append(clave)
+                    inicio = fin
+                    break
+            else:
+                return claves, texto[inicio:].strip()
+        return claves, ''
+
+
+# Historial de escaneos de una sesión: lecturas más recientes primero, sin repetidas
+# Se guardan las claves y no las posiciones, así sigue valiendo después de actualizar el catálogo
+class HistorialEscaneos:
+    def __init__(self, maximo=MAX_HISTORIAL):
+        self.maximo = maximo
+        self.claves = []
+        self.actual = None
+        self.no_encontrado = ''
+        self.duracion_ms = 0.0
+
+    def agregar(self, clave):
+        if clave in self.claves:
+            self.claves.remove(clave)
+        self.claves.insert(0, clave)
+        del self.claves[self.maximo:]
+        self.actual = clave
+
+    # Función para registrar una lectura del escáner (puede traer varias pegadas)
+    # Devuelve cuántos productos se reconocieron
+    def registrar(self, lector, lectura):
+        inicio = time.perf_counter()
+        claves, sobrante = lector.separar(lectura)
+        self.duracion_ms = (time.perf_counter() - inicio) * 1000
+        for clave in claves:
+            self.agregar(clave)
+        self.no_encontrado = sobrante
+        return len(claves)
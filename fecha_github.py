@@ -0,0 +1,69 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytz
+import requests
+
+# Definir la zona horaria de Argentina
+tz_argentina = pytz.timezone('America/Argentina/Buenos_Aires')
+
+API_GITHUB = "https://api.github.com"
+
+# Segundos que se reutiliza la fecha antes de volver a preguntarle a GitHub
+TTL_SEGUNDOS = 600
+TIMEOUT = (3.05, 5)
+
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+
+
+# Función para obtener la fecha de modificación del archivo local como alternativa
+def fecha_modificacion_local(ruta):
+    try:
+        fecha_utc = datetime.fromtimestamp(os.path.getmtime(ruta), tz=timezone.utc)
+    except OSError:
+        return None
+    return fecha_utc.astimezone(tz_argentina).strftime(FORMATO_FECHA)
+
+
+# Fecha del último commit de un archivo en GitHub, con cache por TTL y pedidos condicionales (ETag)
+class FechaModificacionGithub:
+    def __init__(self, usuario, repo, archivo, ruta_local=None, ttl=TTL_SEGUNDOS, api=API_GITHUB, sesion=None):
+        self.url = f"{api}/repos/{usuario}/{repo}/commits"
+        self.params = {'path': archivo, 'per_page': 1}
+        self.ruta_local = ruta_local or archivo
+        self.ttl = ttl
+        self.sesion = sesion or requests.Session()
+        self._lock = threading.Lock()
+        self._etag = None
+        self._fecha = None
+        self._consultado = None
+
+    def _consultar(self):
+        encabezados = {'Accept': 'application/vnd.github+json'}
+        if self._etag and self._fecha:
+            encabezados['If-None-Match'] = self._etag
+        response = self.sesion.get(self.url, params=self.params, headers=encabezados, timeout=TIMEOUT)
+        # 304: no cambió nada y GitHub no lo descuenta del límite de pedidos
+        if response.status_code == 304:
+            return self._fecha
+        response.raise_for_status()
+        commit_data = response.json()[0]
+        fecha_utc = datetime.strptime(commit_data['commit']['committer']['date'], "%Y-%m-%dT%H:%M:%SZ")
+        fecha_utc = fecha_utc.replace(tzinfo=timezone.utc)
+        self._etag = response.headers.get('ETag')
+        return fecha_utc.astimezone(tz_argentina).strftime(FORMATO_FECHA)
+
+    # Devuelve la fecha como texto; si GitHub no responde usa el mtime del archivo local
+    def obtener(self):
+        with self._lock:
+            ahora = time.monotonic()
+            if self._consultado is not None and ahora - self._consultado < self.ttl:
+                return self._fecha
+            try:
+                self._fecha = self._consultar()
+            except Exception:
+                self._fecha = self._fecha or fecha_modificacion_local(self.ruta_local)
+            self._consultado = ahora
+            return self._fecha
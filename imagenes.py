@@ -0,0 +1,197 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+
+from archivos import escribir_atomico
+
+# Carpeta y tamaño máximo del cache de imágenes en disco
+DIR_CACHE_IMAGENES = '.cache_imagenes'
+MAX_BYTES_CACHE = 200 * 1024 * 1024
+
+# Anchos pre-generados: lista de productos y vista de detalle (el detalle se muestra entre 100 y 600px)
+TAMANO_LISTA = 100
+TAMANO_DETALLE = 600
+TAMANOS = (TAMANO_LISTA, TAMANO_DETALLE)
+
+# Timeout de conexión y de lectura para las descargas
+TIMEOUT = (3.05, 10)
+
+# Descargas simultáneas como máximo (menor que el pool de conexiones de la sesión)
+MAX_DESCARGAS_SIMULTANEAS = 8
+
+
+# Función para crear una sesión HTTP con pool de conexiones reutilizables
+def crear_sesion(conexiones=16):
+    sesion = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=conexiones, pool_maxsize=conexiones, max_retries=1)
+    sesion.mount('http://', adaptador)
+    sesion.mount('https://', adaptador)
+    return sesion
+
+
+def _sha(texto):
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+# Función para reducir una imagen al ancho pedido (sin agrandarla) y devolver los bytes codificados
+def generar_miniatura(imagen, ancho):
+    if imagen.width > ancho:
+        alto = max(1, round(imagen.height * ancho / imagen.width))
+        imagen = imagen.resize((ancho, alto), Image.LANCZOS)
+    salida = BytesIO()
+    if imagen.mode in ('RGBA', 'LA', 'P'):
+        imagen.save(salida, format='PNG', optimize=True)
+    else:
+        imagen.convert('RGB').save(salida, format='JPEG', quality=85)
+    return salida.getvalue()
+
+
+# Cache de imágenes en disco: direccionado por contenido, con miniaturas y límite de tamaño LRU
+class CacheImagenes:
+    def __init__(self, directorio=DIR_CACHE_IMAGENES, max_bytes=MAX_BYTES_CACHE, sesion=None, tamanos=TAMANOS,
+                 max_descargas=MAX_DESCARGAS_SIMULTANEAS):
+        self.directorio = directorio
+        self.dir_urls = os.path.join(directorio, 'urls')
+        self.max_bytes = max_bytes
+        self.sesion = sesion or crear_sesion()
+        self.tamanos = tuple(sorted(tamanos))
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_descargas, thread_name_prefix='imagenes')
+        # Descargas en curso por (url, ancho), para no bajar dos veces la misma imagen
+        self._en_curso = {}
+        os.makedirs(self.dir_urls, exist_ok=True)
+        self._total_bytes = sum(tamano for _, tamano, _ in self._miniaturas())
+
+    # Lista de (ruta, bytes, último uso) de todas las miniaturas guardadas
+    def _miniaturas(self):
+        for entrada in os.scandir(self.directorio):
+            if entrada.is_file() and '.tmp' not in entrada.name:
+                estado = entrada.stat()
+                yield entrada.path, estado.st_size, estado.st_mtime
+
+    def _ruta_miniatura(self, contenido, ancho):
+        for extension in ('jpg', 'png'):
+            ruta = os.path.join(self.directorio, f"{contenido}_{ancho}.{extension}")
+            if os.path.isfile(ruta):
+                return ruta
+        return None
+
+    def _contenido_de_url(self, url):
+        try:
+            with open(os.path.join(self.dir_urls, _sha(url)), 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    # Función para descargar una imagen, generar sus miniaturas y registrar la URL
+    def _descargar(self, url):
+        respuesta = self.sesion.get(url, timeout=TIMEOUT)
+        respuesta.raise_for_status()
+        datos = respuesta.content
+        contenido = hashlib.sha256(datos).hexdigest()
+
+        # La misma imagen puede estar en varias URLs: solo se generan las miniaturas que faltan
+        # (el LRU puede haber borrado un ancho y dejado el otro)
+        faltantes = [ancho for ancho in self.tamanos if self._ruta_miniatura(contenido, ancho) is None]
+        if faltantes:
+            imagen = Image.open(BytesIO(datos))
+            imagen.load()
+            nuevos_bytes = 0
+            for ancho in faltantes:
+                miniatura = generar_miniatura(imagen, ancho)
+                extension = 'png' if miniatura.startswith(b'\x89PNG') else 'jpg'
+                escribir_atomico(os.path.join(self.directorio, f"{contenido}_{ancho}.{extension}"), miniatura)
+                nuevos_bytes += len(miniatura)
+            with self._lock:
+                self._total_bytes += nuevos_bytes
+
+        escribir_atomico(os.path.join(self.dir_urls, _sha(url)), contenido.encode('ascii'))
+        return contenido
+
+    # Función para olvidar qué contenido corresponde a cada URL (ej. productos borrados o con imagen nueva)
+    # Las miniaturas no se borran: pueden estar compartidas con otras URLs y el LRU las recorta solas
+    def olvidar(self, urls):
+        for url in urls:
+            if isinstance(url, str) and url:
+                try:
+                    os.remove(os.path.join(self.dir_urls, _sha(url)))
+                except OSError:
+                    pass
+
+    # Función para borrar las miniaturas usadas hace más tiempo hasta quedar bajo el límite
+    def _recortar(self):
+        with self._lock:
+            if self._total_bytes <= self.max_bytes:
+                return
+            archivos = sorted(self._miniaturas(), key=lambda archivo: archivo[2])
+            total = sum(tamano for _, tamano, _ in archivos)
+            objetivo = self.max_bytes * 0.9
+            for ruta, tamano, _ in archivos:
+                if total <= objetivo:
+                    break
+                try:
+                    os.remove(ruta)
+                    total -= tamano
+                except OSError:
+                    pass
+            self._total_bytes = total
+
+    # Devuelve la ruta local de la miniatura de `url` al ancho pedido, o None si no se pudo obtener
+    def obtener(self, url, ancho=TAMANO_LISTA):
+        if not url:
+            return None
+        ancho = next((t for t in self.tamanos if t >= ancho), self.tamanos[-1])
+        contenido = self._contenido_de_url(url)
+        ruta = self._ruta_miniatura(contenido, ancho) if contenido else None
+        if ruta is None:
+            try:
+                contenido = self._descargar(url)
+            except Exception:
+                return None
+            ruta = self._ruta_miniatura(contenido, ancho)
+            self._recortar()
+            # Si el recorte se llevó justo esta miniatura, no hay nada para mostrar
+            if ruta is None or not os.path.isfile(ruta):
+                return None
+        else:
+            # Marcar como usada recientemente para el LRU
+            try:
+                os.utime(ruta)
+            except OSError:
+                pass
+        return ruta
+
+    # Función para encolar la obtención de una imagen en el pool, reutilizando la que ya esté en curso
+    def _encolar(self, url, ancho):
+        clave = (url, ancho)
+        with self._lock:
+            futuro = self._en_curso.get(clave)
+            nuevo = futuro is None
+            if nuevo:
+                futuro = self._pool.submit(self.obtener, url, ancho)
+                self._en_curso[clave] = futuro
+        # El callback se registra fuera del lock: si la descarga ya terminó corre en este mismo hilo
+        if nuevo:
+            futuro.add_done_callback(lambda _: self._terminar(clave))
+        return futuro
+
+    def _terminar(self, clave):
+        with self._lock:
+            self._en_curso.pop(clave, None)
+
+    # Obtiene varias imágenes en paralelo y devuelve un dict url -> ruta local (o None)
+    def obtener_varias(self, urls, ancho=TAMANO_LISTA):
+        futuros = {url: self._encolar(url, ancho) for url in urls if isinstance(url, str) and url}
+        return {url: futuro.result() for url, futuro in futuros.items()}
+
+    # Deja descargando en segundo plano imágenes que probablemente se pidan después (ej. la página siguiente)
+    def precargar(self, urls, ancho=TAMANO_LISTA):
+        for url in urls:
+            if isinstance(url, str) and url:
+                self._encolar(url, ancho)
@@ -0,0 +1,187 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+from archivos import escribir_atomico
+
+# Carpeta donde se guardan las mediciones de cada rerun
+DIR_PERFIL = '.perfil'
+
+# Una línea JSON por rerun; al pasar el tamaño máximo se rota a reruns.jsonl.1 (se guarda una sola rotación)
+ARCHIVO_RERUNS = 'reruns.jsonl'
+MAX_BYTES_RERUNS = 5 * 1024 * 1024
+
+# Resumen por etapa en formato de texto de Prometheus (para el textfile collector de node_exporter)
+ARCHIVO_METRICAS = 'metricas.prom'
+
+# Segundos mínimos entre escrituras del archivo de métricas
+INTERVALO_METRICAS = 10
+
+# Reruns recientes que se guardan en memoria para el panel y los percentiles
+RERUNS_EN_MEMORIA = 500
+
+# Percentiles que se muestran en el panel y se exportan a Prometheus
+CUANTILES = (0.5, 0.9, 0.99)
+
+
+# Mediciones de una ejecución del script (o de un fragmento): tiempo y memoria por etapa
+class MedicionRerun:
+    def __init__(self, tipo='pagina'):
+        self.tipo = tipo
+        self.fecha = time.time()
+        self.inicio = time.perf_counter()
+        self.etapas = {}
+        self.memoria = {}
+        self.total = None
+
+    # Mide el bloque como parte de la etapa `nombre`; si una etapa se repite en el rerun se suman los tiempos
+    # Con tracemalloc activo también se anota el pico de memoria asignada durante la etapa (es global
+    # al proceso: con varias sesiones a la vez es aproximado)
+    @contextmanager
+    def etapa(self, nombre):
+        memoria = tracemalloc.is_tracing()
+        if memoria:
+            antes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas[nombre] = self.etapas.get(nombre, 0.0) + time.perf_counter() - inicio
+            if memoria and tracemalloc.is_tracing():
+                pico = tracemalloc.get_traced_memory()[1] - antes
+                self.memoria[nombre] = max(self.memoria.get(nombre, 0), pico)
+
+    def terminar(self):
+        if self.total is None:
+            self.total = time.perf_counter() - self.inicio
+        return self
+
+    def como_dict(self):
+        registro = {
+            'fecha': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.fecha)),
+            'tipo': self.tipo,
+            'total_ms': round(self.total * 1000, 3),
+            'etapas_ms': {nombre: round(segundos * 1000, 3) for nombre, segundos in self.etapas.items()},
+        }
+        if self.memoria:
+            registro['pico_kb'] = {nombre: round(pico / 1024, 1) for nombre, pico in self.memoria.items()}
+        return registro
+
+
+# Registro de rendimiento compartido por todas las sesiones del proceso
+# Guarda los últimos reruns en memoria y los escribe a un JSONL rotativo y a un archivo de métricas
+class RegistroRendimiento:
+    def __init__(self, directorio=DIR_PERFIL, max_bytes=MAX_BYTES_RERUNS, intervalo_metricas=INTERVALO_METRICAS):
+        self.directorio = directorio
+        self.ruta_reruns = os.path.join(directorio, ARCHIVO_RERUNS)
+        self.ruta_metricas = os.path.join(directorio, ARCHIVO_METRICAS)
+        self.max_bytes = max_bytes
+        self.intervalo_metricas = intervalo_metricas
+        self.recientes = deque(maxlen=RERUNS_EN_MEMORIA)
+        # Totales desde que arrancó el proceso, por (tipo, etapa): [cantidad, segundos]
+        self.totales = {}
+        self.reruns = {}
+        self._lock = threading.Lock()
+        self._ultima_escritura = 0.0
+        os.makedirs(directorio, exist_ok=True)
+
+    def nueva_medicion(self, tipo='pagina'):
+        return MedicionRerun(tipo)
+
+    # Mide un bloque (ej. un fragmento que se vuelve a ejecutar solo) como un rerun aparte de tipo `tipo`
+    # La medición se apila en `mediciones` mientras dura, así las etapas de adentro se anotan en ella
+    @contextmanager
+    def medir(self, mediciones, tipo):
+        medicion = self.nueva_medicion(tipo)
+        mediciones.append(medicion)
+        try:
+            yield medicion
+        finally:
+            mediciones.remove(medicion)
+            self.registrar(medicion)
+
+    # Función para activar o desactivar la medición de memoria por etapa (tracemalloc hace más lento cada rerun)
+    def medir_memoria(self, activar):
+        if activar and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not activar and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def midiendo_memoria(self):
+        return tracemalloc.is_tracing()
+
+    def registrar(self, medicion):
+        registro = medicion.terminar().como_dict()
+        with self._lock:
+            self.recientes.append(registro)
+            self.reruns[medicion.tipo] = self.reruns.get(medicion.tipo, 0) + 1
+            for nombre, segundos in list(medicion.etapas.items()) + [('total', medicion.total)]:
+                total = self.totales.setdefault((medicion.tipo, nombre), [0, 0.0])
+                total[0] += 1
+                total[1] += segundos
+            self._escribir_rerun(registro)
+            if time.monotonic() - self._ultima_escritura >= self.intervalo_metricas:
+                self._ultima_escritura = time.monotonic()
+                texto = self._texto_prometheus()
+                escribir_atomico(self.ruta_metricas, texto.encode('utf-8'))
+
+    def _escribir_rerun(self, registro):
+        try:
+            if os.path.getsize(self.ruta_reruns) >= self.max_bytes:
+                os.replace(self.ruta_reruns, self.ruta_reruns + '.1')
+        except OSError:
+            pass
+        with open(self.ruta_reruns, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+    # Función para resumir los reruns recientes: una fila por (tipo, etapa) con percentiles en ms
+    def resumen(self):
+        with self._lock:
+            recientes = list(self.recientes)
+        tiempos = {}
+        memoria = {}
+        for registro in recientes:
+            for nombre, ms in list(registro['etapas_ms'].items()) + [('total', registro['total_ms'])]:
+                tiempos.setdefault((registro['tipo'], nombre), []).append(ms)
+            for nombre, kb in registro.get('pico_kb', {}).items():
+                memoria.setdefault((registro['tipo'], nombre), []).append(kb)
+        filas = []
+        for (tipo, nombre), valores in sorted(tiempos.items()):
+            valores = np.array(valores)
+            fila = {'tipo': tipo, 'etapa': nombre, 'reruns': len(valores)}
+            for cuantil in CUANTILES:
+                fila[f'p{round(cuantil * 100)}_ms'] = round(float(np.quantile(valores, cuantil)), 2)
+            fila['max_ms'] = round(float(valores.max()), 2)
+            picos = memoria.get((tipo, nombre))
+            fila['pico_kb_max'] = round(max(picos), 1) if picos else None
+            filas.append(fila)
+        return filas
+
+    def _texto_prometheus(self):
+        lineas = [
+            '# HELP soop_etapa_segundos Tiempo de cada etapa por rerun de la app',
+            '# TYPE soop_etapa_segundos summary',
+        ]
+        cuantiles = {}
+        for registro in self.recientes:
+            for nombre, ms in list(registro['etapas_ms'].items()) + [('total', registro['total_ms'])]:
+                cuantiles.setdefault((registro['tipo'], nombre), []).append(ms / 1000)
+        for (tipo, nombre), (cantidad, segundos) in sorted(self.totales.items()):
+            etiquetas = f'tipo="{tipo}",etapa="{nombre}"'
+            valores = cuantiles.get((tipo, nombre))
+            if valores:
+                for cuantil in CUANTILES:
+                    lineas.append(f'soop_etapa_segundos{{{etiquetas},quantile="{cuantil}"}} {np.quantile(valores, cuantil):.6f}')
+            lineas.append(f'soop_etapa_segundos_sum{{{etiquetas}}} {segundos:.6f}')
+            lineas.append(f'soop_etapa_segundos_count{{{etiquetas}}} {cantidad}')
+        lineas += ['# HELP soop_reruns_total Reruns registrados desde que arrancó el proceso',
+                   '# TYPE soop_reruns_total counter']
+        lineas += [f'soop_reruns_total{{tipo="{tipo}"}} {cantidad}' for tipo, cantidad in sorted(self.reruns.items())]
+        return '\n'.join(lineas) + '\n'
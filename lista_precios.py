@@ -0,0 +1,337 @@
+import argparse
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.drawing.image import Image as ImagenExcel
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from PIL import Image
+
+from catalogo import IndiceCatalogo, cargar_catalogo, pesos
+from imagenes import TAMANO_LISTA, CacheImagenes
+
+# Columnas de la lista de precios, en el orden en que se escriben
+COLUMNAS_LISTA = ['Codigo', 'Nombre', 'Marca', 'Venta Forzada', 'Precio']
+
+# Productos que se preparan por vez: se buscan sus imágenes en paralelo y se escriben antes de pasar a los siguientes
+FILAS_POR_PARTE = 200
+
+# Lado (en puntos) de la miniatura de cada producto en la lista; se embebe la miniatura chica del cache
+# de imágenes (TAMANO_LISTA píxeles), así no se ve borrosa al imprimir
+LADO_MINIATURA = 40
+
+# Hilos para preparar las miniaturas de cada parte (Pillow suelta el GIL al decodificar y codificar)
+HILOS_MINIATURAS = 4
+
+# Página A4 en puntos y márgenes de la lista en PDF
+ANCHO_PAGINA, ALTO_PAGINA = 595, 842
+MARGEN = 36
+ALTO_FILA = 44
+ALTO_FILA_SIN_IMAGENES = 20
+ALTO_ENCABEZADO = 60
+
+# Anchos de los caracteres de Helvetica (milésimas del tamaño de letra) para alinear los precios a la derecha
+_ANCHOS_HELVETICA = {**{c: 556 for c in '0123456789$'}, '.': 278, ',': 278, ' ': 278, '-': 333, 'x': 500}
+
+
+# Función para elegir las filas de la lista: productos vigentes de las categorías y marcas pedidas, por código
+def posiciones_lista(indice, categorias=(), marcas=()):
+    orden = indice.posiciones_por_codigo
+    incluir = indice.vivas.copy()
+    if categorias:
+        en_categorias = np.zeros(len(indice.df), dtype=bool)
+        for categoria in categorias:
+            en_categorias[indice.posiciones_categoria(categoria)] = True
+        incluir &= en_categorias
+    if marcas and 'Marca' in indice.df.columns:
+        incluir &= indice.df['Marca'].isin(list(marcas)).to_numpy()
+    return orden[incluir[orden]]
+
+
+# Función para recorrer la lista por partes, con los precios ya en pesos
+# Cada parte trae además la URL de la imagen de cada producto (columna 'imagen')
+def partes_lista(indice, posiciones, mayorista=False, filas_por_parte=FILAS_POR_PARTE):
+    df = indice.df
+    columna_precio = 'Precio x Mayor' if mayorista else 'Precio'
+    for inicio in range(0, len(posiciones), filas_por_parte):
+        productos = df.iloc[posiciones[inicio:inicio + filas_por_parte]]
+        multiplo = (productos['forzar venta x cantidad'].to_numpy() if 'forzar venta x cantidad' in productos.columns
+                    else np.zeros(len(productos), dtype=np.int32))
+        yield pd.DataFrame({
+            'Codigo': productos['Codigo'].to_numpy(dtype=object),
+            'Nombre': productos['Nombre'].to_numpy(dtype=object),
+            'Marca': productos['Marca'].astype(object).to_numpy() if 'Marca' in productos.columns else None,
+            'Venta Forzada': np.where(multiplo > 1, multiplo, 0),
+            'Precio': pesos(productos[columna_precio].to_numpy()),
+            'imagen': productos['imagen'].to_numpy(dtype=object) if 'imagen' in productos.columns else None,
+        })
+
+
+# Función para obtener las miniaturas JPEG de una parte: las imágenes se buscan en paralelo en el cache
+# y cada archivo distinto se prepara una sola vez (url -> (bytes, ancho, alto))
+def _imagenes_parte(parte, cache_imagenes, hilos):
+    if cache_imagenes is None:
+        return {}
+    rutas = cache_imagenes.obtener_varias(parte['imagen'].tolist(), TAMANO_LISTA)
+    distintas = list({ruta for ruta in rutas.values() if ruta})
+    miniaturas = dict(zip(distintas, hilos.map(miniatura_jpeg, distintas)))
+    return {url: miniaturas[ruta] for url, ruta in rutas.items() if ruta and miniaturas[ruta]}
+
+
+# Función para leer una miniatura y devolverla como JPEG de `lado` píxeles de lado como máximo
+# Las miniaturas JPEG del cache ya tienen ese tamaño y se usan tal cual, sin volver a codificarlas
+# Devuelve (bytes, ancho, alto), o None si no se pudo leer
+def miniatura_jpeg(ruta, lado=TAMANO_LISTA):
+    try:
+        with Image.open(ruta) as imagen:
+            if imagen.format == 'JPEG' and imagen.mode == 'RGB' and max(imagen.size) <= lado:
+                with open(ruta, 'rb') as f:
+                    return f.read(), imagen.width, imagen.height
+            imagen.draft('RGB', (lado, lado))
+            imagen.thumbnail((lado, lado))
+            if imagen.mode in ('RGBA', 'LA', 'P'):
+                fondo = Image.new('RGB', imagen.size, 'white')
+                imagen = imagen.convert('RGBA')
+                fondo.paste(imagen, mask=imagen.getchannel('A'))
+                imagen = fondo
+            salida = BytesIO()
+            imagen.convert('RGB').save(salida, format='JPEG', quality=80)
+            return salida.getvalue(), imagen.width, imagen.height
+    except OSError:
+        return None
+
+
+# Función para llevar el tamaño de una miniatura a la caja de LADO_MINIATURA puntos, sin deformarla
+def _tamano_miniatura(ancho, alto):
+    escala = LADO_MINIATURA / max(ancho, alto)
+    return ancho * escala, alto * escala
+
+
+def _filas(parte):
+    return zip(*(parte[columna] for columna in COLUMNAS_LISTA + ['imagen']))
+
+
+def _texto(valor):
+    return '' if valor is None or valor != valor else str(valor)
+
+
+def _celda_negrita(hoja, valor, tamano=11):
+    celda = WriteOnlyCell(hoja, value=valor)
+    celda.font = Font(bold=True, size=tamano)
+    return celda
+
+
+# Función para escribir la lista en un libro de Excel en modo de solo escritura: cada fila se pasa
+# directo a disco y no queda el libro entero en memoria (las miniaturas sí se guardan hasta cerrar,
+# porque el formato las pone al final del archivo)
+def exportar_xlsx(destino, partes, titulo, cache_imagenes=None):
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Lista de precios')
+    columnas = (['Imagen'] if cache_imagenes is not None else []) + COLUMNAS_LISTA
+    for letra, ancho in zip('ABCDEF', ([8] if cache_imagenes is not None else []) + [18, 60, 20, 14, 14]):
+        hoja.column_dimensions[letra].width = ancho
+    if cache_imagenes is not None:
+        hoja.sheet_format.defaultRowHeight = LADO_MINIATURA + 4
+        hoja.sheet_format.customHeight = True
+    hoja.append([_celda_negrita(hoja, titulo, 14)])
+    hoja.append([_celda_negrita(hoja, columna) for columna in columnas])
+
+    fila = 2
+    total = 0
+    with ThreadPoolExecutor(max_workers=HILOS_MINIATURAS) as hilos:
+        for parte in partes:
+            imagenes = _imagenes_parte(parte, cache_imagenes, hilos)
+            for codigo, nombre, marca, forzada, precio, url in _filas(parte):
+                fila += 1
+                valores = [codigo, nombre, _texto(marca), int(forzada) or None, float(precio)]
+                if cache_imagenes is not None:
+                    valores.insert(0, None)
+                    miniatura = imagenes.get(url)
+                    if miniatura:
+                        imagen = ImagenExcel(BytesIO(miniatura[0]))
+                        # Excel mide las imágenes en píxeles de 96 ppp y las filas en puntos
+                        imagen.width, imagen.height = (round(lado * 4 / 3) for lado in _tamano_miniatura(*miniatura[1:]))
+                        imagen.anchor = f'A{fila}'
+                        hoja.add_image(imagen)
+                hoja.append(valores)
+            total += len(parte)
+    libro.save(destino)
+    return total
+
+
+# Escritor de PDF mínimo que escribe página por página: cada página se pasa a disco apenas se completa,
+# así la memoria no depende de la cantidad de productos. Solo usa Helvetica y miniaturas JPEG
+class EscritorPDF:
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.posiciones = {}
+        self.paginas = []
+        self.siguiente = 5
+        self.archivo.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        # 1: catálogo, 2: árbol de páginas (se escribe al final), 3 y 4: fuentes
+        self._objeto(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        for numero, fuente in ((3, b'Helvetica'), (4, b'Helvetica-Bold')):
+            self._objeto(numero, b'<< /Type /Font /Subtype /Type1 /BaseFont /' + fuente + b' /Encoding /WinAnsiEncoding >>')
+
+    def _reservar(self):
+        numero = self.siguiente
+        self.siguiente += 1
+        return numero
+
+    def _objeto(self, numero, contenido, flujo=None):
+        self.posiciones[numero] = self.archivo.tell()
+        self.archivo.write(f'{numero} 0 obj\n'.encode('ascii') + contenido)
+        if flujo is not None:
+            self.archivo.write(b'\nstream\n' + flujo + b'\nendstream')
+        self.archivo.write(b'\nendobj\n')
+
+    # Función para agregar una página: `operaciones` es el contenido ya armado y `imagenes` una lista
+    # de bytes JPEG con su tamaño, a las que el contenido se refiere como /Im0, /Im1, ...
+    def agregar_pagina(self, operaciones, imagenes=()):
+        recursos = []
+        for i, (jpeg, ancho, alto) in enumerate(imagenes):
+            numero = self._reservar()
+            self._objeto(numero, (f'<< /Type /XObject /Subtype /Image /Width {ancho} /Height {alto} '
+                                  f'/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /DCTDecode '
+                                  f'/Length {len(jpeg)} >>').encode('ascii'), jpeg)
+            recursos.append(f'/Im{i} {numero} 0 R')
+        flujo = zlib.compress(operaciones.encode('cp1252', errors='replace'))
+        contenido = self._reservar()
+        self._objeto(contenido, f'<< /Length {len(flujo)} /Filter /FlateDecode >>'.encode('ascii'), flujo)
+        pagina = self._reservar()
+        self._objeto(pagina, (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {ANCHO_PAGINA} {ALTO_PAGINA}] '
+                              f'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> /XObject << {" ".join(recursos)} >> >> '
+                              f'/Contents {contenido} 0 R >>').encode('ascii'))
+        self.paginas.append(pagina)
+
+    def cerrar(self):
+        hijos = ' '.join(f'{pagina} 0 R' for pagina in self.paginas)
+        self._objeto(2, f'<< /Type /Pages /Kids [{hijos}] /Count {len(self.paginas)} >>'.encode('ascii'))
+        inicio_xref = self.archivo.tell()
+        cantidad = self.siguiente
+        lineas = [f'xref\n0 {cantidad}\n', '0000000000 65535 f \n']
+        lineas += [f'{self.posiciones[numero]:010d} 00000 n \n' for numero in range(1, cantidad)]
+        lineas.append(f'trailer\n<< /Size {cantidad} /Root 1 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n')
+        self.archivo.write(''.join(lineas).encode('ascii'))
+
+
+def _escapar_pdf(texto):
+    return texto.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _recortar(texto, caracteres):
+    return texto if len(texto) <= caracteres else texto[:caracteres - 1] + '…'
+
+
+def _ancho_texto(texto, tamano):
+    return sum(_ANCHOS_HELVETICA.get(c, 556) for c in texto) * tamano / 1000
+
+
+def _texto_pdf(x, y, texto, tamano=9, fuente='F1'):
+    return f'BT /{fuente} {tamano} Tf {x:.1f} {y:.1f} Td ({_escapar_pdf(texto)}) Tj ET\n'
+
+
+# Función para escribir la lista en PDF, una página A4 por vez
+def exportar_pdf(destino, partes, titulo, cache_imagenes=None):
+    x_imagen = MARGEN
+    x_codigo = MARGEN + (LADO_MINIATURA + 8 if cache_imagenes is not None else 0)
+    x_nombre = x_codigo + 90
+    x_marca = ANCHO_PAGINA - MARGEN - 190
+    x_forzada = ANCHO_PAGINA - MARGEN - 105
+    x_precio = ANCHO_PAGINA - MARGEN
+    caracteres_nombre = int((x_marca - x_nombre - 6) / 4.6)
+    alto_fila = ALTO_FILA if cache_imagenes is not None else ALTO_FILA_SIN_IMAGENES
+    filas_por_pagina = int((ALTO_PAGINA - 2 * MARGEN - ALTO_ENCABEZADO) // alto_fila)
+    fecha = time.strftime('%d/%m/%Y')
+
+    def encabezado(numero_pagina):
+        y = ALTO_PAGINA - MARGEN - 14
+        operaciones = _texto_pdf(MARGEN, y, titulo, 14, 'F2')
+        operaciones += _texto_pdf(ANCHO_PAGINA - MARGEN - 110, y, f'{fecha}  -  Pág. {numero_pagina}', 9)
+        y -= 30
+        for x, texto in ((x_codigo, 'Código'), (x_nombre, 'Producto'), (x_marca, 'Marca'), (x_forzada, 'Venta x')):
+            operaciones += _texto_pdf(x, y, texto, 9, 'F2')
+        operaciones += _texto_pdf(x_precio - _ancho_texto('Precio', 9), y, 'Precio', 9, 'F2')
+        operaciones += f'0.6 G {MARGEN} {y - 6} m {ANCHO_PAGINA - MARGEN} {y - 6} l S\n'
+        return operaciones, y - 6
+
+    total = 0
+    with open(destino, 'wb') as archivo, ThreadPoolExecutor(max_workers=HILOS_MINIATURAS) as hilos:
+        escritor = EscritorPDF(archivo)
+        operaciones, y = encabezado(1)
+        # Miniaturas de la página actual; una imagen repetida en la página se embebe una sola vez
+        imagenes_pagina = {}
+        en_pagina = 0
+        for parte in partes:
+            imagenes = _imagenes_parte(parte, cache_imagenes, hilos)
+            for codigo, nombre, marca, forzada, precio, url in _filas(parte):
+                if en_pagina == filas_por_pagina:
+                    escritor.agregar_pagina(operaciones, list(imagenes_pagina))
+                    operaciones, y = encabezado(len(escritor.paginas) + 1)
+                    imagenes_pagina, en_pagina = {}, 0
+                y -= alto_fila
+                base = y + (alto_fila - 9) / 2
+                miniatura = imagenes.get(url)
+                if miniatura:
+                    numero = imagenes_pagina.setdefault(miniatura, len(imagenes_pagina))
+                    ancho, alto = _tamano_miniatura(*miniatura[1:])
+                    operaciones += (f'q {ancho:.1f} 0 0 {alto:.1f} {x_imagen + (LADO_MINIATURA - ancho) / 2:.1f} '
+                                    f'{y + (alto_fila - alto) / 2:.1f} cm /Im{numero} Do Q\n')
+                precio = f'${precio:,.2f}'
+                operaciones += _texto_pdf(x_codigo, base, _recortar(_texto(codigo), 16))
+                operaciones += _texto_pdf(x_nombre, base, _recortar(_texto(nombre), caracteres_nombre))
+                operaciones += _texto_pdf(x_marca, base, _recortar(_texto(marca), 16))
+                if forzada:
+                    operaciones += _texto_pdf(x_forzada, base, f'x {int(forzada)}')
+                operaciones += _texto_pdf(x_precio - _ancho_texto(precio, 10), base, precio, 10, 'F2')
+                operaciones += f'0.85 G {MARGEN} {y} m {ANCHO_PAGINA - MARGEN} {y} l S\n'
+                en_pagina += 1
+            total += len(parte)
+        escritor.agregar_pagina(operaciones, list(imagenes_pagina))
+        escritor.cerrar()
+    return total
+
+
+EXPORTADORES = {'xlsx': exportar_xlsx, 'pdf': exportar_pdf}
+
+
+# Función para generar una lista de precios filtrada del catálogo cargado en `indice`
+# Devuelve la cantidad de productos escritos
+def exportar_lista(indice, destino, formato='xlsx', categorias=(), marcas=(), mayorista=False, cache_imagenes=None,
+                   titulo=None):
+    if formato not in EXPORTADORES:
+        raise ValueError(f"Formato de lista no soportado: {formato}")
+    if titulo is None:
+        titulo = 'Lista de precios por mayor' if mayorista else 'Lista de precios'
+    posiciones = posiciones_lista(indice, categorias, marcas)
+    return EXPORTADORES[formato](destino, partes_lista(indice, posiciones, mayorista), titulo, cache_imagenes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera una lista de precios (xlsx o pdf) filtrada del catálogo.")
+    parser.add_argument('archivo', help="Archivo fuente del catálogo (Excel o CSV)")
+    parser.add_argument('-o', '--salida', required=True, help="Archivo de la lista: .xlsx o .pdf")
+    parser.add_argument('--categoria', action='append', default=[], help="Categoría a incluir (se puede repetir)")
+    parser.add_argument('--marca', action='append', default=[], help="Marca a incluir (se puede repetir)")
+    parser.add_argument('--mayorista', action='store_true', help="Usar el Precio x Mayor en vez del precio de venta")
+    parser.add_argument('--imagenes', action='store_true', help="Incluir las miniaturas del cache de imágenes")
+    args = parser.parse_args(argv)
+
+    formato = os.path.splitext(args.salida)[1].lower().lstrip('.')
+    cache_imagenes = CacheImagenes() if args.imagenes else None
+    inicio = time.perf_counter()
+    indice = IndiceCatalogo(cargar_catalogo(args.archivo))
+    total = exportar_lista(indice, args.salida, formato, args.categoria, args.marca, args.mayorista, cache_imagenes)
+    print(f"{total} productos escritos en {args.salida} ({time.perf_counter() - inicio:.1f} s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
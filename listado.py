@@ -0,0 +1,69 @@
+import base64
+import html
+import os
+
+import numpy as np
+import pandas as pd
+
+from catalogo import pesos
+
+# Tipos MIME de las miniaturas que genera el cache de imágenes
+_MIME_MINIATURAS = {'.jpg': 'image/jpeg', '.png': 'image/png'}
+
+
+# Versión vectorizada de obtener_color_stock: clasifica el stock de toda la página de una vez
+def colores_stock(stock):
+    stock = pd.to_numeric(stock, errors='coerce').to_numpy(dtype=float)
+    return np.select([stock > 5, stock <= 1], ['green', 'orange'], default='black')
+
+
+# Precio en pesos a mostrar para cada fila según el checkbox de precio por mayor (el catálogo guarda centavos)
+def precios_pagina(productos, mostrar_mayorista):
+    columna = 'Precio x Mayor' if mostrar_mayorista else 'Precio'
+    return pesos(pd.to_numeric(productos[columna], errors='coerce').fillna(0).to_numpy(dtype=float))
+
+
+# Función para embeber una miniatura local en el HTML (el navegador no puede leer rutas del servidor)
+def imagen_en_linea(ruta):
+    if not ruta:
+        return ''
+    try:
+        with open(ruta, 'rb') as f:
+            datos = base64.b64encode(f.read()).decode('ascii')
+    except OSError:
+        return ''
+    mime = _MIME_MINIATURAS.get(os.path.splitext(ruta)[1], 'image/jpeg')
+    return f'data:{mime};base64,{datos}'
+
+
+# Función para armar el HTML de una página completa del listado en una sola pasada
+# `imagenes` es el dict url -> ruta local que devuelve CacheImagenes.obtener_varias
+def html_pagina(productos, mostrar_mayorista, imagenes, ancho_imagen=100):
+    if productos.empty:
+        return ''
+    precios = precios_pagina(productos, mostrar_mayorista)
+    colores = colores_stock(productos['Stock'])
+    if 'StockSuc2' in productos.columns:
+        stock_suc2 = pd.to_numeric(productos['StockSuc2'], errors='coerce').fillna(0).to_numpy()
+    else:
+        stock_suc2 = np.zeros(len(productos))
+    urls = productos['imagen'].tolist() if 'imagen' in productos.columns else [None] * len(productos)
+
+    bloques = []
+    filas = zip(productos['Codigo'].tolist(), productos['Nombre'].tolist(), precios,
+                productos['Stock'].tolist(), colores, stock_suc2, urls)
+    for codigo, nombre, precio, stock, color, suc2, url in filas:
+        src = imagen_en_linea(imagenes.get(url)) if isinstance(url, str) and url else ''
+        imagen = f"<img src='{src}' width='{ancho_imagen}'>" if src else ''
+        suc2_html = (f"<br><span style='color: green;'><strong>Disponible en Suc. 2:</strong> {html.escape(str(suc2))}</span>"
+                     if suc2 > 0 else '')
+        bloques.append(
+            "<div style='display: flex; gap: 1rem; align-items: flex-start;'>"
+            f"<div style='flex: 1;'>{imagen}</div>"
+            "<div style='flex: 3;'>"
+            f"<h4>{html.escape(str(codigo))} | {html.escape(str(nombre))} | ${precio:,.2f}</h4>"
+            f"<span style='color: {color};'><strong>Stock:</strong> {html.escape(str(stock))}</span>"
+            f"{suc2_html}"
+            "</div></div><hr>"
+        )
+    return ''.join(bloques)
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+from catalogo import pesos
+
+# Columnas de las líneas que carga el usuario: código (o código de barras), cantidad y descuento de la línea
+COLUMNAS_LINEAS = ['Codigo', 'Cantidad', 'Descuento %']
+
+# Columna del catálogo con el múltiplo de venta forzada (cajas cerradas)
+COLUMNA_MULTIPLO = 'forzar venta x cantidad'
+
+# Columnas del presupuesto calculado, en el orden en que se muestran y exportan
+COLUMNAS_PRESUPUESTO = [
+    'Codigo', 'Nombre', 'Cantidad pedida', 'Venta Forzada', 'Cajas', 'Cantidad', 'Precio', 'Precio Caja/Venta',
+    'Subtotal', 'Descuento %', 'Total', 'Stock',
+]
+
+# Columnas con importes en centavos (se pasan a pesos al mostrar o exportar)
+COLUMNAS_IMPORTE = ['Precio', 'Precio Caja/Venta', 'Subtotal', 'Total']
+
+# Una línea por código con cantidad opcional: "AB1-DECO 12", "AB1-DECO;12" o solo "AB1-DECO"
+_LINEA_PEGADA = r'^\s*(?P<Codigo>.+?)(?:[\s;,\t]+(?P<Cantidad>\d+))?\s*$'
+
+
+# Función para crear un presupuesto vacío
+def lineas_vacias():
+    return pd.DataFrame({
+        'Codigo': pd.Series(dtype=object),
+        'Cantidad': pd.Series(dtype=np.int64),
+        'Descuento %': pd.Series(dtype=float),
+    })
+
+
+# Función para armar la línea de un solo producto
+def linea(codigo, cantidad=1):
+    return pd.DataFrame({'Codigo': [str(codigo)], 'Cantidad': [int(cantidad)], 'Descuento %': [0.0]})
+
+
+# Función para convertir texto pegado (una línea por producto) en líneas de presupuesto
+def leer_lineas(texto):
+    lineas = pd.Series(texto.splitlines(), dtype=object)
+    lineas = lineas[lineas.str.strip() != '']
+    if lineas.empty:
+        return lineas_vacias()
+    partes = lineas.str.extract(_LINEA_PEGADA)
+    return pd.DataFrame({
+        'Codigo': partes['Codigo'].to_numpy(dtype=object),
+        'Cantidad': pd.to_numeric(partes['Cantidad'], errors='coerce').fillna(1).to_numpy(dtype=np.int64),
+        'Descuento %': 0.0,
+    })
+
+
+# Función para sumar líneas nuevas al presupuesto: un código que ya estaba acumula la cantidad
+def agregar_lineas(lineas, nuevas):
+    if nuevas.empty:
+        return lineas
+    todas = pd.concat([lineas, nuevas], ignore_index=True)
+    todas['Codigo'] = todas['Codigo'].astype(str).str.strip()
+    return todas.groupby('Codigo', sort=False, as_index=False).agg(
+        {'Cantidad': 'sum', 'Descuento %': 'first'})[COLUMNAS_LINEAS]
+
+
+# Función para calcular el presupuesto de todas las líneas de una vez, con operaciones sobre columnas
+# Las cantidades se redondean hacia arriba al múltiplo de venta forzada del producto, y cada línea
+# aplica su descuento y después el descuento general. Devuelve (presupuesto, códigos no encontrados)
+def calcular_presupuesto(lector, lineas, mayorista=False, descuento_general=0.0):
+    df = lector.indice.df
+    codigos = lineas['Codigo'].astype(str)
+    claves = codigos.str.strip().str.lower().str.replace(r'^(\d+)\.0$', r'\1', regex=True)
+    posiciones = claves.map(lector.posiciones)
+    encontradas = posiciones.notna().to_numpy()
+    no_encontrados = codigos[~encontradas].tolist()
+
+    lineas = lineas[encontradas]
+    posiciones = posiciones[encontradas].to_numpy(dtype=np.int64)
+    columna_precio = 'Precio x Mayor' if mayorista else 'Precio'
+    columnas = [c for c in ['Codigo', 'Nombre', columna_precio, 'Stock', COLUMNA_MULTIPLO] if c in df.columns]
+    productos = df[columnas].iloc[posiciones]
+
+    pedida = pd.to_numeric(lineas['Cantidad'], errors='coerce').fillna(0).clip(lower=0).to_numpy(dtype=np.int64)
+    if COLUMNA_MULTIPLO in productos.columns:
+        multiplo = productos[COLUMNA_MULTIPLO].to_numpy(dtype=np.int64)
+    else:
+        multiplo = np.zeros(len(productos), dtype=np.int64)
+    forzada = multiplo > 1
+    unidad_venta = np.where(forzada, multiplo, 1)
+    cajas = -(-pedida // unidad_venta)
+    cantidad = cajas * unidad_venta
+
+    precio = productos[columna_precio].to_numpy(dtype=np.int64)
+    subtotal = cantidad * precio
+    descuento = pd.to_numeric(lineas['Descuento %'], errors='coerce').fillna(0).clip(0, 100).to_numpy(dtype=float)
+    factor = (1 - descuento / 100) * (1 - float(descuento_general) / 100)
+    total = np.round(subtotal * factor).astype(np.int64)
+
+    presupuesto = pd.DataFrame({
+        'Codigo': productos['Codigo'].to_numpy(dtype=object),
+        'Nombre': productos['Nombre'].to_numpy(dtype=object),
+        'Cantidad pedida': pedida,
+        'Venta Forzada': np.where(forzada, multiplo, 0),
+        'Cajas': np.where(forzada, cajas, 0),
+        'Cantidad': cantidad,
+        'Precio': precio,
+        'Precio Caja/Venta': unidad_venta * precio,
+        'Subtotal': subtotal,
+        'Descuento %': descuento,
+        'Total': total,
+        'Stock': productos['Stock'].to_numpy(),
+    })
+    return presupuesto[COLUMNAS_PRESUPUESTO], no_encontrados
+
+
+# Función para resumir un presupuesto calculado (importes en pesos)
+def totales_presupuesto(presupuesto):
+    subtotal = int(presupuesto['Subtotal'].sum())
+    total = int(presupuesto['Total'].sum())
+    return {
+        'lineas': len(presupuesto),
+        'unidades': int(presupuesto['Cantidad'].sum()),
+        'subtotal': pesos(subtotal),
+        'descuento': pesos(subtotal - total),
+        'total': pesos(total),
+        'sin_stock': int((presupuesto['Cantidad'] > presupuesto['Stock']).sum()),
+    }
+
+
+# Función para pasar los importes del presupuesto a pesos, para mostrarlo o exportarlo
+def presupuesto_en_pesos(presupuesto):
+    presupuesto = presupuesto.copy()
+    for columna in COLUMNAS_IMPORTE:
+        presupuesto[columna] = pesos(presupuesto[columna].to_numpy())
+    return presupuesto
+
+
+# Función para exportar el presupuesto como CSV (separado por ';' como las exportaciones del sistema)
+def presupuesto_csv(presupuesto):
+    return presupuesto_en_pesos(presupuesto).to_csv(index=False, sep=';', decimal=',').encode('utf-8-sig')
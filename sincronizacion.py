@@ -0,0 +1,260 @@
+import argparse
+import glob
+import hashlib
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from archivos import escribir_atomico
+from catalogo import (COLUMNAS_PRECIO, DIR_CACHE_CATALOGO, cargar_catalogo, ingerir_csv, leer_csv, leer_manifiesto,
+                      renombres_catalogo, ruta_manifiesto)
+from compartido import publicar_si_cambio
+from imagenes import crear_sesion
+
+# Timeout de conexión y de lectura para bajar la exportación (puede tardar en generarse del lado del servidor)
+TIMEOUT = (5, 120)
+
+# Minutos entre sincronizaciones cuando el servicio queda corriendo
+INTERVALO_MINUTOS = 15
+
+# Espera máxima entre reintentos cuando la descarga o la validación fallan (se duplica en cada fallo)
+MAX_ESPERA_ERROR = 60 * 60
+
+# Columnas (ya normalizadas) que tiene que traer una exportación para aceptarla
+COLUMNAS_OBLIGATORIAS = ['Codigo', 'Nombre', 'Precio', 'Precio x Mayor', 'Stock']
+
+# Fracción máxima de productos que puede perder el catálogo de una sincronización a otra;
+# una exportación cortada a la mitad no debe reemplazar al catálogo completo
+MAX_CAIDA_FILAS = 0.5
+
+# Variables de entorno con la dirección de la exportación y el token (para no dejarlos en el código)
+VARIABLE_URL = 'SOOP_URL_EXPORTACION'
+VARIABLE_TOKEN = 'SOOP_TOKEN_EXPORTACION'
+
+
+# Exportación rechazada: no se ingiere y el catálogo vigente queda como estaba
+class ExportacionInvalida(ValueError):
+    pass
+
+
+# Fuente HTTP de la exportación CSV, con pedidos condicionales (ETag / Last-Modified)
+# Si el servidor responde 304 no se baja nada
+# Los validadores de una descarga se usan recién después de confirmar() (cuando ya se ingirió):
+# una exportación cortada o rechazada se vuelve a bajar entera en el próximo pedido
+class FuenteHTTP:
+    def __init__(self, url, token=None, sesion=None, timeout=TIMEOUT):
+        self.url = url
+        self.sesion = sesion or crear_sesion(conexiones=1)
+        self.timeout = timeout
+        self.encabezados = {'Authorization': f'Bearer {token}'} if token else {}
+        self._etag = None
+        self._modificado = None
+        self._pendiente = None
+
+    def __str__(self):
+        return self.url
+
+    # Devuelve los bytes de la exportación, o None si no cambió desde la última descarga
+    def descargar(self):
+        encabezados = dict(self.encabezados)
+        if self._etag:
+            encabezados['If-None-Match'] = self._etag
+        if self._modificado:
+            encabezados['If-Modified-Since'] = self._modificado
+        response = self.sesion.get(self.url, headers=encabezados, timeout=self.timeout)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        self._pendiente = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return response.content
+
+    # Función para dar por ingerida la última descarga: los próximos pedidos son condicionales a ella
+    def confirmar(self):
+        if self._pendiente is not None:
+            self._etag, self._modificado = self._pendiente
+            self._pendiente = None
+
+
+# Fuente en disco: la exportación más reciente de una carpeta que coincida con el patrón
+# (ej. lo que deja otro proceso o una descarga manual); también sirve para un archivo puntual
+# La carpeta es una ruta literal (se escapa, puede tener corchetes); el patrón sí es un glob
+# Como en FuenteHTTP, un archivo se da por visto recién con confirmar()
+class FuenteCarpeta:
+    def __init__(self, carpeta, patron='*.csv'):
+        self.patron = os.path.join(glob.escape(carpeta), patron)
+        self._ultimo = None
+        self._pendiente = None
+
+    def __str__(self):
+        return self.patron
+
+    def descargar(self):
+        archivos = glob.glob(self.patron)
+        if not archivos:
+            raise FileNotFoundError(f"No hay ninguna exportación que coincida con '{self.patron}'.")
+        ruta = max(archivos, key=os.path.getmtime)
+        estado = os.stat(ruta)
+        if self._ultimo == (ruta, estado.st_mtime_ns, estado.st_size):
+            return None
+        with open(ruta, 'rb') as f:
+            datos = f.read()
+        self._pendiente = (ruta, estado.st_mtime_ns, estado.st_size)
+        return datos
+
+    def confirmar(self):
+        if self._pendiente is not None:
+            self._ultimo, self._pendiente = self._pendiente, None
+
+
+# Función para validar una exportación antes de ingerirla; devuelve el CSV ya leído (sin normalizar)
+# Detecta respuestas que no son la exportación (ej. la página de login cuando venció la sesión),
+# exportaciones sin las columnas que usa la app, con un precio sin cargar y exportaciones cortadas
+def validar_exportacion(datos, filas_anteriores=None, max_caida=MAX_CAIDA_FILAS):
+    if not datos:
+        raise ExportacionInvalida("La exportación está vacía.")
+    if datos.lstrip()[:1] == b'<':
+        raise ExportacionInvalida("Se recibió una página HTML en vez del CSV (¿venció la sesión o el token?).")
+    try:
+        df = leer_csv(datos)
+    except Exception as e:
+        raise ExportacionInvalida(f"No se pudo leer el CSV: {e}") from e
+    renombres = renombres_catalogo(df.columns)
+    origen = {renombres.get(c, c): c for c in df.columns}
+    faltantes = [c for c in COLUMNAS_OBLIGATORIAS if c not in origen]
+    if faltantes:
+        raise ExportacionInvalida(f"Faltan columnas en la exportación: {', '.join(faltantes)}.")
+    for columna in COLUMNAS_PRECIO:
+        if not pd.to_numeric(df[origen[columna]], errors='coerce').fillna(0).any():
+            raise ExportacionInvalida(f"La columna '{origen[columna]}' ({columna}) no tiene ningún precio cargado.")
+    filas = len(df)
+    if filas == 0:
+        raise ExportacionInvalida("La exportación no tiene productos.")
+    if filas_anteriores and filas < filas_anteriores * (1 - max_caida):
+        raise ExportacionInvalida(f"La exportación tiene {filas} productos y el catálogo vigente {filas_anteriores}; "
+                                  "parece cortada.")
+    return df
+
+
+# Sincronización del catálogo sin escritorio: baja la exportación de la fuente, la valida y la ingiere
+# directo al snapshot del catálogo de `file_path` (la app la toma en su próximo rerun)
+# Con `dir_compartido` además publica una generación nueva para las instancias en modo compartido
+class ServicioSincronizacion:
+    def __init__(self, fuente, file_path, dir_cache=DIR_CACHE_CATALOGO, dir_compartido=None, copia=None):
+        self.fuente = fuente
+        self.file_path = file_path
+        self.dir_cache = dir_cache
+        self.dir_compartido = dir_compartido
+        self.copia = copia
+        self.filas = None
+
+    def _filas_vigentes(self):
+        if self.filas is None:
+            try:
+                self.filas = len(cargar_catalogo(self.file_path, self.dir_cache))
+            except Exception:
+                self.filas = 0
+        return self.filas
+
+    # Función para hacer una sincronización; devuelve un dict con el resultado y los tiempos
+    def sincronizar(self):
+        inicio = time.perf_counter()
+        datos = self.fuente.descargar()
+        descarga = time.perf_counter() - inicio
+        resultado = {'fuente': str(self.fuente), 'descarga_s': round(descarga, 3)}
+        if datos is None:
+            return dict(resultado, estado='sin cambios')
+
+        manifiesto = leer_manifiesto(ruta_manifiesto(self.file_path, self.dir_cache)) or {}
+        if manifiesto.get('sha256') == hashlib.sha256(datos).hexdigest():
+            self.fuente.confirmar()
+            return dict(resultado, estado='sin cambios', bytes=len(datos))
+
+        df = validar_exportacion(datos, self._filas_vigentes())
+        filas = len(df)
+        ingerir_csv(datos, self.file_path, self.dir_cache, origen=str(self.fuente), df=df)
+        self.filas = filas
+        if self.copia:
+            escribir_atomico(self.copia, datos)
+        if self.dir_compartido:
+            publicar_si_cambio(self.file_path, self.dir_compartido, self.dir_cache, origen=str(self.fuente))
+        self.fuente.confirmar()
+        return dict(resultado, estado='actualizado', bytes=len(datos), filas=filas,
+                    total_s=round(time.perf_counter() - inicio, 3))
+
+    # Función para sincronizar cada `intervalo` segundos hasta que se active `detener`
+    # Ante un error se reintenta antes, con esperas que se duplican hasta MAX_ESPERA_ERROR
+    def correr(self, intervalo, detener=None, avisar=print):
+        detener = detener or threading.Event()
+        espera_error = min(60, intervalo)
+        while not detener.is_set():
+            try:
+                avisar(_formatear_resultado(self.sincronizar()))
+                espera = intervalo
+                espera_error = min(60, intervalo)
+            except Exception as e:
+                avisar(f"{_hora()} Error al sincronizar desde {self.fuente}: {e}")
+                espera = espera_error
+                espera_error = min(espera_error * 2, MAX_ESPERA_ERROR)
+            detener.wait(espera)
+
+
+def _hora():
+    return datetime.now().strftime("%H:%M:%S")
+
+
+def _formatear_resultado(resultado):
+    if resultado['estado'] == 'actualizado':
+        return (f"{_hora()} Catálogo actualizado: {resultado['filas']} productos "
+                f"({resultado['bytes'] / 1024:.0f} KB, descarga {resultado['descarga_s']:.1f} s, "
+                f"total {resultado['total_s']:.1f} s)")
+    return f"{_hora()} Sin cambios en {resultado['fuente']}"
+
+
+# Función para armar la fuente según los argumentos: una URL o una carpeta con exportaciones
+def crear_fuente(url=None, carpeta=None, patron='*.csv', token=None):
+    if carpeta:
+        return FuenteCarpeta(carpeta, patron)
+    url = url or os.environ.get(VARIABLE_URL)
+    if not url:
+        raise ValueError(f"Falta la dirección de la exportación (--url o la variable {VARIABLE_URL}).")
+    return FuenteHTTP(url, token or os.environ.get(VARIABLE_TOKEN))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sincroniza el catálogo desde la exportación CSV, sin interfaz gráfica.")
+    parser.add_argument('archivo', help="Archivo fuente del catálogo de la app (ej. 1804no.xlsx)")
+    parser.add_argument('--url', help=f"Dirección de la exportación CSV (por defecto la variable {VARIABLE_URL})")
+    parser.add_argument('--carpeta', help="Tomar la exportación más reciente de esta carpeta en vez de bajarla")
+    parser.add_argument('--patron', default='*.csv', help="Patrón de archivos a buscar en --carpeta")
+    parser.add_argument('--compartido', help="Carpeta del catálogo compartido donde publicar cada actualización")
+    parser.add_argument('--copia', help="Guardar también la exportación validada en este archivo")
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_MINUTOS, help="Minutos entre sincronizaciones")
+    parser.add_argument('--una-vez', action='store_true',
+                        help="Sincronizar una sola vez y salir (para cron o el Programador de tareas)")
+    args = parser.parse_args(argv)
+
+    try:
+        fuente = crear_fuente(args.url, args.carpeta, args.patron)
+    except ValueError as e:
+        parser.error(str(e))
+    servicio = ServicioSincronizacion(fuente, args.archivo, dir_compartido=args.compartido, copia=args.copia)
+    if args.una_vez:
+        try:
+            print(_formatear_resultado(servicio.sincronizar()))
+        except Exception as e:
+            print(f"{_hora()} Error al sincronizar desde {fuente}: {e}", file=sys.stderr)
+            return 1
+        return 0
+    try:
+        servicio.correr(args.intervalo * 60)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,6 +8,10 @@ CALL conda activate soopenv
 REM Cambiar al directorio de tu aplicación
 "C:\Users\virtu\Repositorios\Soop"
 
+REM Catálogo versionado local: se publica el archivo si cambió y la app toma cada versión nueva sola
+set SOOP_CATALOGO_COMPARTIDO=.catalogo_compartido
+python compartido.py 1804no.xlsx --dir %SOOP_CATALOGO_COMPARTIDO%
+
 REM Ejecutar la aplicación Streamlit
 streamlit run app.py
 
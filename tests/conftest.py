@@ -0,0 +1,55 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+# Servidor HTTP local para probar los clientes sin red: responde lo que se fije con responder()
+# y anota cada pedido (ruta y encabezados) en `pedidos`, que es propio de cada test
+class ServidorLocal:
+    def __init__(self):
+        self.pedidos = []
+        self.responder(200)
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                servidor._atender(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._http = ThreadingHTTPServer(('127.0.0.1', 0), Manejador)
+        self.url = f"http://127.0.0.1:{self._http.server_port}"
+        threading.Thread(target=self._http.serve_forever, args=(0.05,), daemon=True).start()
+
+    # Función para fijar la respuesta a los próximos pedidos
+    # Con `etag` la respuesta lo trae y un pedido condicional a ese mismo ETag recibe 304
+    def responder(self, estado, cuerpo=b'', tipo='application/octet-stream', etag=None):
+        self._respuesta = (estado, cuerpo, tipo, etag)
+
+    def _atender(self, manejador):
+        self.pedidos.append({'ruta': manejador.path, 'encabezados': dict(manejador.headers)})
+        estado, cuerpo, tipo, etag = self._respuesta
+        if etag is not None and manejador.headers.get('If-None-Match') == etag:
+            manejador.send_response(304)
+            manejador.end_headers()
+            return
+        manejador.send_response(estado)
+        manejador.send_header('Content-Type', tipo)
+        if etag is not None:
+            manejador.send_header('ETag', etag)
+        manejador.send_header('Content-Length', str(len(cuerpo)))
+        manejador.end_headers()
+        manejador.wfile.write(cuerpo)
+
+    def cerrar(self):
+        self._http.shutdown()
+        self._http.server_close()
+
+
+@pytest.fixture
+def servidor_http():
+    servidor = ServidorLocal()
+    yield servidor
+    servidor.cerrar()
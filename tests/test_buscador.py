@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+from buscador import MotorBusqueda, distancia_edicion, palabras_motor, raiz, reparar_texto, terminos
+from catalogo import IndiceCatalogo, actualizar_indice, compactar_catalogo, normalizar_catalogo
+
+PRODUCTOS = [
+    (1, 'Peluche unicornio rosa', 'Peluches', 'Unicornio de peluche suave'),
+    (2, 'Peluches de osos x3', 'Peluches', 'Tres osos'),
+    (3, 'Vaso térmico Los Simpson', 'Vasos', 'Vaso con tapa'),
+    (4, 'Luces de colores para árbol', 'Navidad', 'Guirnalda de luces'),
+    (5, 'Mu¤ecos articulados', 'Muñecos', 'Muñecos de acción'),
+    (6, 'Juego de cocina JugueterÃ­a', 'Jugueter�a', 'Set de cocina'),
+    (7, 'Taza de cerámica', 'Jugueteria', 'Taza para chicos'),
+    (8, 'Rompecabezas 500 piezas', 'Juegos', 'Rompecabezas de paisaje'),
+]
+
+
+def _catalogo(productos):
+    df = pd.DataFrame([{'Id': i, 'Codigo': f'A{i:03d}', 'Nombre': nombre, 'Categorias': categoria,
+                        'Descripcion': descripcion, 'Marca': 'Marca', 'Precio': 100, 'Precio x Mayor': 90}
+                       for i, nombre, categoria, descripcion in productos])
+    return compactar_catalogo(normalizar_catalogo(df))
+
+
+def _ids(indice, posiciones):
+    return [int(indice.ids[p]) for p in posiciones]
+
+
+def test_raiz_y_palabras_reparadas():
+    assert [raiz(p) for p in ['peluches', 'colores', 'luces', 'vasos', 'tres', 'gas']] == \
+        ['peluche', 'color', 'luz', 'vaso', 'tre', 'gas']
+    assert reparar_texto('JugueterÃ­a') == 'Juguetería'
+    assert reparar_texto('Mu¤ecos') == 'Muñecos'
+    assert palabras_motor('Árbol JugueterÃ­a, Mu¤ecos') == ['arbol', 'jugueteria', 'munecos']
+    assert terminos('Peluches de los colores') == ['peluche', 'color']
+
+
+def test_distancia_edicion():
+    assert distancia_edicion('peluche', 'peluche', 2) == 0
+    assert distancia_edicion('pelcuhe', 'peluche', 2) == 1
+    assert distancia_edicion('pelche', 'peluche', 1) == 1
+    assert distancia_edicion('jugueter�a', 'jugueteria', 1) == 0
+    assert distancia_edicion('vaso', 'taza', 1) == 2
+
+
+def test_motor_encuentra_plurales_texto_mal_codificado_y_errores_de_tipeo():
+    indice = IndiceCatalogo(_catalogo(PRODUCTOS))
+    motor = MotorBusqueda(indice)
+
+    # Plurales y acentos: "peluches" y "peluche" son el mismo término
+    assert _ids(indice, motor.buscar('peluches')) == _ids(indice, motor.buscar('peluche'))
+    assert set(_ids(indice, motor.buscar('peluche'))) == {1, 2}
+    assert _ids(indice, motor.buscar('luz')) == [4]
+    assert _ids(indice, motor.buscar('arbol')) == [4]
+    # Texto mal codificado: "JugueterÃ­a", "Mu¤ecos" y la categoría con un carácter perdido
+    assert _ids(indice, motor.buscar('muñecos')) == [5]
+    assert set(_ids(indice, motor.buscar('jugueteria'))) == {6, 7}
+    assert 'jugueter�a' not in motor.vocabulario
+    # Errores de tipeo (pares de letras compartidos + distancia de edición) y la última palabra como prefijo
+    assert _ids(indice, motor.buscar('pelcuhe unicornio')) == [1, 2]
+    assert _ids(indice, motor.buscar('rompecabesas')) == [8]
+    assert _ids(indice, motor.buscar('vaso simp')) == [3]
+    # Primero los que coinciden con más palabras de la consulta
+    assert _ids(indice, motor.buscar('peluche rosa'))[0] == 1
+    assert motor.buscar('de los') == []
+
+
+def test_delta_del_motor_coincide_con_el_motor_armado_desde_cero():
+    indice = IndiceCatalogo(_catalogo(PRODUCTOS))
+    motor = MotorBusqueda(indice)
+    # Se borra el único "rompecabezas" (el término sale del vocabulario), se modifica uno y se agregan dos
+    productos = [p for p in PRODUCTOS if p[0] != 8]
+    productos[0] = (1, 'Peluche dragón verde', 'Peluches', 'Dragón de peluche')
+    productos += [(9, 'Pelota de fútbol', 'Deportes', 'Pelota número 5'), (10, 'Taza Jugueter�a', 'Tazas', '')]
+    df = _catalogo(productos)
+
+    nuevo_indice = actualizar_indice(indice, df)
+    assert nuevo_indice.base == indice.version
+    delta = motor.aplicar_delta(nuevo_indice)
+    completo = MotorBusqueda(nuevo_indice)
+
+    assert delta.vocabulario.tolist() == completo.vocabulario.tolist()
+    assert 'rompecabeza' not in delta.vocabulario and 'dragon' in delta.vocabulario
+    assert np.array_equal(delta._docs, completo._docs)
+    assert np.allclose(delta._pesos, completo._pesos)
+    assert delta._por_bigrama.keys() == completo._por_bigrama.keys()
+    for bigrama, numeros in completo._por_bigrama.items():
+        assert delta._por_bigrama[bigrama].tolist() == numeros.tolist(), bigrama
+    muertas = set(np.flatnonzero(~nuevo_indice.vivas).tolist())
+    for consulta in ['peluche', 'unicornio', 'dragon', 'pelota', 'rompecabezas', 'jugueteria', 'taza', 'futbol']:
+        resultados = delta.buscar(consulta, limite=100)
+        assert resultados == completo.buscar(consulta, limite=100), consulta
+        assert not muertas & set(resultados), consulta
+    assert delta.buscar('unicornio') == []
+    assert sorted(_ids(nuevo_indice, delta.buscar('jugueteria'))) == [6, 7, 10]
+    # El motor anterior sigue respondiendo con su versión del catálogo
+    assert _ids(indice, motor.buscar('unicornio')) == [1]
+
+    # Un índice que no se derivó del de este motor se arma desde cero
+    otro = MotorBusqueda(indice).aplicar_delta(IndiceCatalogo(df))
+    assert otro.vocabulario.tolist() == completo.vocabulario.tolist()
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from catalogo import (cargar_catalogo, compactar_catalogo, ingerir_csv, leer_csv, leer_csv_por_partes,
+                      normalizar_catalogo, pesos)
+
+EXPORTACION = ('Id;Codigo;Nombre;Precio;Stock;Marca;Descripcion\n'
+               '1;A1;"Muñeca Señorita";100.50;3;Niñas;"Con\naccesorios"\n'
+               '2;A2;"Auto";200.00;0;Acme;"Sin descripción"\n'
+               '3;A3;"Camión ÁÉÍÓÚ ñ ü";300.00;-1;Acmé;"Línea ""clásica"""\n'
+               '4;A4;"Pelota";400.00;7;Acme;"Ñandú"\n')
+
+
+def test_leer_por_partes_en_latin1_coincide_con_leer_csv(tmp_path):
+    ruta = tmp_path / 'tmp_28.csv'
+    datos = EXPORTACION.encode('latin-1')
+    ruta.write_bytes(datos)
+
+    esperado = normalizar_catalogo(leer_csv(datos))
+    # Partes chicas para que haya varias
+    partes = list(leer_csv_por_partes(str(ruta), bytes_por_parte=64))
+    obtenido = pd.concat(partes, ignore_index=True)
+
+    assert len(partes) > 1
+    assert obtenido['Nombre'].tolist()[:1] == ['Muñeca Señorita']
+    for columna in ['Codigo', 'Nombre', 'Marca', 'Descripcion']:
+        assert obtenido[columna].tolist() == esperado[columna].tolist(), columna
+    assert obtenido['Precio'].tolist() == esperado['Precio'].tolist()
+
+
+# Encabezado de las exportaciones reales: "Precio" es el precio por mayor, "Precio Jugueterias face" el de lista
+# y "Precio Mayorista" viene vacío
+EXPORTACION_SISTEMA = ('Id;Codigo;Nombre;Precio;Stock;"Precio Mayorista";"Precio Jugueterias face";Marca;Categorias\n'
+                       '61766;AB1-DECO;"Librito Deco Reino";1476.00;396;;1668.00;;"Libros y Revistas"\n'
+                       '61798;TM-26494;"Pulsera Puppy Dog Pals";1737.00;203;;1963.00;;Juguetería\n')
+
+
+def test_csv_del_sistema_carga_los_precios_en_las_columnas_del_excel(tmp_path):
+    datos = EXPORTACION_SISTEMA.encode('latin-1')
+    ruta = tmp_path / 'tmp_28.csv'
+    ruta.write_bytes(datos)
+    dir_cache = str(tmp_path / 'cache')
+
+    df = cargar_catalogo(str(ruta), dir_cache)
+    assert df['Precio'].tolist() == [166800, 196300]
+    assert df['Precio x Mayor'].tolist() == [147600, 173700]
+
+    # Al subir la exportación sobre el Excel, el snapshot queda con el mismo esquema
+    excel = tmp_path / '1804no.xlsx'
+    excel.write_bytes(b'')
+    df = ingerir_csv(datos, str(excel), dir_cache)
+    assert df['Precio'].tolist() == [166800, 196300]
+    assert df['Precio x Mayor'].tolist() == [147600, 173700]
+    assert cargar_catalogo(str(excel), dir_cache)['Precio'].tolist() == [166800, 196300]
+
+    parte, = leer_csv_por_partes(str(ruta), {'Precio', 'Precio x Mayor'})
+    assert parte['Precio'].tolist() == [1668.0, 1963.0]
+    assert parte['Precio x Mayor'].tolist() == [1476.0, 1737.0]
+
+
+def test_catalogo_compacto_con_precios_en_centavos():
+    df = pd.DataFrame({
+        'Id': [1, 2, 3], 'Codigo': ['A1', 'A2', 'A3'], 'Nombre': ['Oso', 'Taza', 'Vaso'],
+        'Precio': ['100.50', 'sin precio', None], 'Precio x Mayor': [0.1 + 0.2, 19.999, 3],
+        'Stock': ['3', '2.6', None], 'Marca': ['Acme', None, 'Acme'],
+        'Fecha Modificado': ['2024-01-02 10:00:00', 'nunca', None], 'Columna Extra': [1, 2, 3],
+    })
+
+    compacto = compactar_catalogo(normalizar_catalogo(df))
+
+    assert 'Columna Extra' not in compacto.columns
+    # Precios en punto fijo: sin errores de redondeo de float y 0 cuando no hay precio
+    assert compacto['Precio'].dtype == np.int64 and compacto['Precio'].tolist() == [10050, 0, 0]
+    assert compacto['Precio x Mayor'].tolist() == [30, 2000, 300]
+    assert pesos(compacto['Precio'].to_numpy()).tolist() == [100.5, 0.0, 0.0]
+    assert compacto['Stock'].dtype == np.int32 and compacto['Stock'].tolist() == [3, 3, 0]
+    assert compacto['StockSuc2'].tolist() == [0, 0, 0]
+    assert isinstance(compacto['Marca'].dtype, pd.CategoricalDtype)
+    assert compacto['Marca'].cat.categories.tolist() == ['Acme']
+    assert compacto['Marca'].isna().tolist() == [False, True, False]
+    assert compacto['Fecha Modificado'].isna().tolist() == [False, True, True]
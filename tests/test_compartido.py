@@ -0,0 +1,109 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from catalogo import compactar_catalogo, normalizar_catalogo
+from compartido import (abrir_catalogo, generacion_actual, historial_generaciones, publicar_catalogo, publicar_si_cambio,
+                        revertir)
+
+
+def _catalogo(filas, precio=100):
+    df = pd.DataFrame({
+        'Id': range(1, filas + 1),
+        'Codigo': [f'A{i:03d}' for i in range(1, filas + 1)],
+        'Nombre': [f'Producto {i}' if i % 4 else None for i in range(1, filas + 1)],
+        'Precio': [precio + i for i in range(filas)],
+        'Precio x Mayor': [precio - 10 + i for i in range(filas)],
+        'Stock': [i % 3 for i in range(filas)],
+        'Marca': ['Acme' if i % 2 else 'Otra' for i in range(filas)],
+        'Fecha Creado': pd.date_range('2024-01-01', periods=filas, freq='D').astype(str),
+    })
+    return compactar_catalogo(normalizar_catalogo(df))
+
+
+def test_publicar_y_abrir_una_generacion_sin_copiar(tmp_path):
+    dir_compartido = str(tmp_path / 'compartido')
+    df = _catalogo(10)
+
+    puntero = publicar_catalogo(df, dir_compartido, snapshot='s1', origen='prueba.csv')
+
+    assert puntero['generacion'] == 1 and puntero['filas'] == 10
+    assert generacion_actual(dir_compartido) == puntero
+    abierto = abrir_catalogo(dir_compartido, puntero['archivo'])
+    pd.testing.assert_frame_equal(abierto.astype(object), df.astype(object))
+    # Texto sobre Arrow (no objetos de Python), diccionarios restaurados y enteros mapeados desde el archivo
+    assert isinstance(abierto['Codigo'].dtype, pd.StringDtype)
+    assert abierto['Nombre'].isna().sum() == 2
+    assert isinstance(abierto['Marca'].dtype, pd.CategoricalDtype)
+    assert not abierto['Precio'].to_numpy().flags.owndata
+
+    # El mismo contenido no se vuelve a escribir: solo se mueve el puntero
+    otro = publicar_catalogo(df.copy(), dir_compartido, snapshot='s2')
+    assert otro['archivo'] == puntero['archivo'] and otro['generacion'] == 2
+    assert [n for n in os.listdir(dir_compartido) if n.endswith('.arrow')] == [puntero['archivo']]
+    assert [g['generacion'] for g in historial_generaciones(dir_compartido)] == [1, 2]
+
+
+def test_generacion_vacia_y_sin_publicar(tmp_path):
+    dir_compartido = str(tmp_path / 'compartido')
+    assert generacion_actual(dir_compartido) is None
+    assert historial_generaciones(dir_compartido) == []
+
+    puntero = publicar_catalogo(_catalogo(0), dir_compartido)
+    abierto = abrir_catalogo(dir_compartido, puntero['archivo'])
+    assert len(abierto) == 0
+    assert np.array_equal(abierto.columns, _catalogo(0).columns)
+
+
+def _escribir_fuente(ruta, precio, marca_tiempo):
+    lineas = ['Id;Codigo;Nombre;Precio;"Precio x Mayor";Stock']
+    lineas += [f'{i};A{i:03d};"Producto {i}";{precio + i}.00;{precio - 10 + i}.00;{i}' for i in range(1, 6)]
+    ruta.write_text('\n'.join(lineas) + '\n', encoding='utf-8')
+    os.utime(ruta, (marca_tiempo, marca_tiempo))
+
+
+def test_revertir_queda_fijo_hasta_que_cambia_la_fuente(tmp_path):
+    dir_compartido, dir_cache = str(tmp_path / 'compartido'), str(tmp_path / 'cache')
+    fuente = tmp_path / 'catalogo.csv'
+
+    _escribir_fuente(fuente, 100, 1_700_000_000)
+    primera = publicar_si_cambio(str(fuente), dir_compartido, dir_cache)
+    _escribir_fuente(fuente, 200, 1_700_000_100)
+    segunda = publicar_si_cambio(str(fuente), dir_compartido, dir_cache)
+    assert (primera['generacion'], segunda['generacion']) == (1, 2)
+    assert primera['archivo'] != segunda['archivo']
+
+    # Volver atrás solo mueve el puntero al archivo que ya estaba en disco
+    vuelta = revertir(dir_compartido)
+    assert vuelta['archivo'] == primera['archivo']
+    assert vuelta['revertido_a'] == 1 and vuelta['generacion'] == 3
+    assert abrir_catalogo(dir_compartido, vuelta['archivo'])['Precio'].tolist() == [10100, 10200, 10300, 10400, 10500]
+
+    # Mientras la fuente no cambie, publicar no deshace la vuelta atrás
+    assert publicar_si_cambio(str(fuente), dir_compartido, dir_cache) is None
+    assert generacion_actual(dir_compartido)['archivo'] == primera['archivo']
+
+    # Una exportación nueva sí se publica, y se puede volver a una generación puntual
+    _escribir_fuente(fuente, 300, 1_700_000_200)
+    tercera = publicar_si_cambio(str(fuente), dir_compartido, dir_cache)
+    assert tercera['generacion'] == 4 and 'revertido_a' not in tercera
+    assert revertir(dir_compartido, generacion=2)['archivo'] == segunda['archivo']
+    assert [g['generacion'] for g in historial_generaciones(dir_compartido)] == [1, 2, 3, 4, 5]
+
+
+def test_solo_se_conservan_las_ultimas_versiones(tmp_path):
+    dir_compartido = str(tmp_path / 'compartido')
+    with pytest.raises(ValueError, match='Todavía no se publicó'):
+        revertir(dir_compartido)
+
+    punteros = [publicar_catalogo(_catalogo(5, precio), dir_compartido, conservar=2) for precio in (100, 200, 300)]
+    archivos = sorted(n for n in os.listdir(dir_compartido) if n.endswith('.arrow'))
+    assert archivos == sorted(p['archivo'] for p in punteros[1:])
+    assert [g['archivo'] for g in historial_generaciones(dir_compartido)] == [p['archivo'] for p in punteros[1:]]
+
+    # La primera versión ya no está en disco: no se puede volver a ella
+    with pytest.raises(ValueError, match='conservada'):
+        revertir(dir_compartido, generacion=1)
+    assert revertir(dir_compartido, conservar=2)['archivo'] == punteros[1]['archivo']
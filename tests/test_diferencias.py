@@ -0,0 +1,132 @@
+import io
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pytest
+
+from benchmark import catalogo_sintetico
+from catalogo import leer_csv
+from diferencias import EscritorReporte, comparar_exportaciones
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Objetivo de la comparación de dos exportaciones de 100k filas (en una sola pasada, sin el arranque del CLI)
+OBJETIVO_100K_SEGUNDOS = 1.0
+
+
+# Exportación con el formato del sistema: (Id, código, precio por mayor, precio de lista, stock)
+def _exportacion(ruta, filas):
+    lineas = ['Id;Codigo;Nombre;Precio;Stock;"Precio Mayorista";"Precio Jugueterias face";Descripcion']
+    lineas += [f'{i};{codigo};"Producto {codigo}";{mayor:.2f};{stock};;{lista:.2f};"Línea 1\nLínea 2"'
+               for i, codigo, mayor, lista, stock in filas]
+    ruta.write_bytes(('\n'.join(lineas) + '\n').encode('latin-1'))
+    return str(ruta)
+
+
+def _comparar(anterior, nueva, salida=None, bytes_por_parte=256):
+    escritor = EscritorReporte(salida)
+    try:
+        return comparar_exportaciones(anterior, nueva, escritor, bytes_por_parte)
+    finally:
+        escritor.cerrar()
+
+
+def test_altas_bajas_precios_y_stock_con_ids_repetidos(tmp_path):
+    # El Id 2 se repite (variantes): cada aparición se compara con la misma aparición de la otra exportación
+    anterior = _exportacion(tmp_path / 'anterior.csv', [
+        (1, 'A1', 90, 100, 5), (2, 'A2-ROJO', 10, 12, 1), (3, 'A3', 30, 35, 0), (2, 'A2-AZUL', 10, 12, 4),
+        (4, 'A4', 40, 45, 2),
+    ])
+    nueva = _exportacion(tmp_path / 'nueva.csv', [
+        (1, 'A1', 90, 110, 5), (2, 'A2-ROJO', 10, 12, 1), (2, 'A2-AZUL', 11, 12, 1), (4, 'A4', 40, 45, 7),
+        (5, 'A5', 50, 55, 3), (2, 'A2-VERDE', 10, 12, 9),
+    ])
+    salida = str(tmp_path / 'reporte.jsonl')
+
+    resumen = _comparar(anterior, nueva, salida)
+
+    assert resumen == {
+        'filas_anterior': 5, 'filas_nueva': 6, 'altas': 2, 'bajas': 1,
+        'cambios_precio': {'Precio': 1, 'Precio x Mayor': 1},
+        'movimientos_stock': {'Stock': {'productos': 2, 'unidades': 2.0}, 'StockSuc2': {'productos': 0, 'unidades': 0.0}},
+    }
+    with open(salida, encoding='utf-8') as f:
+        cambios = [json.loads(linea) for linea in f]
+    resumen_cambios = sorted((c['tipo'], c['Codigo'], c['campo'], c['anterior'], c['nuevo']) for c in cambios)
+    # "Precio Jugueterias face" es el Precio y "Precio" el Precio x Mayor, como en el Excel
+    assert resumen_cambios == [
+        ('alta', 'A2-VERDE', None, None, None),
+        ('alta', 'A5', None, None, None),
+        ('baja', 'A3', None, None, None),
+        ('precio', 'A1', 'Precio', 100.0, 110.0),
+        ('precio', 'A2-AZUL', 'Precio x Mayor', 10.0, 11.0),
+        ('stock', 'A2-AZUL', 'Stock', 4.0, 1.0),
+        ('stock', 'A4', 'Stock', 2.0, 7.0),
+    ]
+
+    # Leída de una sola vez da el mismo resultado
+    assert _comparar(anterior, nueva, bytes_por_parte=1 << 20) == resumen
+
+
+def test_reporte_json_y_exportaciones_iguales(tmp_path):
+    filas = [(i, f'A{i}', 10 + i, 12 + i, i) for i in range(1, 30)]
+    anterior = _exportacion(tmp_path / 'anterior.csv', filas)
+    nueva = _exportacion(tmp_path / 'nueva.csv', filas)
+
+    resumen = _comparar(anterior, nueva, str(tmp_path / 'reporte.json'))
+
+    assert resumen['altas'] == resumen['bajas'] == 0
+    with open(tmp_path / 'reporte.json', encoding='utf-8') as f:
+        assert json.load(f) == []
+    _comparar(anterior, _exportacion(tmp_path / 'vacia.csv', []), str(tmp_path / 'bajas.json'))
+    with open(tmp_path / 'bajas.json', encoding='utf-8') as f:
+        assert [c['id'] for c in json.load(f)] == list(range(1, 30))
+
+
+# Función para escribir un catálogo sintético como exportación del sistema (Latin-1 con ';')
+def _escribir(df, ruta):
+    salida = io.BytesIO()
+    pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), salida,
+                    pacsv.WriteOptions(delimiter=';', quoting_style='needed'))
+    ruta.write_bytes(salida.getvalue().decode('utf-8').encode('latin-1', errors='replace'))
+    return str(ruta)
+
+
+@pytest.fixture(scope='module')
+def exportaciones_100k(tmp_path_factory):
+    with open(os.path.join(RAIZ, 'tmp_28_1729613902.csv'), 'rb') as f:
+        base = leer_csv(f.read())
+    carpeta = tmp_path_factory.mktemp('exportaciones')
+    df = catalogo_sintetico(base, 100_000)
+    anterior = _escribir(df, carpeta / 'anterior.csv')
+
+    # 2 % de bajas, 1000 altas, 1 % de precios nuevos y 3 % de movimientos de stock
+    rng = np.random.default_rng(1)
+    nueva = df.drop(index=rng.choice(len(df), 2_000, replace=False))
+    precios = rng.choice(nueva.index, 1_000, replace=False)
+    nueva.loc[precios, 'Precio Jugueterias face'] = nueva.loc[precios, 'Precio Jugueterias face'].fillna(0) + 10
+    stock = rng.choice(nueva.index, 3_000, replace=False)
+    nueva.loc[stock, 'Stock'] = nueva.loc[stock, 'Stock'] + 1
+    altas = catalogo_sintetico(base, 1_000, semilla=2)
+    altas['Id'] += 200_000
+    return anterior, _escribir(pd.concat([nueva, altas], ignore_index=True), carpeta / 'nueva.csv')
+
+
+def test_compara_100k_filas_en_menos_de_un_segundo(exportaciones_100k):
+    anterior, nueva = exportaciones_100k
+    tiempos = []
+    for _ in range(3):
+        inicio = time.perf_counter()
+        resumen = comparar_exportaciones(anterior, nueva, EscritorReporte(None))
+        tiempos.append(time.perf_counter() - inicio)
+
+    assert (resumen['filas_anterior'], resumen['filas_nueva']) == (100_000, 99_000)
+    assert (resumen['altas'], resumen['bajas']) == (1_000, 2_000)
+    assert resumen['cambios_precio']['Precio'] == 1_000
+    assert resumen['movimientos_stock']['Stock'] == {'productos': 3_000, 'unidades': 3_000.0}
+    assert min(tiempos) < OBJETIVO_100K_SEGUNDOS, tiempos
@@ -0,0 +1,63 @@
+import pandas as pd
+
+from catalogo import IndiceCatalogo, compactar_catalogo, normalizar_catalogo
+from escaneo import HistorialEscaneos, LectorCodigos, clave_escaneo
+
+
+def _lector():
+    df = pd.DataFrame({
+        'Id': [1, 2, 3, 4],
+        'Codigo': ['AB1-DECO', 'TM-26494', '7791234', 'TM-2649'],
+        'Nombre': ['Deco', 'Pulsera', 'Vaso', 'Taza'],
+        # El código de barras del 1 es el código del 3: gana el código de barras
+        'Codigo de Barras': ['7791234', '7790000000017', None, ''],
+        'Precio': [1668, 1963, 10, 5],
+    })
+    return LectorCodigos(IndiceCatalogo(compactar_catalogo(normalizar_catalogo(df))))
+
+
+def _ids(lector, claves):
+    return [int(lector.indice.ids[lector.posiciones[clave]]) for clave in claves]
+
+
+def test_clave_escaneo():
+    assert clave_escaneo('  AB1-Deco\n') == 'ab1-deco'
+    assert clave_escaneo(7790000000017.0) == '7790000000017'
+    assert clave_escaneo('12.0') == '12' and clave_escaneo('A1.0') == 'a1.0'
+
+
+def test_resolver_por_codigo_de_barras_o_codigo():
+    lector = _lector()
+    ids = lector.indice.ids
+
+    assert ids[lector.resolver('ab1-deco')] == 1
+    assert ids[lector.resolver('7790000000017')] == ids[lector.resolver(7790000000017.0)] == 2
+    assert ids[lector.resolver('7791234')] == 1
+    assert lector.resolver('no existe') is None and lector.resolver('') is None
+
+
+def test_separar_lecturas_pegadas():
+    lector = _lector()
+
+    assert lector.separar('TM-26494') == (['tm-26494'], '')
+    # Dos escaneos pegados: se toma el código conocido más largo en cada punto
+    claves, sobrante = lector.separar('AB1-DECOTM-26494TM-2649')
+    assert _ids(lector, claves) == [1, 2, 4] and sobrante == ''
+    claves, sobrante = lector.separar('7790000000017 XYZ')
+    assert _ids(lector, claves) == [2] and sobrante == 'xyz'
+    assert lector.separar('x' * 500) == ([], 'x' * 500)
+
+
+def test_historial_sin_repetidos_y_con_maximo():
+    lector = _lector()
+    historial = HistorialEscaneos(maximo=3)
+
+    assert historial.registrar(lector, 'AB1-DECOTM-26494') == 2
+    assert historial.registrar(lector, 'tm-2649') == 1
+    assert historial.registrar(lector, '7791234') == 1
+    assert historial.claves == ['7791234', 'tm-2649', 'tm-26494']
+    assert historial.actual == '7791234' and historial.no_encontrado == ''
+
+    assert historial.registrar(lector, 'TM-26494 ???') == 1
+    assert historial.claves == ['tm-26494', '7791234', 'tm-2649']
+    assert historial.no_encontrado == '???'
@@ -0,0 +1,64 @@
+import json
+import os
+import socket
+
+import pytest
+
+from fecha_github import FechaModificacionGithub, fecha_modificacion_local
+
+ETAG = '"abc123"'
+COMMITS = [{'commit': {'committer': {'date': '2024-10-22T15:30:00Z'}}}]
+
+
+# El servidor local imita /repos/<usuario>/<repo>/commits de la API de GitHub
+@pytest.fixture
+def api(servidor_http):
+    servidor_http.responder(200, json.dumps(COMMITS).encode('utf-8'), 'application/json', etag=ETAG)
+    return servidor_http
+
+
+def _puerto_cerrado():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_200_con_etag_y_304_condicional(api):
+    fecha = FechaModificacionGithub('usuario', 'repo', '1804no.xlsx', ttl=0, api=api.url)
+
+    # 15:30 UTC son las 12:30 en Argentina
+    assert fecha.obtener() == '2024-10-22 12:30:00'
+    assert fecha.obtener() == '2024-10-22 12:30:00'
+
+    assert len(api.pedidos) == 2
+    assert api.pedidos[0]['ruta'].startswith('/repos/usuario/repo/commits?')
+    assert 'path=1804no.xlsx' in api.pedidos[0]['ruta']
+    assert 'If-None-Match' not in api.pedidos[0]['encabezados']
+    assert api.pedidos[1]['encabezados']['If-None-Match'] == ETAG
+
+
+def test_reutiliza_la_fecha_dentro_del_ttl(api):
+    fecha = FechaModificacionGithub('usuario', 'repo', '1804no.xlsx', ttl=600, api=api.url)
+
+    for _ in range(5):
+        assert fecha.obtener() == '2024-10-22 12:30:00'
+    assert len(api.pedidos) == 1
+
+
+def test_sin_conexion_usa_el_mtime_local(tmp_path):
+    archivo = tmp_path / '1804no.xlsx'
+    archivo.write_bytes(b'catalogo')
+    os.utime(archivo, (1729611000, 1729611000))
+    fecha = FechaModificacionGithub('usuario', 'repo', '1804no.xlsx', ruta_local=str(archivo), ttl=0,
+                                    api=f"http://127.0.0.1:{_puerto_cerrado()}")
+
+    assert fecha.obtener() == fecha_modificacion_local(str(archivo)) == '2024-10-22 12:30:00'
+
+
+def test_sin_conexion_conserva_la_ultima_fecha_de_github(api, tmp_path):
+    fecha = FechaModificacionGithub('usuario', 'repo', '1804no.xlsx', ruta_local=str(tmp_path / 'no_existe'),
+                                    ttl=0, api=api.url)
+    assert fecha.obtener() == '2024-10-22 12:30:00'
+
+    fecha.url = f"http://127.0.0.1:{_puerto_cerrado()}/repos/usuario/repo/commits"
+    assert fecha.obtener() == '2024-10-22 12:30:00'
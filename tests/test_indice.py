@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+
+from buscador import IndiceBusqueda
+from catalogo import COLUMNAS_NOVEDAD, IndiceCatalogo, actualizar_indice, compactar_catalogo, normalizar_catalogo
+
+CATEGORIAS = ['Peluches', 'Vasos', 'Peluches,Ofertas', 'Libros y Revistas', 'Vasos,Ofertas']
+
+
+def _producto(i, nombre=None, categorias=None):
+    return {
+        'Id': i, 'Codigo': f'TM-{i:04d}', 'Nombre': nombre or (f'Producto {i} peluche' if i % 3 else f'Vaso {i}'),
+        'Descripcion': f'Descripción del producto {i}', 'Codigo de Barras': f'779{i:07d}',
+        'Precio': 100 + i, 'Precio x Mayor': 90 + i, 'Stock': i % 5, 'Marca': f'Marca {i % 4}',
+        'Categorias': categorias or CATEGORIAS[i % len(CATEGORIAS)], 'imagen': f'https://img/{i}.jpg',
+        'Fecha Creado': f'2024-01-{1 + i % 28:02d} 10:{i % 60:02d}:00',
+        'Fecha Modificado': f'2024-06-{1 + i % 28:02d} 10:{i % 60:02d}:00',
+    }
+
+
+# Cada versión se compacta por separado, como una exportación nueva (sus categorías no son las del índice)
+def _catalogo(productos):
+    return compactar_catalogo(normalizar_catalogo(pd.DataFrame(productos)))
+
+
+def _ids(indice, posiciones):
+    return [int(indice.ids[p]) for p in posiciones]
+
+
+def _mapa(indice, atributo):
+    return {clave: int(indice.ids[posicion]) for clave, posicion in getattr(indice, atributo).items()}
+
+
+# El índice con el delta aplicado tiene que responder igual que uno armado desde cero con el mismo catálogo
+def _comparar(delta, completo):
+    assert len(delta) == len(completo)
+    for atributo in ['por_codigo', 'por_nombre', 'por_codigo_barras']:
+        assert _mapa(delta, atributo) == _mapa(completo, atributo), atributo
+    assert delta.categorias == completo.categorias
+    for categoria in completo.categorias:
+        assert sorted(_ids(delta, delta.posiciones_categoria(categoria))) == \
+            sorted(_ids(completo, completo.posiciones_categoria(categoria))), categoria
+    for prefijo in ['tm-', 'tm-00', 'tm-001', 'TM-0042', 'x']:
+        assert _ids(delta, delta.posiciones_prefijo(prefijo)) == _ids(completo, completo.posiciones_prefijo(prefijo))
+    for columna in COLUMNAS_NOVEDAD:
+        claves = delta.claves_novedad[columna][delta.posiciones_novedad(columna)]
+        assert claves.tolist() == completo.claves_novedad[columna][completo.posiciones_novedad(columna)].tolist()
+        assert sorted(_ids(delta, delta.posiciones_novedad(columna))) == sorted(completo.ids.tolist())
+
+
+def _cambiar(productos):
+    productos = {p['Id']: dict(p) for p in productos}
+    # Borrados, modificados (nombre, código de barras y categoría nueva) y nuevos
+    for i in (3, 10, 11):
+        del productos[i]
+    productos[4] = _producto(4, nombre='Peluche unicornio gigante', categorias='Peluches,Novedades')
+    productos[5]['Codigo de Barras'] = '7790000099'
+    productos[6]['Fecha Creado'] = '2025-01-01 00:00:00'
+    for i in (101, 102):
+        productos[i] = _producto(i, nombre=f'Taza térmica {i}', categorias='Tazas')
+    return list(productos.values())
+
+
+def test_delta_coincide_con_el_indice_armado_desde_cero():
+    # El 61 repite el código del 12: el mapa de códigos apunta a la primera fila
+    productos = [_producto(i) for i in range(1, 61)] + [dict(_producto(61), Codigo='TM-0012')]
+    anterior = IndiceCatalogo(_catalogo(productos))
+    productos = _cambiar(productos)
+    df = _catalogo(productos)
+
+    indice = actualizar_indice(anterior, df)
+
+    assert indice.base == anterior.version
+    assert len(indice.quitadas) == 6 and len(indice.agregadas) == 5
+    assert sorted(_ids(indice, indice.quitadas)) == [3, 4, 5, 6, 10, 11]
+    assert not indice.vivas[indice.quitadas].any()
+    assert indice.urls_quitadas == ['https://img/10.jpg', 'https://img/11.jpg', 'https://img/3.jpg']
+    _comparar(indice, IndiceCatalogo(df))
+    assert indice.buscar_codigo('TM-0004')['Nombre'] == 'Peluche unicornio gigante'
+    assert indice.buscar_codigo('TM-0003') is None
+    assert indice.buscar_codigo_barras('7790000099')['Codigo'] == 'TM-0005'
+    assert indice.buscar_codigo_barras('7790000005') is None
+
+    assert _mapa(indice, 'por_codigo')['TM-0012'] == 12
+
+    # Un segundo delta sobre el anterior (con filas muertas) también coincide
+    # Al borrar el 12, su código pasa a la otra fila que lo tiene
+    productos = [p for p in productos if p['Id'] not in (12, 20)] + [_producto(103)]
+    df = _catalogo(productos)
+    segundo = actualizar_indice(indice, df)
+    assert segundo.base == indice.version
+    _comparar(segundo, IndiceCatalogo(df))
+    assert _mapa(segundo, 'por_codigo')['TM-0012'] == 61
+
+
+def test_las_filas_dadas_de_baja_no_aparecen_en_las_busquedas():
+    productos = [_producto(i) for i in range(1, 61)]
+    anterior = IndiceCatalogo(_catalogo(productos))
+    buscador_anterior = IndiceBusqueda(anterior)
+    productos = _cambiar(productos)
+    df = _catalogo(productos)
+
+    indice = actualizar_indice(anterior, df)
+    buscador = buscador_anterior.aplicar_delta(indice)
+    completo = IndiceCatalogo(df)
+    buscador_completo = IndiceBusqueda(completo)
+
+    muertas = set(np.flatnonzero(~indice.vivas).tolist())
+    for consulta in ['peluche', 'producto 1', 'tm-000', 'vaso', 'unicornio', 'taza', '7790000', 'descripcion']:
+        resultados = buscador.buscar(consulta, limite=1000)
+        assert not muertas & set(resultados), consulta
+        assert sorted(_ids(indice, resultados)) == sorted(_ids(completo, buscador_completo.buscar(consulta, 1000)))
+    assert buscador.buscar('TM-0003') == []
+    assert _ids(indice, buscador.buscar_codigos('TM-0004')) == [4]
+    # El buscador anterior no se modificó (una sesión puede seguir usándolo)
+    assert _ids(anterior, buscador_anterior.buscar('TM-0003')) == [3]
+
+
+def test_demasiadas_filas_muertas_reconstruye_desde_cero():
+    productos = [_producto(i) for i in range(1, 41)]
+    anterior = IndiceCatalogo(_catalogo(productos))
+    # 15 de 40 modificados: más del 25 % de las filas quedarían muertas
+    productos = [_producto(i, nombre=f'Renovado {i}') if i <= 15 else p for i, p in zip(range(1, 41), productos)]
+    df = _catalogo(productos)
+
+    indice = actualizar_indice(anterior, df)
+
+    assert indice.base is None
+    assert indice.vivas.all() and len(indice.df) == 40
+    _comparar(indice, IndiceCatalogo(df))
+    # El buscador no puede aplicar un delta que no se derivó de su índice: se arma de nuevo
+    buscador = IndiceBusqueda(anterior).aplicar_delta(indice)
+    assert buscador.indice is indice
+    assert _ids(indice, buscador.buscar('renovado', 100)) == list(range(1, 16))
+
+
+def test_busquedas_directas_por_codigo_nombre_y_codigo_de_barras():
+    productos = [_producto(1), _producto(2, nombre='Vaso Simpson'), dict(_producto(3), Codigo='12345'),
+                 dict(_producto(4), Codigo='TM-0001', Nombre='Vaso Simpson')]
+    productos[1]['Codigo de Barras'] = 7790000000017
+    indice = IndiceCatalogo(_catalogo(productos))
+
+    assert indice.buscar_codigo('TM-0001')['id'] == 1
+    assert indice.buscar_codigo(' TM-0001 ')['id'] == 1
+    assert indice.buscar_codigo(12345)['id'] == 3
+    assert indice.buscar_codigo('tm-0001') is None
+    # Ante nombres o códigos repetidos gana la primera fila, como el filtro sobre el DataFrame
+    assert indice.buscar_nombre('Vaso Simpson')['id'] == 2
+    assert indice.buscar_codigo_barras('7790000000017')['Codigo'] == 'TM-0002'
+    assert indice.buscar_codigo_barras('') is None and indice.buscar_nombre(None) is None
+
+
+def test_categorias_por_coincidencia_exacta():
+    productos = [_producto(1, categorias='Peluches'), _producto(2, categorias='Peluches grandes, Ofertas'),
+                 _producto(3, categorias=' Ofertas ,Peluches'), _producto(4, categorias='Vasos'), _producto(5)]
+    productos[4]['Categorias'] = None
+    indice = IndiceCatalogo(_catalogo(productos))
+
+    assert indice.categorias == ['Ofertas', 'Peluches', 'Peluches grandes', 'Vasos']
+    # "Peluches" no trae "Peluches grandes" (antes se filtraba con str.contains)
+    assert _ids(indice, indice.posiciones_categoria('Peluches')) == [1, 3]
+    assert _ids(indice, indice.posiciones_categoria('Ofertas')) == [2, 3]
+    assert _ids(indice, indice.posiciones_categoria('Peluche')) == []
+
+
+def test_novedades_de_la_mas_nueva_a_la_mas_vieja():
+    fechas = ['2024-03-01 10:00:00', None, '2024-05-01 08:00:00', '2024-03-01 10:00:00', 'sin fecha']
+    productos = [dict(_producto(i), **{'Fecha Creado': fecha}) for i, fecha in enumerate(fechas, 1)]
+    indice = IndiceCatalogo(_catalogo(productos))
+
+    # A igual fecha se respeta el orden del archivo y las fechas vacías o inválidas van al final
+    assert _ids(indice, indice.posiciones_novedad('Fecha Creado')) == [3, 1, 4, 2, 5]
+    assert len(indice.posiciones_novedad('Fecha Modificado')) == 5
+    assert len(indice.posiciones_novedad('Otra')) == 0
+
+
+def test_prefijos_de_codigo_ordenados():
+    codigos = ['TM-0200', 'AB1-DECO', 'tm-0010', 'TM-0100', '12345', None, 'TM-01']
+    productos = [dict(_producto(i), Codigo=codigo) for i, codigo in enumerate(codigos, 1)]
+    indice = IndiceCatalogo(_catalogo(productos))
+
+    # Sin distinguir mayúsculas y en orden de código
+    assert _ids(indice, indice.posiciones_prefijo('TM-0')) == [3, 7, 4, 1]
+    assert _ids(indice, indice.posiciones_prefijo('tm-01')) == [7, 4]
+    assert _ids(indice, indice.posiciones_prefijo(' 123')) == [5]
+    assert _ids(indice, indice.posiciones_prefijo('ZZ')) == []
+    assert len(indice.posiciones_prefijo('')) == 6
@@ -0,0 +1,76 @@
+import json
+import re
+
+from instrumentacion import MedicionRerun, RegistroRendimiento
+
+
+# Medición con tiempos fijos (en segundos), para que la salida no dependa de la máquina
+def _medicion(tipo, total, **etapas):
+    medicion = MedicionRerun(tipo)
+    medicion.etapas = etapas
+    medicion.total = total
+    return medicion
+
+
+def test_etapas_repetidas_suman_y_miden_memoria(tmp_path):
+    registro = RegistroRendimiento(str(tmp_path))
+    medicion = registro.nueva_medicion()
+    registro.medir_memoria(True)
+    try:
+        with medicion.etapa('carga'):
+            datos = bytearray(2 * 1024 * 1024)
+        with medicion.etapa('carga'):
+            pass
+        with medicion.etapa('listado'):
+            pass
+    finally:
+        registro.medir_memoria(False)
+    del datos
+
+    fila = medicion.terminar().como_dict()
+    assert fila['tipo'] == 'pagina'
+    assert list(fila['etapas_ms']) == ['carga', 'listado']
+    assert fila['total_ms'] >= fila['etapas_ms']['carga'] + fila['etapas_ms']['listado']
+    assert fila['pico_kb']['carga'] >= 2048 and fila['pico_kb']['listado'] < 2048
+    assert 'pico_kb' not in _medicion('pagina', 0.1).como_dict()
+
+
+def test_registro_jsonl_rotativo(tmp_path):
+    registro = RegistroRendimiento(str(tmp_path), max_bytes=300, intervalo_metricas=3600)
+
+    for i in range(4):
+        registro.registrar(_medicion('pagina', 0.05 + i / 100, carga=0.01, listado=0.02))
+
+    rotado = (tmp_path / 'reruns.jsonl.1').read_text(encoding='utf-8').splitlines()
+    actual = (tmp_path / 'reruns.jsonl').read_text(encoding='utf-8').splitlines()
+    assert len(rotado) + len(actual) == 4 and actual
+    ultimo = json.loads(actual[-1])
+    assert ultimo['tipo'] == 'pagina' and ultimo['total_ms'] == 80.0
+    assert ultimo['etapas_ms'] == {'carga': 10.0, 'listado': 20.0}
+    assert re.fullmatch(r'\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d', ultimo['fecha'])
+
+    filas = {(f['tipo'], f['etapa']): f for f in registro.resumen()}
+    assert filas['pagina', 'total'] == {'tipo': 'pagina', 'etapa': 'total', 'reruns': 4, 'p50_ms': 65.0,
+                                        'p90_ms': 77.0, 'p99_ms': 79.7, 'max_ms': 80.0, 'pico_kb_max': None}
+    assert filas['pagina', 'carga']['p99_ms'] == 10.0
+
+
+def test_metricas_en_formato_prometheus(tmp_path):
+    registro = RegistroRendimiento(str(tmp_path), intervalo_metricas=0)
+
+    registro.registrar(_medicion('pagina', 0.1, carga=0.04))
+    registro.registrar(_medicion('pagina', 0.3, carga=0.08))
+    registro.registrar(_medicion('fragmento', 0.02, escaneo=0.015))
+
+    lineas = (tmp_path / 'metricas.prom').read_text(encoding='utf-8').splitlines()
+    assert lineas[:2] == ['# HELP soop_etapa_segundos Tiempo de cada etapa por rerun de la app',
+                          '# TYPE soop_etapa_segundos summary']
+    assert 'soop_etapa_segundos{tipo="pagina",etapa="carga",quantile="0.5"} 0.060000' in lineas
+    assert 'soop_etapa_segundos_sum{tipo="pagina",etapa="total"} 0.400000' in lineas
+    assert 'soop_etapa_segundos_count{tipo="pagina",etapa="total"} 2' in lineas
+    assert 'soop_etapa_segundos_count{tipo="fragmento",etapa="escaneo"} 1' in lineas
+    assert lineas[-3:] == ['# TYPE soop_reruns_total counter', 'soop_reruns_total{tipo="fragmento"} 1',
+                           'soop_reruns_total{tipo="pagina"} 2']
+    # Cada muestra es "nombre{etiquetas} valor", como la lee el textfile collector
+    for linea in lineas:
+        assert linea.startswith('# ') or re.fullmatch(r'soop_\w+\{[^}]*\} [0-9.]+', linea), linea
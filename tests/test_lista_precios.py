@@ -0,0 +1,102 @@
+import re
+import zlib
+
+import pandas as pd
+from openpyxl import load_workbook
+from PIL import Image
+
+from catalogo import IndiceCatalogo, compactar_catalogo, normalizar_catalogo
+from lista_precios import exportar_lista, partes_lista, posiciones_lista
+
+
+def _indice(filas=4):
+    productos = [
+        ('B-2', 'Oso (grande)', 1668.0, 1476.0, 'Acme', 'Peluches', 6),
+        ('A-1', 'Taza', 100.5, 90, 'Otra', 'Tazas', 0),
+        ('C-3', 'Vaso', 10, 9, 'Acme', 'Vasos,Peluches', 1),
+        ('D-4', 'Pelota', 5, 4, 'Acme', 'Deportes', 0),
+    ]
+    productos += [(f'E-{i:03d}', f'Producto {i}', 20 + i, 18 + i, 'Otra', 'Varios', 0) for i in range(filas - 4)]
+    df = pd.DataFrame([{'Id': i, 'Codigo': codigo, 'Nombre': nombre, 'Precio': precio, 'Precio x Mayor': mayor,
+                        'Stock': 1, 'Marca': marca, 'Categorias': categorias, 'forzar venta x cantidad': forzada,
+                        'imagen': f'https://img/{codigo}.jpg'}
+                       for i, (codigo, nombre, precio, mayor, marca, categorias, forzada) in enumerate(productos, 1)])
+    return IndiceCatalogo(compactar_catalogo(normalizar_catalogo(df)))
+
+
+# Cache de imágenes de prueba: todas las URLs apuntan a la misma miniatura en disco
+class CacheFija:
+    def __init__(self, ruta):
+        self.ruta = ruta
+
+    def obtener_varias(self, urls, tamano):
+        return {url: self.ruta for url in urls}
+
+
+# Función para leer los objetos de un PDF comprobando que la tabla xref apunte a cada uno
+def _leer_pdf(ruta):
+    with open(ruta, 'rb') as f:
+        contenido = f.read()
+    assert contenido.startswith(b'%PDF-1.4') and contenido.endswith(b'%%EOF\n')
+    inicio_xref = int(re.search(rb'startxref\n(\d+)\n', contenido).group(1))
+    assert contenido[inicio_xref:].startswith(b'xref\n')
+    entradas = re.findall(rb'(\d{10}) 00000 n ', contenido[inicio_xref:])
+    for numero, posicion in enumerate(entradas, 1):
+        assert contenido[int(posicion):].startswith(f'{numero} 0 obj\n'.encode('ascii')), numero
+    flujos = re.findall(rb'/FlateDecode >>\nstream\n(.*?)\nendstream', contenido, re.S)
+    return contenido, [zlib.decompress(flujo).decode('cp1252') for flujo in flujos]
+
+
+def test_filtra_por_categoria_y_marca_en_orden_de_codigo():
+    indice = _indice()
+    assert [indice.ids[p] for p in posiciones_lista(indice)] == [2, 1, 3, 4]
+    assert [indice.ids[p] for p in posiciones_lista(indice, ['Peluches'])] == [1, 3]
+    assert [indice.ids[p] for p in posiciones_lista(indice, ['Peluches', 'Tazas'], ['Otra'])] == [2]
+
+    partes = list(partes_lista(indice, posiciones_lista(indice), mayorista=True, filas_por_parte=3))
+    assert [len(parte) for parte in partes] == [3, 1]
+    lista = pd.concat(partes, ignore_index=True)
+    assert lista['Codigo'].tolist() == ['A-1', 'B-2', 'C-3', 'D-4']
+    assert lista['Precio'].tolist() == [90.0, 1476.0, 9.0, 4.0]
+    assert lista['Venta Forzada'].tolist() == [0, 6, 0, 0]
+
+
+def test_exportar_xlsx(tmp_path):
+    destino = str(tmp_path / 'lista.xlsx')
+
+    assert exportar_lista(_indice(), destino, 'xlsx', marcas=['Acme']) == 3
+
+    filas = list(load_workbook(destino).active.values)
+    assert filas[0][0] == 'Lista de precios'
+    assert filas[1] == ('Codigo', 'Nombre', 'Marca', 'Venta Forzada', 'Precio')
+    assert filas[2:] == [('B-2', 'Oso (grande)', 'Acme', 6, 1668), ('C-3', 'Vaso', 'Acme', None, 10),
+                         ('D-4', 'Pelota', 'Acme', None, 5)]
+
+
+def test_exportar_pdf_por_paginas(tmp_path):
+    destino = str(tmp_path / 'lista.pdf')
+
+    assert exportar_lista(_indice(80), destino, 'pdf', mayorista=True) == 80
+
+    contenido, paginas = _leer_pdf(destino)
+    # Sin imágenes entran 35 filas por página A4
+    assert b'/Count 3' in contenido and len(paginas) == 3
+    assert 'Lista de precios por mayor' in paginas[0] and 'Pág. 3' in paginas[2]
+    assert r'(Oso \(grande\)) Tj' in paginas[0]
+    assert '($1,476.00) Tj' in paginas[0] and '(x 6) Tj' in paginas[0]
+    assert sum(pagina.count('(E-') for pagina in paginas) == 76
+
+
+def test_exportar_con_miniaturas(tmp_path):
+    miniatura = str(tmp_path / 'miniatura.png')
+    Image.new('RGBA', (60, 30), (255, 0, 0, 128)).save(miniatura)
+    cache = CacheFija(miniatura)
+
+    assert exportar_lista(_indice(), str(tmp_path / 'lista.xlsx'), 'xlsx', cache_imagenes=cache) == 4
+    assert len(load_workbook(str(tmp_path / 'lista.xlsx')).active._images) == 4
+
+    assert exportar_lista(_indice(), str(tmp_path / 'lista.pdf'), 'pdf', cache_imagenes=cache) == 4
+    contenido, paginas = _leer_pdf(str(tmp_path / 'lista.pdf'))
+    # La misma miniatura se embebe una sola vez por página, como JPEG
+    assert contenido.count(b'/Subtype /Image') == 1 and b'/Filter /DCTDecode' in contenido
+    assert paginas[0].count('/Im0 Do') == 4
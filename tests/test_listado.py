@@ -0,0 +1,48 @@
+import base64
+
+import pandas as pd
+
+from listado import colores_stock, html_pagina, imagen_en_linea, precios_pagina
+
+
+def _pagina():
+    return pd.DataFrame({
+        'Codigo': ['AB1-DECO', 'TM-<1>'],
+        'Nombre': ['Deco & cía', 'Taza'],
+        'Precio': [166800, 10050],
+        'Precio x Mayor': [147600, 9000],
+        'Stock': [10, 1],
+        'StockSuc2': [0, 4],
+        'imagen': ['https://img/1.jpg', None],
+    })
+
+
+def test_colores_y_precios_de_la_pagina():
+    assert colores_stock(pd.Series([10, 6, 5, 2, 1, 0, -3, None])).tolist() == \
+        ['green', 'green', 'black', 'black', 'orange', 'orange', 'orange', 'black']
+    assert precios_pagina(_pagina(), False).tolist() == [1668.0, 100.5]
+    assert precios_pagina(_pagina(), True).tolist() == [1476.0, 90.0]
+
+
+def test_html_de_la_pagina(tmp_path):
+    miniatura = tmp_path / 'miniatura.png'
+    miniatura.write_bytes(b'png')
+
+    texto = html_pagina(_pagina(), False, {'https://img/1.jpg': str(miniatura)}, ancho_imagen=80)
+
+    bloques = texto.split('<hr>')[:-1]
+    assert len(bloques) == 2
+    assert '<h4>AB1-DECO | Deco &amp; cía | $1,668.00</h4>' in bloques[0]
+    assert f"<img src='data:image/png;base64,{base64.b64encode(b'png').decode()}' width='80'>" in bloques[0]
+    assert "color: green;'><strong>Stock:</strong> 10" in bloques[0] and 'Suc. 2' not in bloques[0]
+    assert '<h4>TM-&lt;1&gt; | Taza | $100.50</h4>' in bloques[1] and '<img' not in bloques[1]
+    assert "color: orange;'><strong>Stock:</strong> 1" in bloques[1]
+    assert '<strong>Disponible en Suc. 2:</strong> 4' in bloques[1]
+
+    assert '$1,476.00' in html_pagina(_pagina(), True, {})
+    assert html_pagina(_pagina().iloc[:0], False, {}) == ''
+
+
+def test_imagen_en_linea_sin_archivo(tmp_path):
+    assert imagen_en_linea(None) == ''
+    assert imagen_en_linea(str(tmp_path / 'no_existe.jpg')) == ''
@@ -0,0 +1,119 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import MupeBot4
+from MupeBot4 import CargaDiferida
+
+
+def test_carga_diferida_carga_una_sola_vez_con_varios_hilos():
+    cargas = []
+
+    def cargar():
+        cargas.append(threading.current_thread().name)
+        time.sleep(0.05)
+        return object()
+
+    componente = CargaDiferida('prueba', cargar)
+    assert not componente.cargado and componente.segundos is None
+
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(componente.obtener())) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert len(cargas) == 1
+    assert len(resultados) == 8 and all(r is resultados[0] for r in resultados)
+    assert componente.cargado and componente.segundos >= 0.05
+    assert componente.obtener() is resultados[0]
+
+
+def test_carga_diferida_reintenta_si_falla():
+    intentos = []
+
+    def cargar():
+        intentos.append(1)
+        if len(intentos) == 1:
+            raise ImportError('sin modelo')
+        return 'modelo'
+
+    componente = CargaDiferida('prueba', cargar)
+    try:
+        componente.obtener()
+    except ImportError:
+        pass
+    assert not componente.cargado
+    assert componente.obtener() == 'modelo' and len(intentos) == 2
+
+
+def test_importar_el_bot_no_carga_los_componentes_pesados():
+    codigo = ('import sys, MupeBot4; '
+              'print(sorted(m for m in ("transformers", "torch", "gtts", "speech_recognition", "playsound", "pandas") '
+              'if m in sys.modules))')
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    salida = subprocess.run([sys.executable, '-c', codigo], cwd=raiz, capture_output=True, text=True, check=True)
+    assert salida.stdout.strip() == '[]'
+
+
+# Voz que suena de fondo como la real: decir() vuelve enseguida y esperar() bloquea hasta que termina
+class _VozLenta:
+    def __init__(self, eventos):
+        self.eventos = eventos
+        self.hilos = []
+
+    def decir(self, texto):
+        def reproducir():
+            time.sleep(0.05)
+            self.eventos.append(f'sonó {texto}')
+        self.hilos.append(threading.Thread(target=reproducir))
+        self.hilos[-1].start()
+
+    def esperar(self):
+        for hilo in self.hilos:
+            hilo.join()
+
+
+# Módulo speech_recognition falso que anota cuándo se abre el micrófono y cuándo se escucha
+def _reconocimiento_falso(eventos):
+    class Microphone:
+        def __enter__(self):
+            eventos.append('micrófono')
+            return self
+
+        def __exit__(self, *excepcion):
+            return False
+
+    class Recognizer:
+        def adjust_for_ambient_noise(self, source):
+            eventos.append('ruido ambiente')
+
+        def listen(self, source):
+            eventos.append('escuchar')
+            return 'audio'
+
+        def recognize_google(self, audio, language):
+            return 'Actualizar Productos'
+
+    return SimpleNamespace(Microphone=Microphone, Recognizer=Recognizer,
+                           UnknownValueError=ValueError, RequestError=OSError)
+
+
+def test_reconocer_comando_abre_el_microfono_cuando_termino_el_aviso(monkeypatch):
+    eventos = []
+    voz = _VozLenta(eventos)
+    monkeypatch.setattr(MupeBot4, 'voz', CargaDiferida('voz', lambda: voz))
+    monkeypatch.setattr(MupeBot4, 'reconocimiento', CargaDiferida('reconocimiento', lambda: _reconocimiento_falso(eventos)))
+
+    assert MupeBot4.reconocer_comando() == 'actualizar productos'
+    assert eventos == ['sonó Escuchando...', 'micrófono', 'ruido ambiente', 'escuchar']
+
+    # El resto de las frases sigue sonando de fondo
+    MupeBot4.hablar('Productos actualizados correctamente.')
+    assert eventos[-1] == 'escuchar'
+    voz.esperar()
+    assert eventos[-1] == 'sonó Productos actualizados correctamente.'
@@ -0,0 +1,75 @@
+import pandas as pd
+
+from catalogo import IndiceCatalogo, compactar_catalogo, normalizar_catalogo
+from escaneo import LectorCodigos
+from presupuesto import (COLUMNAS_PRESUPUESTO, agregar_lineas, calcular_presupuesto, leer_lineas, lineas_vacias,
+                         presupuesto_csv, totales_presupuesto)
+
+
+def _lector():
+    df = pd.DataFrame({
+        'Id': [1, 2, 3],
+        'Codigo': ['AB1-DECO', 'TM-1', '12345'],
+        'Nombre': ['Deco', 'Taza', 'Vaso'],
+        'Codigo de Barras': ['7790001', '', None],
+        'Precio': [1668.0, 100.5, 10],
+        'Precio x Mayor': [1476.0, 90, 9],
+        'Stock': [10, 2, 0],
+        'forzar venta x cantidad': [6, 0, 1],
+    })
+    return LectorCodigos(IndiceCatalogo(compactar_catalogo(normalizar_catalogo(df))))
+
+
+def test_leer_y_acumular_lineas_pegadas():
+    assert leer_lineas('\n  \n').empty
+    lineas = leer_lineas('AB1-DECO 4\nTM-1;3\n\nNOPE\n12345.0\t2')
+    assert lineas['Codigo'].tolist() == ['AB1-DECO', 'TM-1', 'NOPE', '12345.0']
+    assert lineas['Cantidad'].tolist() == [4, 3, 1, 2]
+
+    # Un código que ya estaba suma la cantidad y conserva el orden y el descuento de la primera línea
+    lineas.loc[0, 'Descuento %'] = 10.0
+    todas = agregar_lineas(lineas, leer_lineas(' AB1-DECO 5'))
+    assert todas['Codigo'].tolist() == ['AB1-DECO', 'TM-1', 'NOPE', '12345.0']
+    assert todas['Cantidad'].tolist() == [9, 3, 1, 2]
+    assert todas['Descuento %'].tolist() == [10.0, 0.0, 0.0, 0.0]
+    assert agregar_lineas(lineas_vacias(), lineas_vacias()).empty
+
+
+def test_presupuesto_redondea_a_la_venta_forzada_y_aplica_descuentos():
+    lineas = leer_lineas('AB1-DECO 9\ntm-1 3\nNOPE\n12345.0')
+    lineas['Descuento %'] = [0.0, 10.0, 0.0, 0.0]
+
+    presupuesto, no_encontrados = calcular_presupuesto(_lector(), lineas, descuento_general=5)
+
+    assert no_encontrados == ['NOPE']
+    assert presupuesto.columns.tolist() == COLUMNAS_PRESUPUESTO
+    assert presupuesto['Codigo'].tolist() == ['AB1-DECO', 'TM-1', '12345']
+    # 9 unidades de un producto que se vende de a 6 son 2 cajas (12 unidades); el múltiplo 1 no fuerza nada
+    assert presupuesto['Cantidad'].tolist() == [12, 3, 1]
+    assert presupuesto['Cajas'].tolist() == [2, 0, 0]
+    assert presupuesto['Venta Forzada'].tolist() == [6, 0, 0]
+    # Importes en centavos: descuento de la línea y después el general
+    assert presupuesto['Precio Caja/Venta'].tolist() == [1000800, 10050, 1000]
+    assert presupuesto['Subtotal'].tolist() == [2001600, 30150, 1000]
+    assert presupuesto['Total'].tolist() == [1901520, 25778, 950]
+
+    assert totales_presupuesto(presupuesto) == {
+        'lineas': 3, 'unidades': 16, 'subtotal': 20327.5, 'descuento': 1045.02, 'total': 19282.48, 'sin_stock': 3,
+    }
+
+    mayorista, _ = calcular_presupuesto(_lector(), lineas, mayorista=True)
+    assert mayorista['Precio'].tolist() == [147600, 9000, 900]
+    assert mayorista['Total'].tolist() == [1771200, 24300, 900]
+
+
+def test_presupuesto_csv_en_pesos_como_las_exportaciones_del_sistema():
+    presupuesto, _ = calcular_presupuesto(_lector(), leer_lineas('TM-1 3'))
+
+    contenido = presupuesto_csv(presupuesto)
+
+    assert contenido.startswith(b'\xef\xbb\xbf')
+    encabezado, fila = contenido.decode('utf-8-sig').splitlines()
+    assert encabezado.split(';') == COLUMNAS_PRESUPUESTO
+    assert fila == 'TM-1;Taza;3;0;0;3;100,5;100,5;301,5;0,0;301,5;2'
+    # El presupuesto calculado sigue en centavos
+    assert presupuesto['Total'].tolist() == [30150]
@@ -0,0 +1,126 @@
+import glob
+
+import pytest
+
+from catalogo import cargar_catalogo, firma_catalogo
+from sincronizacion import ExportacionInvalida, FuenteCarpeta, FuenteHTTP, ServicioSincronizacion, validar_exportacion
+
+ETAG = '"v1"'
+PAGINA_LOGIN = b'<!DOCTYPE html>\n<html><body><form action="/login">Iniciar sesion</form></body></html>'
+
+
+# Exportación con el esquema del sistema: "Precio" es el precio por mayor, "Precio Jugueterias face"
+# el de lista y "Precio Mayorista" viene vacío
+def _exportacion(filas, lista=True):
+    lineas = ['Id;Codigo;Nombre;Precio;Stock;"Precio Mayorista";"Precio Jugueterias face";Marca;Categorias;imagen']
+    lineas += [f'{i};A{i:03d};"Producto {i}";{90 + i}.00;{i % 7};;{f"{100 + i}.50" if lista else ""};Marca;Juguetes;'
+               for i in range(1, filas + 1)]
+    return ('\n'.join(lineas) + '\n').encode('latin-1')
+
+
+# El servidor local hace de panel de exportación; el CSV se sirve con ETag (304 si el pedido ya lo trae)
+@pytest.fixture
+def panel(servidor_http):
+    return servidor_http
+
+
+def _servir_csv(panel, datos):
+    panel.responder(200, datos, 'text/csv', etag=ETAG)
+
+
+def test_fuente_http_200_304_y_pagina_de_login(panel):
+    fuente = FuenteHTTP(f'{panel.url}/exportar.csv', token='secreto')
+
+    _servir_csv(panel, _exportacion(3))
+    assert fuente.descargar() == _exportacion(3)
+    assert panel.pedidos[0]['encabezados']['Authorization'] == 'Bearer secreto'
+
+    # Sin confirmar se vuelve a bajar entera; confirmada, el pedido es condicional
+    assert fuente.descargar() == _exportacion(3)
+    assert 'If-None-Match' not in panel.pedidos[1]['encabezados']
+    fuente.confirmar()
+    assert fuente.descargar() is None
+    assert panel.pedidos[2]['encabezados']['If-None-Match'] == ETAG
+
+    # La sesión venció: el panel devuelve la página de login con 200 y sin ETag
+    panel.responder(200, PAGINA_LOGIN, 'text/html')
+    assert fuente.descargar() == PAGINA_LOGIN
+
+
+def test_sincronizar_rechaza_login_y_exportacion_cortada(panel, tmp_path):
+    file_path = tmp_path / 'catalogo.csv'
+    file_path.write_bytes(_exportacion(10))
+    dir_cache = str(tmp_path / 'cache')
+    copia = tmp_path / 'copia.csv'
+    servicio = ServicioSincronizacion(FuenteHTTP(f'{panel.url}/exportar.csv'), str(file_path), dir_cache, copia=str(copia))
+
+    _servir_csv(panel, _exportacion(12))
+    resultado = servicio.sincronizar()
+    assert resultado['estado'] == 'actualizado'
+    assert resultado['filas'] == 12
+    assert copia.read_bytes() == _exportacion(12)
+    assert servicio.sincronizar()['estado'] == 'sin cambios'
+    firma = firma_catalogo(str(file_path), dir_cache)
+
+    panel.responder(200, PAGINA_LOGIN, 'text/html')
+    with pytest.raises(ExportacionInvalida, match='HTML'):
+        servicio.sincronizar()
+
+    # La exportación se cortó a la mitad de la descarga: no reemplaza al catálogo vigente
+    cortada = _exportacion(12)[:_exportacion(12).index(b'\n3;') + 4]
+    panel.responder(200, cortada, 'text/plain')
+    with pytest.raises(ExportacionInvalida, match='cortada'):
+        servicio.sincronizar()
+
+    assert firma_catalogo(str(file_path), dir_cache) == firma
+    catalogo = cargar_catalogo(str(file_path), dir_cache)
+    assert len(catalogo) == 12
+    assert catalogo['Precio x Mayor'].iloc[0] == 9100
+    assert catalogo['Precio'].iloc[0] == 10150
+    assert copia.read_bytes() == _exportacion(12)
+
+
+def test_una_exportacion_cortada_con_etag_se_vuelve_a_bajar(panel, tmp_path):
+    file_path = tmp_path / 'catalogo.csv'
+    file_path.write_bytes(_exportacion(10))
+    servicio = ServicioSincronizacion(FuenteHTTP(f'{panel.url}/exportar.csv'), str(file_path), str(tmp_path / 'cache'))
+
+    # El panel cortó la exportación pero la respondió como completa, con su ETag
+    completa = _exportacion(12)
+    _servir_csv(panel, completa[:completa.index(b'\n3;') + 4])
+    with pytest.raises(ExportacionInvalida, match='cortada'):
+        servicio.sincronizar()
+
+    # El próximo pedido no es condicional: si lo fuera, el panel respondería 304 y nunca se ingeriría
+    _servir_csv(panel, completa)
+    resultado = servicio.sincronizar()
+    assert 'If-None-Match' not in panel.pedidos[-1]['encabezados']
+    assert resultado['estado'] == 'actualizado'
+    assert resultado['filas'] == 12
+    assert servicio.sincronizar()['estado'] == 'sin cambios'
+    assert panel.pedidos[-1]['encabezados']['If-None-Match'] == ETAG
+
+
+def test_validar_exportacion_rechaza_un_precio_sin_cargar():
+    df = validar_exportacion(_exportacion(3))
+    assert len(df) == 3
+
+    with pytest.raises(ExportacionInvalida, match='Precio Jugueterias face'):
+        validar_exportacion(_exportacion(3, lista=False))
+
+
+def test_fuente_carpeta_con_corchetes_en_la_ruta(tmp_path):
+    carpeta = tmp_path / 'Exportaciones [2024]'
+    carpeta.mkdir()
+    (carpeta / 'tmp_28_1.csv').write_bytes(_exportacion(2))
+    (carpeta / 'tmp_28_[copia].csv').write_bytes(_exportacion(3))
+
+    fuente = FuenteCarpeta(str(carpeta), 'tmp_28_1.csv')
+    assert fuente.descargar() == _exportacion(2)
+    fuente.confirmar()
+    assert fuente.descargar() is None
+
+    # Un archivo puntual con corchetes en el nombre se pasa escapado
+    assert FuenteCarpeta(str(carpeta), glob.escape('tmp_28_[copia].csv')).descargar() == _exportacion(3)
+    with pytest.raises(FileNotFoundError):
+        FuenteCarpeta(str(carpeta), 'tmp_28_[copia].csv').descargar()
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+import threading
+
+from voz import CacheFrases, Voz
+
+FRASE = "Escuchando..."
+
+
+# Backend de prueba: cuenta las síntesis y devuelve el texto como audio
+class _BackendFijo:
+    extension = 'wav'
+
+    def __init__(self):
+        self.sintetizados = []
+
+    def sintetizar(self, texto, idioma):
+        self.sintetizados.append((texto, idioma))
+        return texto.encode('utf-8')
+
+
+def test_frase_fija_se_sintetiza_una_sola_vez(tmp_path):
+    backend = _BackendFijo()
+    cache = CacheFrases(backend, str(tmp_path), frases=[FRASE])
+
+    assert cache.precalentar() == []
+    ruta = cache.audio_frase(FRASE)
+    assert cache.audio_frase(FRASE) == ruta
+    # Otra instancia (ej. el asistente reiniciado) la toma del disco
+    assert CacheFrases(backend, str(tmp_path), frases=[FRASE]).audio_frase(FRASE) == ruta
+    assert backend.sintetizados == [(FRASE, 'es')]
+    with open(ruta, 'rb') as f:
+        assert f.read() == FRASE.encode('utf-8')
+
+
+def test_decir_no_espera_a_que_termine_de_sonar(tmp_path):
+    backend = _BackendFijo()
+    sonando = threading.Event()
+    seguir = threading.Event()
+    reproducidos = []
+
+    def reproducir(ruta):
+        with open(ruta, 'rb') as f:
+            reproducidos.append(f.read().decode('utf-8'))
+        sonando.set()
+        seguir.wait(5)
+
+    voz = Voz(CacheFrases(backend, str(tmp_path), frases=[FRASE]), reproducir)
+    voz.decir(FRASE)
+    voz.decir("Respuesta nueva del modelo")
+    voz.decir(FRASE)
+
+    # decir volvió con la primera frase todavía sonando y las otras en cola
+    assert sonando.wait(5)
+    assert len(reproducidos) == 1
+    seguir.set()
+    voz.esperar()
+
+    assert reproducidos == [FRASE, "Respuesta nueva del modelo", FRASE]
+    assert backend.sintetizados == [(FRASE, 'es'), ("Respuesta nueva del modelo", 'es')]
+
+
+# La voz se carga la primera vez que el asistente habla: no tiene que arrastrar pandas ni pyarrow
+def test_importar_voz_no_carga_el_catalogo():
+    codigo = "import sys, voz; print(','.join(m for m in ('pandas', 'numpy', 'pyarrow') if m in sys.modules))"
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    salida = subprocess.run([sys.executable, '-c', codigo], cwd=raiz, capture_output=True, text=True, check=True)
+    assert salida.stdout.strip() == ''
@@ -10539,6 +10539,7 @@ with output_area:
 
 # Importar librerías necesarias
 import pandas as pd
+import numpy as np
 import ipywidgets as widgets
 from IPython.display import display, HTML, Javascript, clear_output
 import os
@@ -10575,6 +10576,18 @@ else:
     print("La columna 'Fecha Creado' no existe en el DataFrame.")
     # Puedes optar por crear una columna de fecha por defecto o manejar el error según tus necesidades
 
+# Orden "más nuevo primero" calculado una sola vez al cargar: las vistas de novedades solo recortan
+if 'Fecha Creado' in df.columns:
+    df_novedades = df.sort_values('Fecha Creado', ascending=False, kind='stable')
+    rango_novedad = pd.Series(np.arange(len(df_novedades)), index=df_novedades.index)
+else:
+    df_novedades = df
+    rango_novedad = pd.Series(np.arange(len(df)), index=df.index)
+
+# Función para quedarse con las `n` filas más nuevas de un subconjunto sin reordenarlo entero
+def mas_nuevos(df_subconjunto, n=100):
+    return df_subconjunto.loc[rango_novedad[df_subconjunto.index].nsmallest(n).index]
+
 # Paso 1: Separar las categorías individuales y obtener una lista única
 def obtener_categorias_unicas(df):
     if 'Categorias' in df.columns:
@@ -10766,49 +10779,43 @@ def actualizar_ubicacion(change):
 
 checkbox_ubicacion.observe(actualizar_ubicacion, names='value')
 
-# Función para mostrar productos en formato de lista (imagen más pequeña)
-def mostrar_producto_formato_lista(producto):
-    stock = obtener_valor(producto, 'Stock')
-    try:
-        stock_valor = float(stock)
-        stock_color = "red" if stock_valor < 5 else "green"
-    except ValueError:
-        stock_color = "black"
-
-    precio_jugueterias_face = obtener_valor(producto, 'Precio Jugueterias face')
-    try:
-        precio_jugueterias_face = float(precio_jugueterias_face)
-    except ValueError:
-        precio_jugueterias_face = 0
+# Función para obtener una columna de la página con 'Sin datos' en los valores vacíos (versión vectorizada de obtener_valor)
+def columna_o_sin_datos(productos, campo):
+    if campo not in productos.columns:
+        return pd.Series('Sin datos', index=productos.index, dtype=object)
+    columna = productos[campo].astype(object)
+    return columna.where(columna.notna() & (columna != ''), 'Sin datos')
+
+# Función para armar el HTML de toda una página de productos en formato de lista (imagen más pequeña)
+# Precios, stock y venta forzada se calculan como columnas para toda la página y el HTML se arma en una pasada
+def html_lista_productos(productos):
+    stock = columna_o_sin_datos(productos, 'Stock')
+    stock_valor = pd.to_numeric(stock, errors='coerce')
+    stock_color = np.select([stock_valor < 5, stock_valor >= 5], ['red', 'green'], default='black')
+
+    precio_jugueterias_face = pd.to_numeric(columna_o_sin_datos(productos, 'Precio Jugueterias face'), errors='coerce').fillna(0)
+    forzar_multiplos = pd.to_numeric(columna_o_sin_datos(productos, 'forzar multiplos'), errors='coerce').fillna(0)
+    venta_forzada = forzar_multiplos > 0
+    precio_caja_venta = forzar_multiplos * precio_jugueterias_face
+
+    campo_descripcion = 'Descripción' if 'Descripción' in productos.columns else 'Descripcion'
+    columnas = zip(
+        columna_o_sin_datos(productos, 'Nombre'), columna_o_sin_datos(productos, 'Codigo'),
+        stock, stock_color, columna_o_sin_datos(productos, campo_descripcion),
+        precio_jugueterias_face, venta_forzada, forzar_multiplos, precio_caja_venta,
+        columna_o_sin_datos(productos, 'Precio'), columna_o_sin_datos(productos, 'unidad por bulto'),
+        columna_o_sin_datos(productos, 'imagen'),
+    )
 
-    forzar_multiplos = obtener_valor(producto, 'forzar multiplos')
-    try:
-        forzar_multiplos = int(forzar_multiplos)
-        if forzar_multiplos > 0:
-            venta_forzada_texto = f"Venta Forzada: {forzar_multiplos}"
-            venta_forzada_color = "red"
-            precio_caja_venta = forzar_multiplos * precio_jugueterias_face
-            mostrar_precio_caja = True
+    bloques = []
+    for (nombre, codigo, stock, stock_color, descripcion, precio, forzada, multiplos, precio_caja,
+         precio_mayorista, unidades_por_bulto, img_url) in columnas:
+        if forzada:
+            venta_forzada_html = f"<p style=\"font-size: 12px; color: red;\"><strong>Venta Forzada: {int(multiplos)}</strong></p>" \
+                                 f"<p style='font-size: 12px; font-weight: bold;'>Precio Caja/Venta: ${precio_caja}</p>"
         else:
-            venta_forzada_texto = "Venta Forzada: NO"
-            venta_forzada_color = "green"
-            precio_caja_venta = precio_jugueterias_face
-            mostrar_precio_caja = False
-    except ValueError:
-        venta_forzada_texto = "Venta Forzada: NO"
-        venta_forzada_color = "green"
-        precio_caja_venta = precio_jugueterias_face
-        mostrar_precio_caja = False
-
-    precio_mayorista = obtener_valor(producto, 'Precio')
-    unidades_por_bulto = obtener_valor(producto, 'unidad por bulto')
-    descripcion = obtener_valor(producto, 'Descripción') if 'Descripción' in producto else obtener_valor(producto, 'Descripcion')
-    img_url = obtener_valor(producto, 'imagen')
-    nombre = obtener_valor(producto, 'Nombre')
-    codigo = obtener_valor(producto, 'Codigo')
-
-    # Diseño HTML para listas (imagen más pequeña)
-    html_content = f"""
+            venta_forzada_html = "<p style=\"font-size: 12px; color: green;\"><strong>Venta Forzada: NO</strong></p>"
+        bloques.append(f"""
     <div style="border:1px solid #cccccc; padding: 10px; margin: 5px auto; width: 90%;
                 font-family: Arial, sans-serif; background-color: #ffffff; box-shadow: 1px 1px 6px #aaaaaa;
                 border-radius: 5px; text-align: left;">
@@ -10819,9 +10826,8 @@ def mostrar_producto_formato_lista(producto):
                 <p style="font-size: 12px; font-weight: bold; color: {stock_color};"><strong>STOCK</strong></p>
                 <p style="font-size: 12px;">{stock}</p>
                 <p style="font-size: 12px;"><strong>Descripción:</strong> {descripcion}</p>
-                <p style="font-size: 12px; font-weight: bold;">Precio: ${precio_jugueterias_face}</p>
-                <p style="font-size: 12px; color: {venta_forzada_color};"><strong>{venta_forzada_texto}</strong></p>
-                {"<p style='font-size: 12px; font-weight: bold;'>Precio Caja/Venta: $" + str(precio_caja_venta) + "</p>" if mostrar_precio_caja else ""}
+                <p style="font-size: 12px; font-weight: bold;">Precio: ${precio}</p>
+                {venta_forzada_html}
                 <p style="font-size: 12px;"><strong>Precio Mayorista:</strong> ${precio_mayorista}</p>
                 <p style="font-size: 12px;"><strong>Unidades x Bulto:</strong> {unidades_por_bulto}</p>
             </div>
@@ -10830,8 +10836,8 @@ def mostrar_producto_formato_lista(producto):
             </div>
         </div>
     </div>
-    """
-    return html_content
+    """)
+    return ''.join(bloques)
 
 # Función para mostrar una lista paginada de productos (para categorías y novedades)
 def mostrar_lista_productos(df_productos, pagina_actual, productos_por_pagina):
@@ -10844,10 +10850,8 @@ def mostrar_lista_productos(df_productos, pagina_actual, productos_por_pagina):
 
     with output_area:
         output_area.clear_output()
-        for idx, fila in productos_pagina.iterrows():
-            # Aquí usamos la versión compacta de la visualización para listas
-            html_producto = mostrar_producto_formato_lista(fila)
-            display(HTML(html_producto))
+        # Toda la página se muestra en un solo bloque HTML con la versión compacta para listas
+        display(HTML(html_lista_productos(productos_pagina)))
         # Mostrar controles de paginación
         if total_paginas > 1:
             botones_paginas = []
@@ -10869,7 +10873,7 @@ def actualizar_resultados(change):
         if checkbox_ordenar_novedad.value and not checkbox_categorias.value and texto == '':
             # Mostrar los 100 productos más recientes
             if 'Fecha Creado' in df.columns:
-                df_filtrado = df.sort_values('Fecha Creado', ascending=False).head(100)
+                df_filtrado = df_novedades.head(100)
             else:
                 df_filtrado = df.head(100)
                 print("La columna 'Fecha Creado' no existe. Ordenando por el orden original del DataFrame.")
@@ -10888,7 +10892,7 @@ def actualizar_resultados(change):
                     # Ordenar según el checkbox "Ordenar x Novedad"
                     if checkbox_ordenar_novedad.value:
                         if 'Fecha Creado' in df_filtrado.columns:
-                            df_filtrado = df_filtrado.sort_values('Fecha Creado', ascending=False).head(100)
+                            df_filtrado = mas_nuevos(df_filtrado)
                         else:
                             df_filtrado = df_filtrado.head(100)
                             print("La columna 'Fecha Creado' no existe. Ordenando por el orden original del DataFrame.")
@@ -10911,7 +10915,7 @@ def actualizar_resultados(change):
                 coincidencias = df[df['Nombre'].str.contains(texto, case=False, na=False)]
                 if checkbox_ordenar_novedad.value:
                     if 'Fecha Creado' in coincidencias.columns:
-                        coincidencias = coincidencias.sort_values('Fecha Creado', ascending=False).head(100)
+                        coincidencias = mas_nuevos(coincidencias)
                     else:
                         coincidencias = coincidencias.head(100)
                         print("La columna 'Fecha Creado' no existe. Ordenando por el orden original del DataFrame.")
@@ -10943,7 +10947,7 @@ def actualizar_resultados(change):
             if checkbox_ordenar_novedad.value:
                 # Mostrar los 100 productos más recientes
                 if 'Fecha Creado' in df.columns:
-                    df_filtrado = df.sort_values('Fecha Creado', ascending=False).head(100)
+                    df_filtrado = df_novedades.head(100)
                 else:
                     df_filtrado = df.head(100)
                     print("La columna 'Fecha Creado' no existe. Ordenando por el orden original del DataFrame.")
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import queue
+import tempfile
+import threading
+from io import BytesIO
+
+from archivos import escribir_atomico
+
+# Carpeta donde se guardan los audios de las frases que se repiten
+DIR_CACHE_VOZ = '.cache_voz'
+
+IDIOMA = 'es'
+
+
+# Backend de texto a voz con Google Text-to-Speech (necesita red)
+# Cualquier objeto con `extension` y `sintetizar(texto, idioma) -> bytes` sirve como backend
+# (ej. un backend local que devuelva audio fijo, para probar sin red)
+class BackendGTTS:
+    extension = 'mp3'
+
+    def sintetizar(self, texto, idioma=IDIOMA):
+        from gtts import gTTS
+
+        salida = BytesIO()
+        gTTS(texto, lang=idioma).write_to_fp(salida)
+        return salida.getvalue()
+
+
+# Cache en disco de frases ya sintetizadas, por texto e idioma
+# Solo las frases registradas como fijas se guardan; el texto nuevo (ej. respuestas del modelo) va al backend
+class CacheFrases:
+    def __init__(self, backend, directorio=DIR_CACHE_VOZ, idioma=IDIOMA, frases=()):
+        self.backend = backend
+        self.directorio = directorio
+        self.idioma = idioma
+        self.frases = set(frases)
+        os.makedirs(directorio, exist_ok=True)
+
+    def ruta(self, texto, idioma=None):
+        clave = hashlib.sha256(f"{idioma or self.idioma}\0{texto}".encode('utf-8')).hexdigest()
+        return os.path.join(self.directorio, f"{clave}.{self.backend.extension}")
+
+    # Función para obtener el audio de una frase fija: del disco, o sintetizándola una vez y guardándola
+    def audio_frase(self, texto, idioma=None):
+        ruta = self.ruta(texto, idioma)
+        if not os.path.isfile(ruta):
+            escribir_atomico(ruta, self.backend.sintetizar(texto, idioma or self.idioma))
+        return ruta
+
+    # Función para dejar sintetizadas de antemano las frases fijas que todavía no están en disco
+    # Devuelve las que no se pudieron sintetizar (ej. sin conexión); se reintentan al decirlas
+    def precalentar(self):
+        fallidas = []
+        for texto in sorted(self.frases):
+            try:
+                self.audio_frase(texto)
+            except Exception:
+                fallidas.append(texto)
+        return fallidas
+
+
+# Voz del asistente: reproduce en un hilo aparte, en orden, sin bloquear a quien habla
+# `reproducir` recibe la ruta de un archivo de audio y vuelve cuando terminó de sonar
+class Voz:
+    def __init__(self, cache, reproducir):
+        self.cache = cache
+        self.reproducir = reproducir
+        self._pendientes = queue.Queue()
+        self._hilo = threading.Thread(target=self._reproducir_pendientes, name='voz', daemon=True)
+        self._hilo.start()
+
+    # Función para decir un texto: vuelve enseguida y el audio se sintetiza (si hace falta) y suena de fondo
+    def decir(self, texto):
+        self._pendientes.put(texto)
+
+    # Función para esperar a que termine de sonar todo lo pendiente (ej. antes de cerrar el programa)
+    def esperar(self):
+        self._pendientes.join()
+
+    def _reproducir_pendientes(self):
+        while True:
+            texto = self._pendientes.get()
+            try:
+                self._reproducir_texto(texto)
+            except Exception as e:
+                print(f"No se pudo decir '{texto}': {e}")
+            finally:
+                self._pendientes.task_done()
+
+    def _reproducir_texto(self, texto):
+        if texto in self.cache.frases:
+            self.reproducir(self.cache.audio_frase(texto))
+            return
+        audio = self.cache.backend.sintetizar(texto, self.cache.idioma)
+        descriptor, ruta = tempfile.mkstemp(suffix=f'.{self.cache.backend.extension}', prefix='voz_')
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                f.write(audio)
+            self.reproducir(ruta)
+        finally:
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass